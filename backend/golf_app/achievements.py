@@ -0,0 +1,151 @@
+import operator
+from bisect import bisect_left, bisect_right
+
+from django.core.cache import cache
+from django.db.models import Count, Max, Min, Q
+
+from .cache import cross_worker_ttl
+from .models import Achievement, Round, UserAchievement
+
+# criteria_json type -> (stat it is checked against, comparison with the criteria value)
+RULE_TYPES = {
+    'total_rounds': ('completed_rounds', operator.ge),
+    'score_below': ('total_score', operator.lt),
+    # "30 or fewer putts" in the shipped achievements
+    'putts_below': ('total_putts', operator.le),
+    'fairways_hit': ('fairways_hit', operator.ge),
+    'sand_saves': ('sand_saves', operator.ge),
+}
+
+# Low-is-better rules only count rounds with at least this many holes played
+FULL_ROUND_HOLES = 18
+
+_RULES_KEY = 'achievements:rules'
+
+
+def compile_rules():
+    """
+    The rule table: ``{rule type: (sorted thresholds, achievement ids)}``,
+    built from every achievement with recognised criteria and cached until
+    an achievement changes (at most PROCESS_CACHE_TTL without a shared
+    cache, whose invalidations never reach other workers).
+    """
+    rules = cache.get(_RULES_KEY)
+    if rules is not None:
+        return rules
+    grouped = {}
+    for achievement_id, criteria in Achievement.objects.values_list('id', 'criteria_json'):
+        if not isinstance(criteria, dict) or criteria.get('type') not in RULE_TYPES:
+            continue
+        try:
+            value = float(criteria['value'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        grouped.setdefault(criteria['type'], []).append((value, achievement_id))
+    rules = {}
+    for rule_type, entries in grouped.items():
+        entries.sort()
+        rules[rule_type] = ([value for value, _ in entries], [achievement_id for _, achievement_id in entries])
+    cache.set(_RULES_KEY, rules, cross_worker_ttl(None))
+    return rules
+
+
+def invalidate_rules():
+    cache.delete(_RULES_KEY)
+
+
+def satisfied(rules, stats):
+    """Achievement ids whose criteria hold for ``stats``; rules with no stat available are skipped."""
+    earned = []
+    for rule_type, (values, achievement_ids) in rules.items():
+        stat, compare = RULE_TYPES[rule_type]
+        current = stats.get(stat)
+        if current is None:
+            continue
+        # Thresholds are sorted, so the satisfied ones form a prefix or a suffix
+        if compare is operator.ge:
+            earned.extend(achievement_ids[:bisect_right(values, current)])
+        elif compare is operator.le:
+            earned.extend(achievement_ids[bisect_left(values, current):])
+        else:
+            earned.extend(achievement_ids[bisect_right(values, current):])
+    return earned
+
+
+def award(awards):
+    """Create the missing ``UserAchievement`` rows for ``{user_id: achievement ids}`` in bulk."""
+    awards = {user_id: set(ids) for user_id, ids in awards.items() if ids}
+    if not awards:
+        return 0
+    held = set(
+        UserAchievement.objects.filter(user_id__in=list(awards)).values_list('user_id', 'achievement_id')
+    )
+    new = [
+        UserAchievement(user_id=user_id, achievement_id=achievement_id)
+        for user_id, ids in awards.items()
+        for achievement_id in ids
+        if (user_id, achievement_id) not in held
+    ]
+    UserAchievement.objects.bulk_create(new, batch_size=1000, ignore_conflicts=True)
+    return len(new)
+
+
+def round_stats(round_state):
+    """The stats a completed round contributes, from its own stored totals."""
+    stats = {field: round_state[field] for field in ('fairways_hit', 'sand_saves')}
+    if round_state['holes_played'] >= FULL_ROUND_HOLES:
+        stats['total_score'] = round_state['total_score']
+        stats['total_putts'] = round_state['total_putts']
+    return stats
+
+
+def evaluate_round(round_state, changed=None):
+    """
+    Award what a completed round earns. Only rules present in the table are
+    looked at, and the user's round count is only queried when a
+    ``total_rounds`` rule exists. ``changed`` limits the check to rules on
+    those stats, e.g. the totals a hole edit moved. Returns the number of
+    new awards.
+    """
+    if not round_state['is_completed']:
+        return 0
+    rules = compile_rules()
+    if changed is not None:
+        rules = {rule_type: rule for rule_type, rule in rules.items() if RULE_TYPES[rule_type][0] in changed}
+    if not rules:
+        return 0
+    stats = round_stats(round_state)
+    if 'total_rounds' in rules:
+        stats['completed_rounds'] = Round.objects.filter(user_id=round_state['user_id'], is_completed=True).count()
+    return award({round_state['user_id']: satisfied(rules, stats)})
+
+
+def backfill_achievements(batch_size=1000):
+    """
+    Evaluate every user's full history, a batch of users at a time: each
+    batch is one grouped query over their completed rounds. Returns
+    ``(users_evaluated, achievements_awarded)``.
+    """
+    rules = compile_rules()
+    users = awarded = 0
+    if not rules:
+        return users, awarded
+    full = Q(holes_played__gte=FULL_ROUND_HOLES)
+    last_user_id = 0
+    while True:
+        rows = list(
+            Round.objects.filter(is_completed=True, user_id__gt=last_user_id)
+            .values('user_id').order_by('user_id')
+            .annotate(
+                completed_rounds=Count('id'),
+                total_score=Min('total_score', filter=full),
+                total_putts=Min('total_putts', filter=full),
+                fairways_hit=Max('fairways_hit'),
+                sand_saves=Max('sand_saves'),
+            )[:batch_size]
+        )
+        if not rows:
+            return users, awarded
+        last_user_id = rows[-1]['user_id']
+        users += len(rows)
+        awarded += award({row['user_id']: satisfied(rules, row) for row in rows})
@@ -0,0 +1,189 @@
+from collections import defaultdict
+
+from django.db.models import OuterRef, Subquery
+
+from .models import Club, Hole, HoleScore, Round
+
+# Completed rounds looked at by default, and the most a caller may ask for
+DEFAULT_ROUNDS = 5
+MAX_ROUNDS = 50
+
+# Holes are grouped into yardage bands this wide within each par type
+YARDAGE_BAND_WIDTH = 50
+
+# A hole played this many strokes over par or worse counts as a blow-up
+BLOWUP_OVER_PAR = 3
+
+MAX_PROBLEM_HOLES = 5
+
+# Share of fairways missed on a band before tee-shot advice is given
+FAIRWAY_MISS_RATE = 0.5
+# Putts per hole before putting advice is given
+PUTTS_PER_HOLE = 2.2
+
+
+def yardage_band(yardage):
+    if yardage is None:
+        return None
+    low = yardage // YARDAGE_BAND_WIDTH * YARDAGE_BAND_WIDTH
+    return f'{low}-{low + YARDAGE_BAND_WIDTH - 1}'
+
+
+def hole_performance_rows(user, rounds=DEFAULT_ROUNDS):
+    """
+    The user's hole scores from their last ``rounds`` completed rounds with
+    the par and yardage of each hole, fetched as a single query.
+    """
+    recent_round_ids = Round.objects.filter(
+        user=user, is_completed=True
+    ).order_by('-date', '-id').values('id')[:rounds]
+    hole = Hole.objects.filter(course_id=OuterRef('round__course_id'), hole_number=OuterRef('hole_number'))
+    return list(
+        HoleScore.objects.filter(round_id__in=Subquery(recent_round_ids)).annotate(
+            par=Subquery(hole.values('par')[:1]),
+            yardage=Subquery(hole.values('yardage')[:1]),
+        ).values_list(
+            'round_id', 'round__course_id', 'hole_number', 'score', 'putts', 'fairway_hit', 'par', 'yardage',
+        )
+    )
+
+
+class _Totals:
+    __slots__ = ('holes', 'over_par', 'blowups', 'putts', 'putted_holes', 'fairways', 'fairway_holes')
+
+    def __init__(self):
+        self.holes = self.over_par = self.blowups = 0
+        self.putts = self.putted_holes = self.fairways = self.fairway_holes = 0
+
+    def add(self, over_par, putts, par, fairway_hit):
+        self.holes += 1
+        self.over_par += over_par
+        self.blowups += over_par >= BLOWUP_OVER_PAR
+        if putts is not None:
+            self.putts += putts
+            self.putted_holes += 1
+        # Fairways only count on holes played with a tee shot to a fairway
+        if par > 3:
+            self.fairways += fairway_hit
+            self.fairway_holes += 1
+
+    def summary(self):
+        return {
+            'holes_played': self.holes,
+            'average_over_par': round(self.over_par / self.holes, 2),
+            'blowup_rate': round(self.blowups / self.holes, 2),
+            'putts_per_hole': round(self.putts / self.putted_holes, 2) if self.putted_holes else None,
+            'fairway_hit_rate': round(self.fairways / self.fairway_holes, 2) if self.fairway_holes else None,
+        }
+
+
+def analyze_holes(rows):
+    """
+    Fold hole score rows into per-par, per-yardage-band and per-hole totals
+    in a single pass. Rows for holes the course doesn't define are skipped.
+    """
+    by_par = defaultdict(_Totals)
+    by_band = defaultdict(_Totals)
+    by_hole = defaultdict(_Totals)
+    hole_info = {}
+    for _, course_id, hole_number, score, putts, fairway_hit, par, yardage in rows:
+        if par is None:
+            continue
+        over_par = score - par
+        by_par[par].add(over_par, putts, par, fairway_hit)
+        by_band[(par, yardage_band(yardage))].add(over_par, putts, par, fairway_hit)
+        by_hole[(course_id, hole_number)].add(over_par, putts, par, fairway_hit)
+        hole_info[(course_id, hole_number)] = (par, yardage)
+
+    problem_holes = sorted(
+        (
+            dict(course=course_id, hole_number=hole_number, par=hole_info[(course_id, hole_number)][0],
+                 yardage=hole_info[(course_id, hole_number)][1], **totals.summary())
+            for (course_id, hole_number), totals in by_hole.items()
+            if totals.over_par > 0
+        ),
+        key=lambda hole: (-hole['average_over_par'], -hole['blowup_rate'], -hole['holes_played'], hole['hole_number']),
+    )[:MAX_PROBLEM_HOLES]
+
+    return {
+        'by_par': [dict(par=par, **totals.summary()) for par, totals in sorted(by_par.items())],
+        'by_yardage_band': sorted(
+            (dict(par=par, yardage_band=band, **totals.summary()) for (par, band), totals in by_band.items()),
+            key=lambda group: (-group['average_over_par'], group['par'], group['yardage_band'] or ''),
+        ),
+        'problem_holes': problem_holes,
+    }
+
+
+def club_guidance(analysis, clubs):
+    """
+    Advice for the weakest parts of the game, naming clubs from the user's
+    bag (``[(club_type, average_distance_yards)]``) where that helps.
+    """
+    clubs = [(club_type, float(distance)) for club_type, distance in clubs if distance]
+    suggestions = []
+    for hole in analysis['problem_holes']:
+        suggestion = {
+            'course': hole['course'],
+            'hole_number': hole['hole_number'],
+            'par': hole['par'],
+            'average_over_par': hole['average_over_par'],
+        }
+        if hole['par'] == 3 and hole['yardage'] and clubs:
+            club_type, distance = min(clubs, key=lambda club: abs(club[1] - hole['yardage']))
+            suggestion['club'] = club_type
+            suggestion['suggestion'] = (
+                f"Tee off with your {club_type} ({distance:.0f} yards) on this {hole['yardage']} yard hole"
+            )
+        elif hole['fairway_hit_rate'] is not None and hole['fairway_hit_rate'] < FAIRWAY_MISS_RATE:
+            control_clubs = [club for club in clubs if club[0] in ('Wood', 'Hybrid')]
+            if control_clubs:
+                club_type, _ = max(control_clubs, key=lambda club: club[1])
+                suggestion['club'] = club_type
+                suggestion['suggestion'] = f'Missing fairways here: try your {club_type} off the tee for accuracy'
+            else:
+                suggestion['suggestion'] = 'Missing fairways here: favour accuracy over distance off the tee'
+        elif hole['putts_per_hole'] is not None and hole['putts_per_hole'] > PUTTS_PER_HOLE:
+            suggestion['club'] = 'Putter'
+            suggestion['suggestion'] = 'Most strokes are lost on the green: practice lag putting'
+        else:
+            suggestion['suggestion'] = 'Consider using a different club or practicing this hole'
+        suggestions.append(suggestion)
+    return suggestions
+
+
+def legacy_suggestions(user, rounds=DEFAULT_ROUNDS):
+    """
+    The original suggest_club response: one entry per hole played
+    BLOWUP_OVER_PAR or more over par in the last ``rounds`` completed rounds,
+    newest round first. None if there are no such rounds. Runs one query.
+    """
+    rows = hole_performance_rows(user, rounds)
+    if not rows:
+        return None
+    return [
+        {
+            'hole_number': hole_number,
+            'score': score,
+            'par': par,
+            'suggestion': 'Consider using a different club or practicing this hole',
+        }
+        for _, _, hole_number, score, _, _, par, _ in sorted(rows, key=lambda row: (-row[0], row[2]))
+        if par is not None and score - par >= BLOWUP_OVER_PAR
+    ]
+
+
+def suggest_clubs(user, rounds=DEFAULT_ROUNDS):
+    """
+    Hole performance analysis and club suggestions for ``user``, or None if
+    they have no completed rounds with scores. Runs two queries.
+    """
+    rows = hole_performance_rows(user, rounds)
+    if not rows:
+        return None
+    analysis = analyze_holes(rows)
+    analysis['rounds_analyzed'] = len({row[0] for row in rows})
+    analysis['suggestions'] = club_guidance(
+        analysis, Club.objects.filter(user=user).values_list('club_type', 'average_distance_yards')
+    )
+    return analysis
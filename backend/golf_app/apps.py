@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class GolfAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'golf_app'
+
+    def ready(self):
+        from . import checks, signals, sqlite  # noqa: F401
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+# Cache backends whose entries live inside one worker process
+_PROCESS_LOCAL_BACKENDS = ('LocMemCache', 'DummyCache')
+
+
+def cache_is_shared(alias='default'):
+    return not settings.CACHES[alias]['BACKEND'].endswith(_PROCESS_LOCAL_BACKENDS)
+
+
+def cross_worker_ttl(ttl):
+    """
+    The timeout for a Django cache entry that writers invalidate. A
+    per-process cache never sees another worker's invalidation, so there
+    the entry lives at most PROCESS_CACHE_TTL seconds, which bounds how
+    stale other workers can be. ``ttl`` may be None (no expiry).
+    """
+    if cache_is_shared():
+        return ttl
+    return settings.PROCESS_CACHE_TTL if ttl is None else min(ttl, settings.PROCESS_CACHE_TTL)
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache. Entries expire ``ttl`` seconds after
+    they are written and the least recently used entry is evicted once
+    ``maxsize`` is reached.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._timer():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        expires_at = self._timer() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._data)
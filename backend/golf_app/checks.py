@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from .cache import cache_is_shared
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if cache_is_shared():
+        return []
+    return [Warning(
+        'The default cache is per-process, so invalidations made by one worker never reach the others.',
+        hint=(
+            'Set CACHE_BACKEND and CACHE_LOCATION to a shared backend such as Redis or Memcached; until then '
+            f'ETag versions, shared rounds and the username index are only trusted for PROCESS_CACHE_TTL ({settings.PROCESS_CACHE_TTL}s).'
+        ),
+        id='golf_app.W001',
+    )]
@@ -0,0 +1,76 @@
+from collections import defaultdict
+
+from rest_framework import serializers
+
+# Fields whose representation of a values() column is the column itself
+_PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class RowSerializer:
+    """
+    A ModelSerializer compiled down to a row-to-dict builder over
+    ``values()`` rows. Fields are introspected once, at compile time;
+    nested ``many=True`` reverse relations are fetched with one query per
+    relation for the whole batch. The output matches ``serializer_class``
+    field for field.
+
+    Only plain model fields and nested reverse foreign keys are supported.
+    """
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        self.model = serializer.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.fields = []
+        self.nested = {}
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                relation = self.model._meta.get_field(field.source)
+                self.nested[name] = (RowSerializer(type(field.child)), relation.field.attname)
+                self.fields.append((name, None, None))
+            elif field.source == '*' or '.' in field.source:
+                raise ValueError(f'{serializer_class.__name__}.{name} is not a plain model field')
+            else:
+                convert = None if isinstance(field, _PASSTHROUGH_FIELDS) else field.to_representation
+                self.fields.append((name, field.source, convert))
+        self.columns = [column for _, column, _ in self.fields if column] + (
+            [self.pk] if self.nested and self.pk not in {column for _, column, _ in self.fields} else []
+        )
+
+    def values(self, queryset):
+        return queryset.values(*self.columns)
+
+    def serialize(self, rows):
+        """Representations of ``rows``, dicts carrying ``self.columns``."""
+        children = {}
+        if rows:
+            ids = [row[self.pk] for row in rows]
+            for name, (child, foreign_key) in self.nested.items():
+                child_rows = list(
+                    child.model._default_manager.filter(**{f'{foreign_key}__in': ids})
+                    .values(*child.columns, foreign_key)
+                )
+                grouped = defaultdict(list)
+                for child_row, data in zip(child_rows, child.serialize(child_rows)):
+                    grouped[child_row[foreign_key]].append(data)
+                children[name] = grouped
+
+        fields = self.fields
+        results = []
+        for row in rows:
+            data = {}
+            for name, column, convert in fields:
+                if column is None:
+                    data[name] = children[name].get(row[self.pk], [])
+                    continue
+                value = row[column]
+                data[name] = convert(value) if convert is not None and value is not None else value
+            results.append(data)
+        return results
@@ -0,0 +1,97 @@
+import heapq
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from .cache import cross_worker_ttl
+from .models import Friendship
+
+
+def _friends_key(user_id):
+    return f'friends:{user_id}'
+
+
+def get_friend_ids(user_id):
+    """Return the set of a user's friend ids from the friend graph cache."""
+    key = _friends_key(user_id)
+    friend_ids = cache.get(key)
+    if friend_ids is None:
+        friend_ids = list(Friendship.objects.filter(user_id=user_id).order_by().values_list('friend_id', flat=True))
+        cache.set(key, friend_ids, cross_worker_ttl(settings.FRIEND_GRAPH_CACHE_TTL))
+    return frozenset(friend_ids)
+
+
+def get_friend_id_sets(user_ids):
+    """
+    ``{user_id: frozenset of friend ids}`` for many users: one cache round
+    trip, and a single query for whichever adjacency sets were missing.
+    """
+    keys = {_friends_key(user_id): user_id for user_id in user_ids}
+    cached = cache.get_many(list(keys))
+    adjacency = {keys[key]: friend_ids for key, friend_ids in cached.items()}
+    missing = [user_id for user_id in user_ids if user_id not in adjacency]
+    if missing:
+        loaded = defaultdict(list)
+        edges = Friendship.objects.filter(user_id__in=missing).order_by().values_list('user_id', 'friend_id')
+        for user_id, friend_id in edges:
+            loaded[user_id].append(friend_id)
+        fetched = {user_id: loaded[user_id] for user_id in missing}
+        cache.set_many(
+            {_friends_key(user_id): friend_ids for user_id, friend_ids in fetched.items()},
+            cross_worker_ttl(settings.FRIEND_GRAPH_CACHE_TTL),
+        )
+        adjacency.update(fetched)
+    return {user_id: frozenset(friend_ids) for user_id, friend_ids in adjacency.items()}
+
+
+def invalidate_friend_graph(*user_ids):
+    # Drop after commit so a concurrent reader can't re-cache the old edges
+    keys = [_friends_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def befriend(user_id, friend_id):
+    """
+    Write both directions of a friendship in one transaction; either edge
+    may already exist. Returns ``(id, created_at)`` of the user's own edge.
+    """
+    with transaction.atomic():
+        Friendship.objects.bulk_create(
+            [Friendship(user_id=user_id, friend_id=friend_id), Friendship(user_id=friend_id, friend_id=user_id)],
+            ignore_conflicts=True,
+        )
+        edge = Friendship.objects.filter(user_id=user_id, friend_id=friend_id).values_list('id', 'created_at').get()
+        # bulk_create sends no signals
+        invalidate_friend_graph(user_id, friend_id)
+    return edge
+
+
+def unfriend(user_id, friend_id):
+    """Remove both directions of a friendship with one DELETE."""
+    return Friendship.objects.filter(
+        Q(user_id=user_id, friend_id=friend_id) | Q(user_id=friend_id, friend_id=user_id)
+    ).delete()[0]
+
+
+def mutual_friend_ids(user_id, other_id):
+    adjacency = get_friend_id_sets([user_id, other_id])
+    return adjacency[user_id] & adjacency[other_id]
+
+
+def suggested_friend_ids(user_id, limit=20):
+    """
+    Friends of friends the user isn't connected to, ranked by how many
+    friends they share: ``[(user_id, mutual_count)]``.
+    """
+    friend_ids = get_friend_ids(user_id)
+    if not friend_ids:
+        return []
+    overlap = Counter()
+    for friends_of_friend in get_friend_id_sets(list(friend_ids)).values():
+        overlap.update(friends_of_friend)
+    for known_id in friend_ids | {user_id}:
+        overlap.pop(known_id, None)
+    return heapq.nsmallest(limit, overlap.items(), key=lambda item: (-item[1], item[0]))
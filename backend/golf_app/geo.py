@@ -0,0 +1,158 @@
+import math
+
+from django.db.models import Q
+
+_GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+# Precision stored on Course/DrivingRange rows (~5m cells)
+STORED_PRECISION = 9
+
+
+def geohash_encode(lat, lon, precision=5):
+    """Encode a coordinate as a geohash cell of ``precision`` characters."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(geohash) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(_GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(geohash)
+
+
+def geohash_decode(geohash):
+    """Return the (lat, lon) centre of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if value >> shift & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+
+def geohash_for(latitude, longitude):
+    """The stored geohash for a row, or None if it has no coordinates."""
+    if latitude is None or longitude is None:
+        return None
+    return geohash_encode(float(latitude), float(longitude), STORED_PRECISION)
+
+
+def cell_size_degrees(precision):
+    """(lat_degrees, lon_degrees) covered by one cell at ``precision``."""
+    bits = precision * 5
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** (bits - bits // 2)
+
+
+def cell_extent_km(lat, precision):
+    """
+    The shortest side of a cell near ``lat``. Any point outside the 3x3 block
+    around a location is at least this far from it.
+    """
+    lat_deg, lon_deg = cell_size_degrees(precision)
+    widest_lat = min(89.0, abs(lat) + lat_deg)
+    return min(lat_deg * KM_PER_DEGREE, lon_deg * KM_PER_DEGREE * math.cos(math.radians(widest_lat)))
+
+
+def covering_cells(lat, lon, precision):
+    """The cell containing (lat, lon) and its eight neighbours."""
+    lat_deg, lon_deg = cell_size_degrees(precision)
+    cells = set()
+    for dlat in (-lat_deg, 0, lat_deg):
+        cell_lat = max(-89.999999, min(89.999999, lat + dlat))
+        for dlon in (-lon_deg, 0, lon_deg):
+            cell_lon = (lon + dlon + 180.0) % 360.0 - 180.0
+            cells.add(geohash_encode(cell_lat, cell_lon, precision))
+    return cells
+
+
+def cells_filter(cells, field='geohash'):
+    # Prefix matches as index range scans; '{' sorts right after 'z'
+    condition = Q()
+    for cell in cells:
+        condition |= Q(**{f'{field}__gte': cell, f'{field}__lt': cell + '{'})
+    return condition
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2 +
+        math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def ranked_by_distance(queryset, lat, lon):
+    """Every row in ``queryset`` as ``(distance_km, pk)``, nearest first."""
+    rows = queryset.values_list('id', 'latitude', 'longitude')
+    return sorted(
+        (haversine_km(lat, lon, float(row_lat), float(row_lon)), pk)
+        for pk, row_lat, row_lon in rows
+        if row_lat is not None and row_lon is not None
+    )
+
+
+def nearest(queryset, lat, lon, k=10, radius_km=None):
+    """
+    Return up to ``k`` objects from ``queryset`` ordered by great-circle
+    distance from (lat, lon), each with a ``distance_km`` attribute.
+
+    Candidates come from geohash prefix ranges over the 3x3 cell block around
+    the point. With a radius, the block is sized to cover it; without one,
+    the block is widened until it provably contains the ``k`` nearest rows.
+    """
+    queryset = queryset.exclude(geohash__isnull=True)
+    if radius_km is not None:
+        precision = STORED_PRECISION
+        while precision > 1 and cell_extent_km(lat, precision) < radius_km:
+            precision -= 1
+        if cell_extent_km(lat, precision) >= radius_km:
+            queryset = queryset.filter(cells_filter(covering_cells(lat, lon, precision)))
+        ranked = [(distance, pk) for distance, pk in ranked_by_distance(queryset, lat, lon) if distance <= radius_km]
+    else:
+        ranked = None
+        for precision in range(6, 0, -1):
+            candidates = ranked_by_distance(
+                queryset.filter(cells_filter(covering_cells(lat, lon, precision))), lat, lon
+            )
+            within = [c for c in candidates if c[0] <= cell_extent_km(lat, precision)]
+            if len(within) >= k:
+                ranked = within
+                break
+        if ranked is None:
+            # Sparse data: fewer than k rows anywhere near, fall back to a full pass
+            ranked = ranked_by_distance(queryset, lat, lon)
+
+    ranked = ranked[:k]
+    objects = queryset.model.objects.in_bulk([pk for _, pk in ranked])
+    results = []
+    for distance, pk in ranked:
+        obj = objects[pk]
+        obj.distance_km = round(distance, 3)
+        results.append(obj)
+    return results
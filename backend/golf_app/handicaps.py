@@ -0,0 +1,204 @@
+from bisect import bisect_left, insort
+from collections import deque
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from .authentication import invalidate_cached_user
+from .models import Hole, HoleScore, Round, User
+
+# Most recent differentials a handicap index is calculated from
+WINDOW_SIZE = 20
+
+# Differentials in the window -> (how many of the lowest count, adjustment)
+BEST_OF = {
+    3: (1, -2.0), 4: (1, -1.0), 5: (1, 0.0), 6: (2, -1.0), 7: (2, 0.0), 8: (2, 0.0),
+    9: (3, 0.0), 10: (3, 0.0), 11: (3, 0.0), 12: (4, 0.0), 13: (4, 0.0), 14: (4, 0.0),
+    15: (5, 0.0), 16: (5, 0.0), 17: (6, 0.0), 18: (6, 0.0), 19: (7, 0.0), 20: (8, 0.0),
+}
+
+MAX_HANDICAP_INDEX = 54.0
+FULL_ROUND_HOLES = 18
+
+# Per-hole cap before a player has an index: par plus this many strokes
+UNESTABLISHED_MAX_OVER_PAR = 5
+
+
+class HandicapWindow:
+    """
+    A player's last WINDOW_SIZE differentials in playing order, also kept
+    sorted so adding a round (and dropping the oldest) is a bisect insert
+    and delete rather than a re-sort.
+    """
+
+    def __init__(self, differentials=()):
+        self._recent = deque()
+        self._sorted = []
+        for differential in differentials:
+            self.add(differential)
+
+    def add(self, differential):
+        if len(self._recent) == WINDOW_SIZE:
+            oldest = self._recent.popleft()
+            del self._sorted[bisect_left(self._sorted, oldest)]
+        self._recent.append(differential)
+        insort(self._sorted, differential)
+
+    def __len__(self):
+        return len(self._recent)
+
+    def index(self):
+        """The handicap index, or None with fewer than three differentials."""
+        if len(self._recent) not in BEST_OF:
+            return None
+        count, adjustment = BEST_OF[len(self._recent)]
+        value = sum(self._sorted[:count]) / count + adjustment
+        return min(round(value, 1), MAX_HANDICAP_INDEX)
+
+
+def strokes_received(playing_handicap, stroke_index):
+    """Handicap strokes a player gets on a hole with ``stroke_index`` (1 = hardest)."""
+    if playing_handicap >= 0:
+        base, extra = divmod(playing_handicap, FULL_ROUND_HOLES)
+        return base + (1 if stroke_index <= extra else 0)
+    # Plus handicaps give strokes back on the easiest holes
+    return -1 if stroke_index > FULL_ROUND_HOLES + playing_handicap else 0
+
+
+def max_hole_score(par, stroke_index, handicap_index):
+    """Net double bogey, or par plus UNESTABLISHED_MAX_OVER_PAR without an index."""
+    if handicap_index is None:
+        return par + UNESTABLISHED_MAX_OVER_PAR
+    return par + 2 + strokes_received(round(handicap_index), stroke_index)
+
+
+def score_differential(holes, handicap_index):
+    """
+    The differential for a round given ``(hole_number, score, par, stroke_index)``
+    per hole, or None unless all 18 holes were played on holes with a par.
+    Courses carry no rating or slope here, so the course par stands in for
+    the rating at the standard slope of 113.
+    """
+    if len(holes) < FULL_ROUND_HOLES or any(par is None for _, _, par, _ in holes):
+        return None
+    adjusted = sum(
+        min(score, max_hole_score(par, stroke_index or hole_number, handicap_index))
+        for hole_number, score, par, stroke_index in holes
+    )
+    return round(adjusted - sum(par for _, _, par, _ in holes), 1)
+
+
+def _hole_rows(hole_scores):
+    hole = Hole.objects.filter(course_id=OuterRef('round__course_id'), hole_number=OuterRef('hole_number'))
+    return hole_scores.annotate(
+        par=Subquery(hole.values('par')[:1]),
+        stroke_index=Subquery(hole.values('handicap_index')[:1]),
+    )
+
+
+def _recent_differentials(user_id, exclude_round_id=None):
+    """The user's last WINDOW_SIZE differentials, oldest first, and the newest (date, id) among them."""
+    rounds = Round.objects.filter(user_id=user_id, score_differential__isnull=False)
+    if exclude_round_id is not None:
+        rounds = rounds.exclude(pk=exclude_round_id)
+    rows = list(rounds.order_by('-date', '-id').values_list('date', 'id', 'score_differential')[:WINDOW_SIZE])
+    rows.reverse()
+    return [differential for _, _, differential in rows], (rows[-1][:2] if rows else None)
+
+
+def _write_handicap(user_id, index):
+    if index is not None:
+        User.objects.filter(pk=user_id).update(handicap=Decimal(str(index)))
+        invalidate_cached_user(user_id)
+
+
+def update_round(round_id):
+    """
+    Recompute one round's differential and, if it changed, its owner's
+    handicap index. A new latest round is added to the window in place;
+    anything else reloads the window. Returns the round's differential.
+    """
+    round_state = Round.objects.filter(pk=round_id).values(
+        'user_id', 'date', 'is_completed', 'score_differential'
+    ).first()
+    if round_state is None:
+        return None
+    user_id = round_state['user_id']
+    differentials, newest = _recent_differentials(user_id, exclude_round_id=round_id)
+    window = HandicapWindow(differentials)
+
+    differential = None
+    if round_state['is_completed']:
+        holes = list(_hole_rows(HoleScore.objects.filter(round_id=round_id)).values_list(
+            'hole_number', 'score', 'par', 'stroke_index'
+        ))
+        differential = score_differential(holes, window.index())
+    if differential == round_state['score_differential']:
+        return differential
+
+    with transaction.atomic():
+        Round.objects.filter(pk=round_id).update(score_differential=differential)
+        if differential is not None and (newest is None or (round_state['date'], round_id) > newest):
+            window.add(differential)
+        else:
+            window = HandicapWindow(_recent_differentials(user_id)[0])
+        _write_handicap(user_id, window.index())
+    return differential
+
+
+def refresh_user(user_id):
+    """Recalculate a user's index from their stored differentials, e.g. after a round is deleted."""
+    _write_handicap(user_id, HandicapWindow(_recent_differentials(user_id)[0]).index())
+
+
+def recompute_handicaps(batch_size=500):
+    """
+    Replay every user's completed rounds in date order, a batch of users at
+    a time: one query loads the batch's hole scores with par and stroke
+    index, differentials are computed against the index as it stood before
+    each round, and results are written with bulk updates. Returns
+    ``(users, rounds_with_differentials)``.
+    """
+    users = scored = 0
+    last_user_id = 0
+    while True:
+        user_ids = list(
+            Round.objects.filter(is_completed=True, user_id__gt=last_user_id)
+            .order_by('user_id').values_list('user_id', flat=True).distinct()[:batch_size]
+        )
+        if not user_ids:
+            return users, scored
+        last_user_id = user_ids[-1]
+
+        rounds = {
+            round_id: (user_id, []) for round_id, user_id in Round.objects.filter(
+                user_id__in=user_ids, is_completed=True
+            ).order_by('user_id', 'date', 'id').values_list('id', 'user_id')
+        }
+        rows = _hole_rows(HoleScore.objects.filter(round_id__in=list(rounds))).values_list(
+            'round_id', 'hole_number', 'score', 'par', 'stroke_index'
+        )
+        for round_id, *hole in rows:
+            rounds[round_id][1].append(tuple(hole))
+
+        windows = {}
+        differentials = []
+        for round_id, (user_id, holes) in rounds.items():
+            window = windows.setdefault(user_id, HandicapWindow())
+            differential = score_differential(holes, window.index())
+            if differential is not None:
+                window.add(differential)
+                scored += 1
+            differentials.append(Round(pk=round_id, score_differential=differential))
+
+        indexed = [
+            User(pk=user_id, handicap=Decimal(str(window.index())))
+            for user_id, window in windows.items()
+            if window.index() is not None
+        ]
+        with transaction.atomic():
+            Round.objects.bulk_update(differentials, ['score_differential'], batch_size=1000)
+            User.objects.bulk_update(indexed, ['handicap'], batch_size=1000)
+            invalidate_cached_user(*(user.pk for user in indexed))
+        users += len(user_ids)
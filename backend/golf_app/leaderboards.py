@@ -0,0 +1,345 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Case, Count, ExpressionWrapper, F, FloatField, Q, Sum, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .friends import get_friend_ids
+from .models import LeaderboardEntry, Round, ScoreBucket, User
+
+# metric name -> (entry field, ascending?) ; lower average is better, more rounds is better
+METRICS = {
+    'average_score': ('average_score', True),
+    'total_rounds': ('total_rounds', False),
+}
+
+# Round fields the materialized leaderboards are derived from
+TRACKED_ROUND_FIELDS = ('user_id', 'total_score', 'is_completed', 'date')
+
+
+def apply_round_delta(user_id, rounds=0, scored=0, score=0):
+    """
+    Shift a user's materialized stats by the given deltas in a single UPDATE.
+    The average is recomputed from the pre-update row, so concurrent deltas
+    for the same user never lose an increment.
+    """
+    if not (rounds or scored or score):
+        return
+    if rounds > 0:
+        LeaderboardEntry.objects.get_or_create(user_id=user_id)
+
+    new_scored = F('scored_rounds') + scored
+    new_average = ExpressionWrapper(
+        Cast(F('total_score_sum') + score, FloatField()) / new_scored,
+        output_field=FloatField(),
+    )
+    LeaderboardEntry.objects.filter(user_id=user_id).update(
+        total_rounds=F('total_rounds') + rounds,
+        scored_rounds=new_scored,
+        total_score_sum=F('total_score_sum') + score,
+        average_score=Case(
+            When(scored_rounds__gt=-scored, then=new_average),
+            default=None,
+            output_field=FloatField(),
+        ),
+    )
+
+
+def round_contribution(total_score):
+    """The (rounds, scored, score) a round with ``total_score`` adds to its owner."""
+    if total_score is None:
+        return 1, 0, 0
+    return 1, 1, total_score
+
+
+def apply_round_change(old_user_id, old_total_score, new_user_id, new_total_score):
+    """Move a round's contribution from its previous state to its current one."""
+    if old_user_id == new_user_id:
+        # Same owner: one UPDATE for the difference
+        if old_user_id is not None and old_total_score != new_total_score:
+            _, old_scored, old_score = round_contribution(old_total_score)
+            _, new_scored, new_score = round_contribution(new_total_score)
+            apply_round_delta(new_user_id, 0, new_scored - old_scored, new_score - old_score)
+        return
+    if old_user_id is not None:
+        rounds, scored, score = round_contribution(old_total_score)
+        apply_round_delta(old_user_id, -rounds, -scored, -score)
+    if new_user_id is not None:
+        rounds, scored, score = round_contribution(new_total_score)
+        apply_round_delta(new_user_id, rounds, scored, score)
+
+
+def _ranked(metric, user_ids=None):
+    field, ascending = METRICS[metric]
+    queryset = LeaderboardEntry.objects.all()
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    if metric == 'average_score':
+        queryset = queryset.filter(average_score__isnull=False)
+    else:
+        queryset = queryset.filter(total_rounds__gt=0)
+    return queryset, field, ascending
+
+
+def top_entries(metric, limit=10, user_ids=None):
+    """
+    ``(rank, entry)`` for the top ``limit`` players. Ranks follow the same
+    rule as ``rank_for_user``: one plus the number of players strictly
+    ahead, so tied players share a rank and the next rank is skipped.
+    """
+    queryset, field, ascending = _ranked(metric, user_ids)
+    ordering = field if ascending else f'-{field}'
+    ranked = []
+    for position, entry in enumerate(queryset.select_related('user').order_by(ordering, 'user_id')[:limit], 1):
+        tied = ranked and getattr(ranked[-1][1], field) == getattr(entry, field)
+        ranked.append((ranked[-1][0] if tied else position, entry))
+    return ranked
+
+
+def rank_for_user(user_id, metric, user_ids=None):
+    """
+    Return ``(rank, entry)`` for a user, or ``(None, None)`` if they are not
+    on this leaderboard. Tied players share a rank. ``user_ids`` restricts
+    the board to those players, e.g. the user and their friends.
+    """
+    queryset, field, ascending = _ranked(metric, user_ids)
+    entry = queryset.filter(user_id=user_id).first()
+    if entry is None:
+        return None, None
+    lookup = f'{field}__lt' if ascending else f'{field}__gt'
+    better = queryset.filter(**{lookup: getattr(entry, field)}).count()
+    return better + 1, entry
+
+
+def scope_user_ids(user_id, scope):
+    """
+    The players on a ``global`` or ``friends`` board; ``None`` means everyone.
+    Raises ValueError for an unknown scope.
+    """
+    if scope == 'global':
+        return None
+    if scope == 'friends':
+        return get_friend_ids(user_id) | {user_id}
+    raise ValueError(scope)
+
+
+def leaderboard_row(rank, username, entry, metric):
+    if metric == 'average_score':
+        return {'rank': rank, 'username': username, 'average_score': round(entry.average_score, 2)}
+    return {'rank': rank, 'username': username, 'total_rounds': entry.total_rounds}
+
+
+def live_aggregates():
+    """The per-user stats computed straight from Round, as LeaderboardView used to."""
+    rows = Round.objects.values('user_id').annotate(
+        total_rounds=Count('id'),
+        scored_rounds=Count('total_score'),
+        total_score_sum=Sum('total_score'),
+    )
+    return {
+        row['user_id']: {
+            'total_rounds': row['total_rounds'],
+            'scored_rounds': row['scored_rounds'],
+            'total_score_sum': row['total_score_sum'] or 0,
+            'average_score': (
+                row['total_score_sum'] / row['scored_rounds'] if row['scored_rounds'] else None
+            ),
+        }
+        for row in rows
+    }
+
+
+def rebuild_leaderboard(batch_size=1000):
+    """Recreate every LeaderboardEntry from the live Round aggregates."""
+    stats = live_aggregates()
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardEntry.objects.bulk_create(
+            [LeaderboardEntry(user_id=user_id, **values) for user_id, values in stats.items()],
+            batch_size=batch_size,
+        )
+    return len(stats)
+
+
+def verify_leaderboard():
+    """
+    Compare the materialized entries with the live aggregate the endpoint used
+    to compute. Returns a list of ``(user_id, field, stored, live)`` mismatches.
+    """
+    live = {
+        user.id: user
+        for user in User.objects.annotate(
+            avg_score=Avg('rounds__total_score'),
+            round_count=Count('rounds'),
+        ).filter(round_count__gt=0)
+    }
+    stored = {entry.user_id: entry for entry in LeaderboardEntry.objects.filter(total_rounds__gt=0)}
+
+    mismatches = []
+    for user_id in live.keys() | stored.keys():
+        user = live.get(user_id)
+        entry = stored.get(user_id)
+        live_rounds = user.round_count if user else 0
+        live_avg = user.avg_score if user else None
+        stored_rounds = entry.total_rounds if entry else 0
+        stored_avg = entry.average_score if entry else None
+        if live_rounds != stored_rounds:
+            mismatches.append((user_id, 'total_rounds', stored_rounds, live_rounds))
+        if (live_avg is None) != (stored_avg is None) or (
+            live_avg is not None and abs(float(live_avg) - stored_avg) > 1e-6
+        ):
+            mismatches.append((user_id, 'average_score', stored_avg, live_avg))
+    return mismatches
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def compaction_cutoff(today=None):
+    """Daily buckets before this date belong in (or have been folded into) monthly buckets."""
+    today = today or timezone.localdate()
+    return month_start(today - timedelta(days=settings.SCORE_BUCKET_DAILY_RETENTION_DAYS))
+
+
+def bucket_contribution(state):
+    """The (user_id, date, score) a round adds to the rolling leaderboard, or None."""
+    if not state or not state['is_completed'] or state['total_score'] is None:
+        return None
+    return state['user_id'], state['date'], state['total_score']
+
+
+def apply_bucket_delta(user_id, day, rounds, score):
+    daily = {'user_id': user_id, 'granularity': ScoreBucket.DAY, 'period_start': day}
+    monthly = {'user_id': user_id, 'granularity': ScoreBucket.MONTH, 'period_start': month_start(day)}
+    delta = {'rounds': F('rounds') + rounds, 'score_sum': F('score_sum') + score}
+    if rounds <= 0:
+        # Take the round back out of (or rescore it in) whichever bucket holds its day
+        if not ScoreBucket.objects.filter(**daily).update(**delta):
+            ScoreBucket.objects.filter(**monthly).update(**delta)
+        return
+    lookup = daily if day >= compaction_cutoff() else monthly
+    ScoreBucket.objects.get_or_create(**lookup)
+    ScoreBucket.objects.filter(**lookup).update(**delta)
+
+
+def apply_bucket_change(old_state, new_state):
+    old = bucket_contribution(old_state)
+    new = bucket_contribution(new_state)
+    if old == new:
+        return
+    if old is not None and new is not None and old[:2] == new[:2]:
+        apply_bucket_delta(new[0], new[1], 0, new[2] - old[2])
+        return
+    if old is not None:
+        apply_bucket_delta(old[0], old[1], -1, -old[2])
+    if new is not None:
+        apply_bucket_delta(new[0], new[1], 1, new[2])
+
+
+def window_start(window, today=None):
+    """
+    Parse a window like ``7d``, ``30d`` or ``season`` (the calendar year to
+    date) into the first date it covers; ``7d`` is today and the six days
+    before it. Raises ValueError for anything else.
+    """
+    today = today or timezone.localdate()
+    if window == 'season':
+        return date(today.year, 1, 1)
+    if not window.endswith('d'):
+        raise ValueError(window)
+    days = int(window[:-1])
+    if not 1 <= days <= 3660:
+        raise ValueError(window)
+    return today - timedelta(days=days - 1)
+
+
+def window_totals(start, limit=10):
+    """
+    Rank users by the summed completed-round scores since ``start`` using only
+    score buckets. Inside the compacted range a window is widened to the
+    start of its month.
+    """
+    in_window = (
+        Q(granularity=ScoreBucket.DAY, period_start__gte=start) |
+        Q(granularity=ScoreBucket.MONTH, period_start__gte=month_start(start))
+    )
+    return ScoreBucket.objects.filter(in_window).values(
+        'user_id', 'user__username'
+    ).annotate(
+        total_score=Sum('score_sum'),
+        total_rounds=Sum('rounds'),
+    ).filter(
+        total_rounds__gt=0
+    ).order_by('total_score', 'user_id')[:limit]
+
+
+def rebuild_score_buckets(batch_size=1000):
+    """Recreate daily score buckets from completed rounds, then compact old ones."""
+    rows = Round.objects.filter(
+        is_completed=True, total_score__isnull=False
+    ).values('user_id', 'date').annotate(
+        rounds=Count('id'),
+        score_sum=Sum('total_score'),
+    )
+    with transaction.atomic():
+        ScoreBucket.objects.all().delete()
+        ScoreBucket.objects.bulk_create(
+            [
+                ScoreBucket(
+                    user_id=row['user_id'], granularity=ScoreBucket.DAY, period_start=row['date'],
+                    rounds=row['rounds'], score_sum=row['score_sum'],
+                )
+                for row in rows
+            ],
+            batch_size=batch_size,
+        )
+    compact_score_buckets()
+    return ScoreBucket.objects.count()
+
+
+def compact_score_buckets(today=None):
+    """
+    Fold daily buckets older than the retention window into monthly buckets.
+    Returns ``(daily_buckets_removed, monthly_buckets_written)``.
+    """
+    cutoff = compaction_cutoff(today)
+    with transaction.atomic():
+        stale = ScoreBucket.objects.filter(granularity=ScoreBucket.DAY, period_start__lt=cutoff)
+        merged = {}
+        for bucket in stale.values('user_id', 'period_start', 'rounds', 'score_sum'):
+            key = (bucket['user_id'], month_start(bucket['period_start']))
+            rounds, score = merged.get(key, (0, 0))
+            merged[key] = (rounds + bucket['rounds'], score + bucket['score_sum'])
+        if not merged:
+            return 0, 0
+
+        existing = ScoreBucket.objects.select_for_update().filter(
+            granularity=ScoreBucket.MONTH,
+            user_id__in={user_id for user_id, _ in merged},
+            period_start__in={period for _, period in merged},
+        )
+        for bucket in existing:
+            key = (bucket.user_id, bucket.period_start)
+            if key in merged:
+                rounds, score = merged[key]
+                merged[key] = (rounds + bucket.rounds, score + bucket.score_sum)
+
+        ScoreBucket.objects.bulk_create(
+            [
+                ScoreBucket(
+                    user_id=user_id, granularity=ScoreBucket.MONTH, period_start=period,
+                    rounds=rounds, score_sum=score,
+                )
+                for (user_id, period), (rounds, score) in merged.items()
+            ],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['user', 'granularity', 'period_start'],
+            update_fields=['rounds', 'score_sum'],
+        )
+        removed, _ = stale.delete()
+        ScoreBucket.objects.filter(rounds=0, score_sum=0).delete()
+    return removed, len(merged)
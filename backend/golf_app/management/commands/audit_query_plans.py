@@ -0,0 +1,192 @@
+import json
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from golf_app import sync
+from golf_app.geo import cells_filter, covering_cells, geohash_for
+from golf_app.models import (
+    Achievement, ChangeCounter, Course, DrivingRange, Friendship, HoleScore, LeaderboardEntry, Round,
+    SyncTombstone, User, UserAchievement,
+)
+
+# Indexes added for the filters below, timed with and without them
+AUDITED_INDEXES = {
+    'round_user_date_idx': (Round, ['user', 'date']),
+    'friendship_user_created_idx': (Friendship, ['user', 'created_at']),
+    'friendship_friend_user_idx': (Friendship, ['friend', 'user']),
+    'userachievement_user_date_idx': (UserAchievement, ['user', 'date_achieved']),
+}
+
+
+def representative_queries(user):
+    """
+    ``(viewset, label, queryset, accepted)`` for each hot query. ``accepted``
+    explains a scan no index can remove; those are reported, not flagged.
+    """
+    # A client that last synced halfway through the seeded change sequence
+    change_seq = sync.current_change_seq(user.pk)
+    since_seq = change_seq // 2
+    rounds, hole_scores, _, _ = sync.changes_since(user, sync.encode_token(since_seq))
+    paged = 'stops at the LIMIT, walking the primary key in order'
+    substring = 'icontains is a LIKE with a leading wildcard, which no B-tree index can serve'
+    per_round = (
+        "sorts one user's hole scores; SQLite won't carry the round index order across the join to round_id"
+    )
+    return [
+        ('UserViewSet', 'own profile', User.objects.filter(pk=user.pk), None),
+        ('CourseViewSet', 'catalog page', Course.objects.order_by('id')[:50], paged),
+        ('CourseViewSet', 'city filter', Course.objects.filter(city__icontains='springs'), substring),
+        ('CourseViewSet', 'nearby cells',
+         Course.objects.filter(cells_filter(covering_cells(30.27, -97.74, 4))), None),
+        ('DrivingRangeViewSet', 'catalog page', DrivingRange.objects.order_by('id')[:50], paged),
+        ('DrivingRangeViewSet', 'city filter', DrivingRange.objects.filter(city__icontains='springs'), substring),
+        ('RoundViewSet', 'list page', Round.objects.filter(user=user).order_by('-date', '-id')[:50], None),
+        ('RoundViewSet', 'suggest_club rounds',
+         Round.objects.filter(user=user, is_completed=True).order_by('-date', '-id')[:5], None),
+        ('RoundViewSet', 'completed count', Round.objects.filter(user=user, is_completed=True), None),
+        ('RoundViewSet', 'handicap window',
+         Round.objects.filter(user=user, score_differential__isnull=False).order_by('-date', '-id')[:20], None),
+        ('HoleScoreViewSet', 'list page',
+         HoleScore.objects.filter(round__user=user).order_by('round_id', 'hole_number')[:50], per_round),
+        ('SyncView', 'changed rounds', rounds, None),
+        ('SyncView', 'changed hole scores', hole_scores, None),
+        ('SyncView', 'tombstones',
+         SyncTombstone.objects.filter(user=user, change_seq__gt=since_seq, change_seq__lte=change_seq)
+         .order_by('change_seq'), None),
+        ('FriendshipViewSet', 'own friendships', Friendship.objects.filter(user=user), None),
+        ('FriendshipViewSet', 'friended by (account deletion)',
+         Friendship.objects.filter(friend=user).order_by().values_list('user_id'), None),
+        ('UserAchievementViewSet', 'list page',
+         UserAchievement.objects.filter(user=user).order_by('-date_achieved', '-id')[:50], None),
+        ('LeaderboardView', 'top average',
+         LeaderboardEntry.objects.filter(average_score__isnull=False).order_by('average_score', 'user_id')[:10],
+         None),
+    ]
+
+
+def classify(plan):
+    """Turn SQLite's EXPLAIN QUERY PLAN lines into problems: full scans and temporary sorts."""
+    problems = []
+    for line in plan.splitlines():
+        detail = line.split(' ', 3)[-1] if line[:1].isdigit() else line
+        if detail.startswith('SCAN ') and 'CONSTANT ROW' not in detail:
+            problems.append('full scan' if ' USING ' not in detail else 'full index scan')
+        elif 'TEMP B-TREE' in detail:
+            problems.append('temp sort')
+    return problems
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAINs each viewset's representative queries against a seeded database, flags full scans and "
+        'temporary sorts, and times them with and without the audited indexes (rolled back afterwards)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=300)
+        parser.add_argument('--rounds', type=int, default=40, help='Rounds per user')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The plan classifier reads SQLite EXPLAIN QUERY PLAN output')
+
+        with transaction.atomic():
+            user = self._seed(options['users'], options['rounds'])
+            queries = representative_queries(user)
+            with_indexes = self._measure(queries, options['repeat'], 'with')
+            # DDL is transactional in SQLite, so the rollback below restores them
+            with connection.cursor() as cursor:
+                for name in AUDITED_INDEXES:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+            without_indexes = self._measure(queries, options['repeat'], 'without')
+            transaction.set_rollback(True)
+
+        report = []
+        for (viewset, label, _, accepted), before, after in zip(queries, without_indexes, with_indexes):
+            row = {'viewset': viewset, 'query': label, 'before': before, 'after': after}
+            if not after['problems']:
+                row['status'] = 'ok'
+            elif accepted:
+                row['status'], row['note'] = 'accepted', accepted
+            else:
+                row['status'] = 'flagged'
+            report.append(row)
+        flagged = [f"{row['viewset']}: {row['query']}" for row in report if row['status'] == 'flagged']
+        self.stdout.write(json.dumps({'queries': report, 'flagged': flagged}, indent=2))
+
+    def _seed(self, users, rounds):
+        today = date.today()
+        course = Course.objects.create(name='Audit Links', city='Audit Springs', latitude=30.27, longitude=-97.74)
+        Course.objects.bulk_create(
+            Course(name=f'Audit Course {i}', city=f'City {i % 90}',
+                   geohash=geohash_for(25 + i % 40 * 0.5, -120 + i // 40 * 0.9))
+            for i in range(2000)
+        )
+        DrivingRange.objects.bulk_create(DrivingRange(name=f'Audit Range {i}', city=f'City {i % 90}') for i in range(500))
+        players = User.objects.bulk_create(User(username=f'audit-{i}') for i in range(users))
+        Round.objects.bulk_create(
+            Round(user=player, course=course, is_completed=n % 4 != 0, total_score=70 + n % 20,
+                  score_differential=float(n % 20) if n % 4 else None, change_seq=n)
+            for player in players for n in range(rounds)
+        )
+        # auto_now_add ignores a date passed to bulk_create, so spread the dates out afterwards
+        for offset in range(rounds):
+            Round.objects.filter(user__in=players, change_seq=offset).update(date=today - timedelta(days=offset))
+        # Deletions after the seeded rounds, and the sequence every player's counter continues from
+        SyncTombstone.objects.bulk_create(
+            SyncTombstone(user=player, kind=SyncTombstone.HOLE_SCORE, object_id=n, change_seq=rounds + n)
+            for player in players for n in range(10)
+        )
+        ChangeCounter.objects.update_or_create(name=sync.ROUNDS_COUNTER, defaults={'value': rounds + 10})
+        audited = players[0]
+        HoleScore.objects.bulk_create(
+            HoleScore(round_id=round_id, hole_number=number, score=4)
+            for round_id in Round.objects.filter(user__in=players[:50]).values_list('id', flat=True)
+            for number in range(1, 19)
+        )
+        Friendship.objects.bulk_create(
+            Friendship(user=player, friend=players[(i + step) % users])
+            # Never wrap round to the player themselves or a friend they already have
+            for i, player in enumerate(players) for step in range(1, min(30, users))
+        )
+        achievements = Achievement.objects.bulk_create(
+            Achievement(name=f'Audit Achievement {i}', description='audit') for i in range(40)
+        )
+        UserAchievement.objects.bulk_create(
+            UserAchievement(user=player, achievement=achievement) for player in players for achievement in achievements
+        )
+        LeaderboardEntry.objects.bulk_create(
+            LeaderboardEntry(user=player, total_rounds=rounds, average_score=70 + i % 30)
+            for i, player in enumerate(players)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return audited
+
+    def _explain(self, queryset, phase):
+        # sqlite3's statement cache would hand back the plan prepared before the DROP, so tag the SQL per phase
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql} -- {phase} audited indexes', params)
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+    def _measure(self, queries, repeat, phase):
+        results = []
+        for _, _, queryset, _ in queries:
+            plan = self._explain(queryset, phase)
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append(time.perf_counter() - started)
+            results.append({
+                'plan': plan.splitlines(),
+                'problems': classify(plan),
+                'median_ms': round(statistics.median(timings) * 1000, 3),
+            })
+        return results
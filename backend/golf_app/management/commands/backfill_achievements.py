@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from golf_app.achievements import backfill_achievements, invalidate_rules
+
+
+class Command(BaseCommand):
+    help = "Awards every achievement users have already earned, evaluating their history a batch of users at a time"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        invalidate_rules()
+        users, awarded = backfill_achievements(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Evaluated {users} users, awarded {awarded} achievements'))
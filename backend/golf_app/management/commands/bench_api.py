@@ -0,0 +1,350 @@
+import json
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.urls import URLResolver, reverse
+from rest_framework.test import APIClient
+
+from golf_app import urls, weather
+from golf_app.geo import geohash_for
+from golf_app.handicaps import recompute_handicaps
+from golf_app.leaderboards import rebuild_leaderboard, rebuild_score_buckets
+from golf_app.management.commands.bench_weather import percentile, start_stub_server
+from golf_app.models import (
+    Achievement, Club, Course, DrivingRange, Friendship, Hole, HoleScore, PracticeTip, Round, User, UserAchievement,
+)
+from golf_app.routers import replica_configured
+from golf_app.scorecards import repair_round_totals
+from golf_app.search import rebuild_search_index
+from golf_app.user_search import username_index
+
+# Austin, where the seeded courses and ranges cluster
+HOME = (30.27, -97.74)
+
+# Cached copies of the seeded rows vanish with the rollback, and the real cache is left alone
+BENCH_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bench-api',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+
+
+def route_names(patterns=urls.urlpatterns):
+    """Every named route in golf_app/urls.py, router routes included."""
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= route_names(pattern.url_patterns)
+        elif pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+def endpoint_cases(seeded):
+    """
+    ``(route, method, url kwargs, query string, body)`` for each benchmarked
+    request. Callable kwargs get the last response body per route, so a
+    pass deletes what it created and every pass sees the same data. Ids go
+    into query strings as ``{name}`` fields, keeping labels stable between
+    runs.
+    """
+    user, other = seeded['user'], seeded['other']
+    played, hole_score = seeded['round'], seeded['hole_score']
+    near = f'{HOME[0]},{HOME[1]}'
+    scorecard = [{'hole_number': number, 'score': 4, 'putts': 2} for number in range(1, 10)]
+    return [
+        ('api-root', 'get', {}, '', None),
+        ('user-list', 'get', {}, '', None),
+        ('user-detail', 'get', {'pk': user.pk}, '', None),
+        ('user-detail', 'patch', {'pk': user.pk}, '', {'first_name': 'Bench'}),
+        ('user-search-users', 'get', {}, 'search_term=bench', None),
+        ('club-list', 'get', {}, '', None),
+        ('club-list', 'post', {}, '', {'club_type': 'Iron', 'average_distance_yards': '150.0'}),
+        ('club-detail', 'get', {'pk': seeded['club'].pk}, '', None),
+        ('club-detail', 'delete', lambda created: {'pk': created['club-list']['id']}, '', None),
+        ('course-list', 'get', {}, '', None),
+        ('course-list', 'get', {}, f'near={near}&k=10', None),
+        ('course-detail', 'get', {'pk': played.course_id}, '', None),
+        ('course-course-search-and-weather', 'get', {}, 'search=bench', None),
+        ('round-list', 'get', {}, '', None),
+        ('round-list', 'get', {}, 'page_size=20', None),
+        ('round-list', 'get', {}, 'format=compact', None),
+        ('round-list', 'post', {}, '', {'course': played.course_id}),
+        ('round-detail', 'get', {'pk': played.pk}, '', None),
+        ('round-detail', 'delete', lambda created: {'pk': created['round-list']['id']}, '', None),
+        ('round-calculate-total-score', 'post', {'pk': played.pk}, '', None),
+        ('round-leaderboard', 'get', {}, '', None),
+        ('round-suggest-club', 'get', {}, '', None),
+        ('round-suggest-club', 'get', {}, 'version=2', None),
+        ('round-share-round', 'post', {'pk': played.pk}, '', None),
+        ('hole-score-list', 'get', {}, '', None),
+        ('hole-score-list', 'get', {}, 'page_size=50', None),
+        ('hole-score-detail', 'get', {'pk': hole_score.pk}, '', None),
+        ('hole-score-detail', 'patch', {'pk': hole_score.pk}, '', {'score': 5}),
+        ('hole-score-bulk-upsert', 'post', {}, '', {'round': played.pk, 'hole_scores': scorecard}),
+        ('driving-range-list', 'get', {}, '', None),
+        ('driving-range-list', 'get', {}, f'near={near}&radius=25', None),
+        ('driving-range-detail', 'get', {'pk': seeded['range'].pk}, '', None),
+        ('achievement-list', 'get', {}, '', None),
+        ('achievement-detail', 'get', {'pk': seeded['achievement'].pk}, '', None),
+        ('achievement-achievements', 'get', {}, '', None),
+        ('user-achievement-list', 'get', {}, '', None),
+        ('user-achievement-detail', 'get', {'pk': seeded['user_achievement'].pk}, '', None),
+        ('practice-tip-list', 'get', {}, '', None),
+        ('practice-tip-detail', 'get', {'pk': seeded['tip'].pk}, '', None),
+        ('practice-tip-practice-tips', 'get', {}, '', None),
+        ('friendship-list', 'get', {}, '', None),
+        ('friendship-detail', 'get', {'pk': seeded['friendship'].pk}, '', None),
+        # Befriend and unfriend the same player, so every pass starts from the same graph
+        ('friendship-list', 'post', {}, '', {'friend': other.pk}),
+        ('friendship-remove-friend', 'delete', {}, '', {'friend_id': other.pk}),
+        ('friendship-mutual-friends', 'get', {}, 'user_id={friend}', None),
+        ('friendship-suggested-friends', 'get', {}, '', None),
+        ('leaderboard', 'get', {}, '', None),
+        ('leaderboard', 'get', {}, 'metric=total_rounds&scope=friends', None),
+        ('leaderboard-rank', 'get', {}, '', None),
+        ('weather', 'get', {}, f'lat={HOME[0]}&lon={HOME[1]}', None),
+        ('shared-round', 'get', {'shareable_link': seeded['shared'].shareable_link}, '', None),
+        ('sync', 'get', {}, '', None),
+        ('sync', 'post', {}, '', {'mutations': [
+            {'op': 'save_round', 'client_id': 'bench-offline', 'data': {'course': played.course_id}},
+            {'op': 'save_hole_scores', 'round_client_id': 'bench-offline', 'hole_scores': scorecard},
+        ]}),
+    ]
+
+
+def case_label(route, method, query):
+    return f"{method.upper()} {route}{'?' + query if query else ''}"
+
+
+def _counting(counter):
+    def wrapper(execute, sql, params, many, context):
+        counter[0] += 1
+        return execute(sql, params, many, context)
+    return wrapper
+
+
+def compare(report, baseline, tolerance, min_delta_ms, metric='p50_ms'):
+    """
+    Regressions against a saved report: any extra query, or latency
+    (``metric``) or response size more than ``tolerance`` above the
+    baseline, latency also by at least ``min_delta_ms`` so sub-millisecond
+    jitter doesn't count.
+    """
+    regressions = []
+    for label, now in report['endpoints'].items():
+        before = baseline['endpoints'].get(label)
+        if before is None:
+            continue
+        if now['queries'] > before['queries']:
+            regressions.append(f"{label}: {before['queries']} -> {now['queries']} queries")
+        if now[metric] > before[metric] * (1 + tolerance) and now[metric] - before[metric] >= min_delta_ms:
+            regressions.append(f"{label}: {metric} {before[metric]} -> {now[metric]}")
+        if now['bytes'] > before['bytes'] * (1 + tolerance):
+            regressions.append(f"{label}: {before['bytes']} -> {now['bytes']} bytes")
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a dataset and drives every golf_app route through the test client, reporting latency '
+        'percentiles, SQL queries and response bytes per endpoint as JSON (rolled back afterwards)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--rounds', type=int, default=20, help='Completed rounds per user')
+        parser.add_argument('--courses', type=int, default=300)
+        parser.add_argument('--friends', type=int, default=25, help='Friends per user')
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed passes before measuring')
+        parser.add_argument('--baseline', help='Report from an earlier run to compare against')
+        parser.add_argument('--save-baseline', help='Write this run\'s report to the given path')
+        parser.add_argument('--latency-metric', choices=['p50', 'p95', 'p99'], default='p50',
+                            help='Percentile checked against the baseline; the tails need a large --repeat')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed fractional growth in latency and response bytes')
+        parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                            help='Ignore latency growth smaller than this many milliseconds')
+
+    def handle(self, *args, **options):
+        if replica_configured():
+            raise CommandError('Unset REPLICA_DB_NAME: the seeded rows are only visible on the primary')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        server = start_stub_server(delay=0)
+        url = f"http://127.0.0.1:{server.server_address[1]}/data/2.5/weather"
+        try:
+            with override_settings(OPENWEATHER_API_URL=url, CACHES=BENCH_CACHES), transaction.atomic():
+                weather.reset_weather_cache()
+                seeded = self._seed(options)
+                cases = endpoint_cases(seeded)
+                missing = route_names() - {route for route, *_ in cases}
+                if missing:
+                    raise CommandError(f"No benchmark case for routes: {', '.join(sorted(missing))}")
+
+                client = APIClient()
+                client.force_authenticate(seeded['user'])
+                for _ in range(options['warmup']):
+                    list(self._pass(client, cases, seeded))
+                samples = {case_label(route, method, query): [] for route, method, _, query, _ in cases}
+                for _ in range(options['repeat']):
+                    for label, sample in self._pass(client, cases, seeded):
+                        samples[label].append(sample)
+                transaction.set_rollback(True)
+        finally:
+            server.shutdown()
+            server.server_close()
+            weather.reset_weather_cache()
+            username_index.rebuild()
+
+        failed = {
+            label: status for label, rows in samples.items()
+            for status in {row[0] for row in rows} if status >= 400
+        }
+        if failed:
+            raise CommandError(f'Requests failed: {failed}')
+
+        report = {
+            'dataset': {key: options[key] for key in ('users', 'rounds', 'courses', 'friends')},
+            'repeat': options['repeat'],
+            'endpoints': {},
+        }
+        for (route, method, _, query, _), (label, rows) in zip(cases, samples.items()):
+            latencies = [row[1] for row in rows]
+            report['endpoints'][label] = {
+                'route': route,
+                'method': method.upper(),
+                'status': rows[-1][0],
+                'p50_ms': round(percentile(latencies, 50), 3),
+                'p95_ms': round(percentile(latencies, 95), 3),
+                'p99_ms': round(percentile(latencies, 99), 3),
+                'queries': statistics.median_low(row[2] for row in rows),
+                'bytes': statistics.median_low(row[3] for row in rows),
+            }
+
+        regressions = []
+        if baseline is not None:
+            regressions = compare(
+                report, baseline, options['tolerance'], options['min_delta_ms'], f"{options['latency_metric']}_ms"
+            )
+            report['baseline'] = options['baseline']
+            report['regressions'] = regressions
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as f:
+                json.dump(report, f, indent=2)
+        self.stdout.write(json.dumps(report, indent=2))
+        if regressions:
+            raise CommandError(f"{len(regressions)} regressions against {options['baseline']}")
+
+    def _pass(self, client, cases, seeded):
+        """One request per case; yields ``(label, (status, ms, queries, bytes))``."""
+        ids = {name: getattr(value, 'pk', None) for name, value in seeded.items()}
+        created = {}
+        for route, method, kwargs, query, body in cases:
+            if callable(kwargs):
+                kwargs = kwargs(created)
+            path = reverse(route, kwargs=kwargs) + (f'?{query.format(**ids)}' if query else '')
+            counter = [0]
+            with connection.execute_wrapper(_counting(counter)):
+                started = time.perf_counter()
+                response = getattr(client, method)(path, body, format='json')
+                elapsed = (time.perf_counter() - started) * 1000
+            if method == 'post' and response.status_code == 201:
+                created[route] = response.json()
+            yield case_label(route, method, query), (response.status_code, elapsed, counter[0], len(response.content))
+
+    def _seed(self, options):
+        # Staff, so the admin-only achievement routes answer too
+        user = User.objects.create_user(username='bench-api', password='unused', is_staff=True)
+        # Never befriended, so the befriend/unfriend cases always have someone to add
+        stranger = User.objects.create_user(username='bench-stranger', password='unused')
+        players = User.objects.bulk_create(User(username=f'bench-player-{i}') for i in range(options['users']))
+        everyone = [user] + players
+
+        courses = Course.objects.bulk_create(
+            Course(name=f'Bench Course {i}', city=f'Bench City {i % 40}', par=72, number_of_holes=18,
+                   latitude=round(HOME[0] + (i % 20 - 10) * 0.05, 6),
+                   longitude=round(HOME[1] + (i // 20 % 20 - 10) * 0.05, 6),
+                   geohash=geohash_for(HOME[0] + (i % 20 - 10) * 0.05, HOME[1] + (i // 20 % 20 - 10) * 0.05))
+            for i in range(max(options['courses'], 1))
+        )
+        Hole.objects.bulk_create(
+            Hole(course=course, hole_number=number, par=4, yardage=380, handicap_index=number)
+            for course in courses[:20] for number in range(1, 19)
+        )
+        ranges = DrivingRange.objects.bulk_create(
+            DrivingRange(name=f'Bench Range {i}', city=f'Bench City {i % 40}',
+                         latitude=round(HOME[0] + (i % 10 - 5) * 0.04, 6),
+                         longitude=round(HOME[1] + (i // 10 - 5) * 0.04, 6),
+                         geohash=geohash_for(HOME[0] + (i % 10 - 5) * 0.04, HOME[1] + (i // 10 - 5) * 0.04))
+            for i in range(100)
+        )
+
+        Round.objects.bulk_create(
+            Round(user=player, course=courses[(i + n) % min(len(courses), 20)], is_completed=True)
+            for i, player in enumerate(everyone) for n in range(options['rounds'])
+        )
+        HoleScore.objects.bulk_create(
+            HoleScore(round_id=round_id, hole_number=number, score=3 + (round_id + number) % 4,
+                      putts=1 + (round_id + number) % 2, fairway_hit=number % 3 != 0)
+            for round_id in Round.objects.filter(user__in=everyone).values_list('id', flat=True)
+            for number in range(1, 19)
+        )
+        for i, player in enumerate(everyone):
+            friends = {everyone[(i + step) % len(everyone)] for step in range(1, options['friends'] + 1)} - {player}
+            Friendship.objects.bulk_create(
+                [edge for friend in friends for edge in (Friendship(user=player, friend=friend),
+                                                         Friendship(user=friend, friend=player))],
+                ignore_conflicts=True,
+            )
+
+        clubs = Club.objects.bulk_create(
+            Club(user=user, club_type=club_type, average_distance_yards=250 - 15 * n)
+            for n, (club_type, _) in enumerate(Club.CLUB_TYPES)
+        )
+        achievements = Achievement.objects.bulk_create(
+            Achievement(name=f'Bench Achievement {i}', description='Benchmark') for i in range(20)
+        )
+        UserAchievement.objects.bulk_create(UserAchievement(user=user, achievement=a) for a in achievements)
+        tips = PracticeTip.objects.bulk_create(
+            PracticeTip(title=f'Drill {i}', description='Repeat ten times.', category=category, difficulty_level=1)
+            for i, (category, _) in enumerate(PracticeTip.CATEGORY_CHOICES * 4)
+        )
+
+        # Totals, leaderboards, handicaps and search indexes for the bulk-created rows
+        repair_round_totals()
+        rebuild_leaderboard()
+        rebuild_score_buckets()
+        recompute_handicaps()
+        rebuild_search_index()
+        username_index.rebuild()
+
+        played = user.rounds.order_by('-id').first()
+        shared = user.rounds.order_by('id').first()
+        shared.shareable_link = uuid.uuid4()
+        shared.save(update_fields=['shareable_link'])
+        friend = Friendship.objects.filter(user=user).order_by('id').first()
+        return {
+            'user': user,
+            'other': stranger,
+            'friend': friend.friend,
+            'friendship': friend,
+            'round': played,
+            'hole_score': played.hole_scores.order_by('hole_number').first(),
+            'shared': shared,
+            'club': clubs[0],
+            'range': ranges[0],
+            'achievement': achievements[0],
+            'user_achievement': user.achievements.first(),
+            'tip': tips[0],
+        }
@@ -0,0 +1,104 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from golf_app.authentication import invalidate_cached_user
+from golf_app.models import Course, Friendship, Hole, HoleScore, PracticeTip, Round, User
+
+# Authenticated GETs across the app, roughly as the screens issue them
+REQUEST_MIX = [
+    '/api/users/',
+    '/api/users/search_users/?search_term=bench',
+    '/api/courses/',
+    '/api/rounds/',
+    '/api/rounds/?page_size=10',
+    '/api/rounds/leaderboard/',
+    '/api/rounds/suggest_club/',
+    '/api/hole-scores/',
+    '/api/driving-ranges/',
+    '/api/achievements/achievements/',
+    '/api/user-achievements/',
+    '/api/practice-tips/',
+    '/api/friendships/',
+    '/api/friendships/suggested_friends/',
+    '/api/leaderboard/',
+    '/api/leaderboard/me/',
+    '/api/sync/',
+]
+
+
+def _counting(counter):
+    def wrapper(execute, sql, params, many, context):
+        counter[0] += 1
+        return execute(sql, params, many, context)
+    return wrapper
+
+
+class Command(BaseCommand):
+    help = 'Measures queries and time saved per request by caching the JWT-authenticated user (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self._seed()
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+            uncached = self._run(client, user, options['repeat'], cached=False)
+            cached = self._run(client, user, options['repeat'], cached=True)
+            transaction.set_rollback(True)
+
+        failed = {path: status for path, status in uncached['statuses'].items() if status >= 400}
+        if failed:
+            raise CommandError(f'Requests failed: {failed}')
+        saved = uncached['queries'] - cached['queries']
+        self.stdout.write(json.dumps({
+            'requests': len(REQUEST_MIX),
+            'uncached': uncached,
+            'cached': cached,
+            'queries_saved_per_request': round(saved / len(REQUEST_MIX), 3),
+            'ms_saved_per_request': round((uncached['ms'] - cached['ms']) / len(REQUEST_MIX), 3),
+        }, indent=2))
+
+    def _seed(self):
+        user = User.objects.create_user(username='bench-auth', password='unused')
+        friends = User.objects.bulk_create(User(username=f'bench-friend-{i}') for i in range(20))
+        for friend in friends:
+            Friendship.objects.create(user=user, friend=friend)
+        course = Course.objects.create(name='Bench National', city='Benchmark')
+        Hole.objects.bulk_create(
+            Hole(course=course, hole_number=number, par=4, yardage=380, handicap_index=number)
+            for number in range(1, 19)
+        )
+        for i in range(10):
+            played = Round.objects.create(user=user, course=course, is_completed=True)
+            HoleScore.objects.bulk_create(
+                HoleScore(round=played, hole_number=number, score=4 + (number + i) % 3, putts=2)
+                for number in range(1, 19)
+            )
+        PracticeTip.objects.create(title='Tempo', description='Count to three.', category='PUTTING', difficulty_level=1)
+        return user
+
+    def _run(self, client, user, repeat, cached):
+        counter = [0]
+        statuses = {}
+        elapsed = 0.0
+        with connection.execute_wrapper(_counting(counter)):
+            for _ in range(repeat):
+                for path in REQUEST_MIX:
+                    if not cached:
+                        invalidate_cached_user(user.pk)
+                    started = time.perf_counter()
+                    statuses[path] = client.get(path).status_code
+                    elapsed += time.perf_counter() - started
+        return {
+            'statuses': statuses,
+            'queries': counter[0] // repeat,
+            'ms': round(elapsed / repeat * 1000, 3),
+        }
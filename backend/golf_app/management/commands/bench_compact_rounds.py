@@ -0,0 +1,86 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.test import APIClient
+
+from golf_app.models import Course, HoleScore, Round, User
+from golf_app.scorecards import SCORE_FIELDS, pack_scorecard, unpack_scorecard
+
+
+class Command(BaseCommand):
+    help = (
+        'Round-trips packed scorecards and compares rounds/ payload sizes with and without ?format=compact '
+        '(rolled back afterwards)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=120, help='Rounds in the seeded season')
+        parser.add_argument('--seed', type=int, default=17)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self._check_codec(rng)
+
+        with transaction.atomic():
+            user = User.objects.create_user(username='bench-compact-rounds', password='unused')
+            course = Course.objects.create(name='Bench Course', city='Benchmark')
+            rounds = Round.objects.bulk_create([
+                Round(user=user, course=course, total_score=rng.randint(70, 110), is_completed=True)
+                for _ in range(options['rounds'])
+            ])
+            HoleScore.objects.bulk_create([
+                HoleScore(round=played, hole_number=number, score=rng.randint(3, 8),
+                          putts=rng.choice([None, 1, 2, 2, 3]), fairway_hit=rng.random() < 0.5,
+                          sand_save=rng.random() < 0.1)
+                for played in rounds
+                for number in range(1, 19)
+            ], batch_size=5000)
+
+            client = APIClient()
+            client.force_authenticate(user)
+            full = client.get('/api/rounds/').content
+            compact = client.get('/api/rounds/', {'format': 'compact'}).content
+
+            full_rounds = {round_data['id']: round_data for round_data in json.loads(full)}
+            for round_data in json.loads(compact):
+                expected = [
+                    {field: hole[field] for field in ('hole_number',) + SCORE_FIELDS}
+                    for hole in full_rounds[round_data['id']]['hole_scores']
+                ]
+                if unpack_scorecard(round_data['scorecard']) != expected:
+                    raise CommandError(f"Round {round_data['id']} does not survive the compact encoding")
+
+            started = time.perf_counter()
+            for round_data in full_rounds.values():
+                unpack_scorecard(pack_scorecard(round_data['hole_scores']))
+            codec_ms = (time.perf_counter() - started) * 1000
+            transaction.set_rollback(True)
+
+        self.stdout.write(json.dumps({
+            'rounds': options['rounds'],
+            'full_bytes': len(full),
+            'compact_bytes': len(compact),
+            'shrink_factor': round(len(full) / len(compact), 1),
+            'pack_unpack_season_ms': round(codec_ms, 2),
+        }, indent=2))
+
+    def _check_codec(self, rng):
+        # Byte-sized cards, cards needing the wide layout, and empty cards
+        cards = [[], [{'hole_number': 300, 'score': -1, 'putts': None, 'fairway_hit': True, 'sand_save': True}]]
+        for _ in range(200):
+            cards.append([
+                {
+                    'hole_number': number,
+                    'score': rng.randint(1, 12) if rng.random() < 0.99 else rng.randint(256, 400),
+                    'putts': rng.choice([None, 0, 1, 2, 3, 4]),
+                    'fairway_hit': rng.random() < 0.5,
+                    'sand_save': rng.random() < 0.2,
+                }
+                for number in range(1, rng.randint(1, 27))
+            ])
+        for card in cards:
+            if unpack_scorecard(pack_scorecard(card)) != card:
+                raise CommandError(f'Scorecard does not round-trip: {card}')
@@ -0,0 +1,86 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.test import APIClient
+
+from golf_app.models import Achievement, Course, DrivingRange, PracticeTip, User
+
+# What the app fetches on launch
+COLD_START = [
+    '/api/courses/',
+    '/api/driving-ranges/',
+    '/api/practice-tips/practice_tips/',
+    '/api/achievements/achievements/',
+]
+
+
+def _recording(executed):
+    def wrapper(execute, sql, params, many, context):
+        executed.append(sql)
+        return execute(sql, params, many, context)
+    return wrapper
+
+
+class Command(BaseCommand):
+    help = 'Measures bytes, CPU and queries saved by conditional GETs over an app cold-start sequence (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=2000)
+        parser.add_argument('--ranges', type=int, default=300)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            Course.objects.bulk_create(
+                Course(name=f'Catalog Course {i}', city='Benchmark', state='TX', address=f'{i} Fairway Rd')
+                for i in range(options['courses'])
+            )
+            DrivingRange.objects.bulk_create(
+                DrivingRange(name=f'Catalog Range {i}', city='Benchmark', address=f'{i} Range Rd')
+                for i in range(options['ranges'])
+            )
+            PracticeTip.objects.bulk_create(
+                PracticeTip(title=f'Tip {i}', description='Keep your head still. ' * 10, category='PUTTING',
+                            difficulty_level=1 + i % 5)
+                for i in range(60)
+            )
+            Achievement.objects.bulk_create(
+                Achievement(name=f'Achievement {i}', description='Bench achievement',
+                            criteria_json={'type': 'total_rounds', 'value': i})
+                for i in range(25)
+            )
+            client = APIClient()
+            client.force_authenticate(User.objects.create_user(username='bench-conditional', password='unused'))
+
+            cold = self._run(client, {}, options['repeat'])
+            etags = {path: client.get(path)['ETag'] for path in COLD_START}
+            warm = self._run(client, etags, options['repeat'])
+            transaction.set_rollback(True)
+
+        if set(warm['statuses']) != {304}:
+            raise CommandError(f"Revalidation did not return 304: {warm['statuses']}")
+        self.stdout.write(json.dumps({
+            'cold_start': cold,
+            'revalidated': warm,
+            'bytes_saved': cold['bytes'] - warm['bytes'],
+            'cpu_saved_ms': round(cold['cpu_ms'] - warm['cpu_ms'], 3),
+        }, indent=2))
+
+    def _run(self, client, etags, repeat):
+        queries = []
+        started = time.process_time()
+        with connection.execute_wrapper(_recording(queries)):
+            for _ in range(repeat):
+                responses = [
+                    client.get(path, HTTP_IF_NONE_MATCH=etags[path]) if path in etags else client.get(path)
+                    for path in COLD_START
+                ]
+        cpu = time.process_time() - started
+        return {
+            'statuses': sorted({response.status_code for response in responses}),
+            'bytes': sum(len(response.content) for response in responses),
+            'cpu_ms': round(cpu / repeat * 1000, 3),
+            'queries': len(queries) // repeat,
+        }
@@ -0,0 +1,69 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.test import APIClient
+
+from golf_app.models import Course, User
+from golf_app.pagination import KeysetPagination
+from golf_app.views import CourseViewSet
+
+
+class Command(BaseCommand):
+    help = 'Times keyset pagination against OFFSET pagination on courses/ at shallow and deep pages (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--pages', default='1,100,1000,10000', help='Comma-separated page numbers to time')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        pages = sorted(int(page) for page in options['pages'].split(','))
+
+        report = []
+        with transaction.atomic():
+            Course.objects.bulk_create(
+                (Course(name=f'Paged Course {i}', city='Benchmark') for i in range(page_size * max(pages))),
+                batch_size=5000,
+            )
+            ids = list(Course.objects.order_by('id').values_list('id', flat=True))
+            client = APIClient()
+            client.force_authenticate(User.objects.create_user(username='bench-pagination', password='unused'))
+            keyset = KeysetPagination()
+
+            for page in pages:
+                offset = (page - 1) * page_size
+                cursor = {'page_size': page_size}
+                if offset:
+                    # The cursor the previous page's "next" link would carry
+                    cursor['cursor'] = keyset.encode_cursor([ids[offset - 1]])
+                keyset_ms, keyset_first = self._time(client, cursor, options['repeat'])
+
+                CourseViewSet.pagination_class = LimitOffsetPagination
+                try:
+                    offset_ms, offset_first = self._time(
+                        client, {'limit': page_size, 'offset': offset}, options['repeat']
+                    )
+                finally:
+                    CourseViewSet.pagination_class = KeysetPagination
+
+                report.append({
+                    'page': page,
+                    'keyset_ms': keyset_ms,
+                    'offset_ms': offset_ms,
+                    'same_rows': keyset_first == offset_first,
+                })
+            transaction.set_rollback(True)
+
+        self.stdout.write(json.dumps({'courses': page_size * max(pages), 'page_size': page_size, 'pages': report},
+                                     indent=2))
+
+    def _time(self, client, params, repeat):
+        first = [row['id'] for row in client.get('/api/courses/', params).json()['results']]
+        started = time.perf_counter()
+        for _ in range(repeat):
+            client.get('/api/courses/', params)
+        return round((time.perf_counter() - started) / repeat * 1000, 3), first
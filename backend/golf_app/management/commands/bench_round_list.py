@@ -0,0 +1,67 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from golf_app.models import Course, HoleScore, Round, User
+from golf_app.serializers import RoundSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the rounds/ list fast path with plain RoundSerializer output for one long history, '
+        'checking the bytes match (rolled back afterwards)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=13)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        repeat = options['repeat']
+
+        with transaction.atomic():
+            user = User.objects.create_user(username='bench-round-list', password='unused')
+            course = Course.objects.create(name='Bench Course', city='Benchmark')
+            rounds = Round.objects.bulk_create([
+                Round(user=user, course=course if i % 3 else None, total_score=rng.randint(70, 110),
+                      is_completed=bool(i % 2))
+                for i in range(options['rounds'])
+            ])
+            HoleScore.objects.bulk_create([
+                HoleScore(round=played, hole_number=number, score=rng.randint(3, 8),
+                          putts=rng.choice([None, 1, 2, 3]), fairway_hit=rng.random() < 0.5,
+                          sand_save=rng.random() < 0.1)
+                for played in rounds
+                for number in range(1, 19)
+            ], batch_size=5000)
+
+            def serializer_path(queryset):
+                return JSONRenderer().render(RoundSerializer(queryset, many=True).data)
+
+            client = APIClient()
+            client.force_authenticate(user)
+            fast = client.get('/api/rounds/').content
+            if fast != serializer_path(user.rounds.all()):
+                raise CommandError('rounds/ output differs from RoundSerializer output')
+
+            timings = {}
+            for name, run in (
+                ('serializer_no_prefetch', lambda: serializer_path(user.rounds.all())),
+                ('serializer_prefetch', lambda: serializer_path(user.rounds.prefetch_related('hole_scores'))),
+                ('fast_path_endpoint', lambda: client.get('/api/rounds/').content),
+            ):
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    run()
+                timings[f'{name}_ms'] = round((time.perf_counter() - started) / repeat * 1000, 2)
+            transaction.set_rollback(True)
+
+        timings['speedup_vs_serializer'] = round(timings['serializer_no_prefetch_ms'] / timings['fast_path_endpoint_ms'], 1)
+        self.stdout.write(json.dumps({'rounds': options['rounds'], 'bytes': len(fast), **timings}, indent=2))
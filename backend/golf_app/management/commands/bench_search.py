@@ -0,0 +1,113 @@
+import json
+import random
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from golf_app import search
+from golf_app.models import Course
+
+NAME_WORDS = [
+    'Pine', 'Oak', 'Eagle', 'Hawk', 'Cedar', 'Willow', 'Maple', 'Stone', 'River', 'Lake', 'Meadow', 'Fox',
+    'Bear', 'Deer', 'Sunset', 'Green', 'Royal', 'Golden', 'Silver', 'Spring', 'Heron', 'Falcon', 'Aspen',
+    'Birch', 'Cypress', 'Magnolia', 'Prairie', 'Summit', 'Harbor', 'Canyon', 'Timber', 'Quail', 'Osprey',
+]
+NAME_SUFFIXES = ['Creek', 'Ridge', 'Valley', 'Hills', 'Links', 'Dunes', 'Point', 'Run', 'Hollow', 'Glen', 'Woods']
+NAME_KINDS = ['Golf Club', 'Country Club', 'Golf Course', 'Golf Links', 'Golf Resort']
+SYLLABLES = ['ash', 'bel', 'car', 'dal', 'el', 'fair', 'glen', 'ham', 'kings', 'lin', 'mar', 'new', 'ox',
+             'port', 'rich', 'sal', 'tam', 'van', 'wood', 'york', 'bro', 'clay', 'dor', 'ever']
+CITY_SUFFIXES = ['ton', 'ville', 'field', 'burg', 'dale', 'wood', 'ford', 'view']
+STREETS = ['Main', 'Fairway', 'Country Club', 'Park', 'Lake', 'Hill', 'Golf', 'Elm', 'Washington', 'Oak']
+STATES = ['TX', 'CA', 'FL', 'NY', 'AZ', 'NC', 'SC', 'GA', 'OH', 'MI', 'IL', 'CO', 'OR', 'WA']
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the course search index against the icontains scan on a synthetic catalog (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=40)
+        parser.add_argument('--seed', type=int, default=11)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        cities = [
+            (rng.choice(SYLLABLES) + rng.choice(SYLLABLES) + rng.choice(CITY_SUFFIXES)).title()
+            for _ in range(2000)
+        ]
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            Course.objects.bulk_create(
+                (
+                    Course(
+                        name=f'{rng.choice(NAME_WORDS)} {rng.choice(NAME_SUFFIXES)} {rng.choice(NAME_KINDS)}',
+                        city=rng.choice(cities),
+                        state=rng.choice(STATES),
+                        address=f'{rng.randint(1, 9999)} {rng.choice(STREETS)} Rd',
+                    )
+                    for _ in range(options['courses'])
+                ),
+                batch_size=5000,
+            )
+            seeded = time.perf_counter()
+            search.rebuild_search_index()
+            indexed = time.perf_counter()
+
+            report = {
+                'courses': Course.objects.count(),
+                'seed_seconds': round(seeded - started, 2),
+                'index_build_seconds': round(indexed - seeded, 2),
+                'query_types': {},
+            }
+            for kind, queries in self._queries(rng, cities, options['queries']).items():
+                report['query_types'][kind] = self._measure(queries)
+            transaction.set_rollback(True)
+        cache.delete(search._STATS_KEY)
+
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def _queries(self, rng, cities, count):
+        def typo(word):
+            # Drop or double a letter inside the word
+            i = rng.randrange(2, len(word) - 1)
+            return word[:i] + word[i + 1:] if rng.random() < 0.5 else word[:i] + word[i] + word[i:]
+
+        return {
+            'word': [rng.choice(NAME_WORDS).lower() for _ in range(count)],
+            'two_words': [f'{rng.choice(NAME_WORDS)} {rng.choice(NAME_SUFFIXES)}' for _ in range(count)],
+            'city': [rng.choice(cities) for _ in range(count)],
+            'prefix': [rng.choice(NAME_WORDS)[:3] for _ in range(count)],
+            'typo': [typo(rng.choice([w for w in NAME_WORDS if len(w) >= 5])) for _ in range(count)],
+        }
+
+    def _measure(self, queries):
+        scan_seconds = index_seconds = 0.0
+        recall = []
+        index_hits = scan_hits = 0
+        for query in queries:
+            t0 = time.perf_counter()
+            scanned = set(Course.objects.filter(
+                Q(name__icontains=query) | Q(city__icontains=query) | Q(address__icontains=query)
+            ).values_list('id', flat=True))
+            t1 = time.perf_counter()
+            ranked = search.search_course_ids(query, limit=100)
+            t2 = time.perf_counter()
+            scan_seconds += t1 - t0
+            index_seconds += t2 - t1
+            scan_hits += bool(scanned)
+            index_hits += bool(ranked)
+            # Share of the top results the old substring scan also returned
+            if scanned and ranked:
+                recall.append(len(scanned.intersection(ranked)) / min(len(ranked), len(scanned)))
+
+        return {
+            'icontains_scan_ms': round(scan_seconds / len(queries) * 1000, 3),
+            'index_top100_ms': round(index_seconds / len(queries) * 1000, 3),
+            'queries_with_results_scan': scan_hits,
+            'queries_with_results_index': index_hits,
+            'top_results_also_in_scan': round(sum(recall) / len(recall), 3) if recall else None,
+        }
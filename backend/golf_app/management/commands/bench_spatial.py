@@ -0,0 +1,75 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from golf_app.geo import geohash_for, nearest, ranked_by_distance
+from golf_app.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks geohash nearest-course lookups against a full scan on synthetic courses (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,50000',
+                            help='Comma-separated catalog sizes to measure')
+        parser.add_argument('--queries', type=int, default=100)
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--radius', type=float, default=25.0, help='Radius in km for the radius query')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        points = [(rng.uniform(25, 49), rng.uniform(-124, -67)) for _ in range(options['queries'])]
+
+        report = []
+        with transaction.atomic():
+            created = 0
+            for size in sizes:
+                courses = []
+                for i in range(created, size):
+                    lat, lon = rng.uniform(25, 49), rng.uniform(-124, -67)
+                    courses.append(Course(
+                        name=f'Synthetic Course {i}', city='Benchmark',
+                        latitude=round(lat, 6), longitude=round(lon, 6),
+                        geohash=geohash_for(lat, lon),
+                    ))
+                Course.objects.bulk_create(courses, batch_size=2000)
+                created = size
+                report.append(self._measure(size, points, options))
+            transaction.set_rollback(True)
+
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def _measure(self, size, points, options):
+        queryset = Course.objects.filter(city='Benchmark')
+        k = options['k']
+        radius = options['radius']
+
+        timings = {'knn_index': 0.0, 'radius_index': 0.0, 'full_scan': 0.0}
+        mismatches = 0
+        for lat, lon in points:
+            t0 = time.perf_counter()
+            knn = nearest(queryset, lat, lon, k=k)
+            t1 = time.perf_counter()
+            in_radius = nearest(queryset, lat, lon, k=k, radius_km=radius)
+            t2 = time.perf_counter()
+            scan = ranked_by_distance(queryset, lat, lon)
+            t3 = time.perf_counter()
+            timings['knn_index'] += t1 - t0
+            timings['radius_index'] += t2 - t1
+            timings['full_scan'] += t3 - t2
+
+            expected_knn = [pk for _, pk in scan[:k]]
+            expected_radius = [pk for distance, pk in scan if distance <= radius][:k]
+            if [c.pk for c in knn] != expected_knn or [c.pk for c in in_radius] != expected_radius:
+                mismatches += 1
+
+        return {
+            'courses': size,
+            **{f'{name}_ms': round(total / len(points) * 1000, 3) for name, total in timings.items()},
+            'mismatches_vs_full_scan': mismatches,
+        }
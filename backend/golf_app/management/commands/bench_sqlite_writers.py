@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections
+from django.test import override_settings
+
+from golf_app.models import Course, Hole, Round, User
+from golf_app.scorecards import save_scorecard
+from golf_app.sqlite import serialized_write, writer
+
+# SQLite as shipped: rollback journal and a full fsync on every commit
+DEFAULT_PRAGMAS = {'journal_mode': 'delete', 'synchronous': 'full'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Concurrent hole-score writers against the SQLite database: stock pragmas, the tuned profile, '
+        'and the tuned profile with coalesced writes. Reports throughput and lock errors; seeded rows are deleted'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--writes', type=int, default=50, help='Writes per thread')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite' or connection.settings_dict['NAME'] == ':memory:':
+            raise CommandError('Needs a file-backed SQLite default database')
+
+        tuned = settings.SQLITE_PRAGMAS
+        if not tuned:
+            raise CommandError('SQLITE_PRAGMAS is empty; unset SQLITE_TUNING=0 to benchmark the tuned profile')
+
+        users, course = self._seed(options['threads'])
+        try:
+            report = {}
+            for name, pragmas, coalesce in (
+                ('stock', DEFAULT_PRAGMAS, False),
+                ('tuned', tuned, False),
+                ('tuned_coalesced', tuned, True),
+            ):
+                connections.close_all()
+                with override_settings(SQLITE_PRAGMAS=pragmas, SQLITE_WRITE_COALESCING=coalesce):
+                    report[name] = self._run(users, course, options['threads'], options['writes'])
+        finally:
+            connections.close_all()
+            Round.objects.filter(user__in=users).delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+            course.delete()
+
+        report['coalesced_batches'] = writer.batches
+        report['speedup'] = round(report['tuned_coalesced']['writes_per_second'] / report['stock']['writes_per_second'], 2)
+        self.stdout.write(json.dumps(report, indent=2))
+        if report['tuned_coalesced']['lock_errors']:
+            raise CommandError('Coalesced writers still hit lock errors')
+
+    def _seed(self, threads):
+        course = Course.objects.create(name='Writer Bench Links', city='Benchmark')
+        Hole.objects.bulk_create(Hole(course=course, hole_number=number, par=4) for number in range(1, 19))
+        users = [User.objects.create_user(username=f'writer-bench-{i}', password='unused') for i in range(threads)]
+        return users, course
+
+    def _run(self, users, course, threads, writes):
+        rounds = [Round.objects.create(user=user, course=course) for user in users]
+        connections.close_all()
+        counts = {'ok': 0, 'lock_errors': 0, 'other_errors': 0}
+        counts_lock = threading.Lock()
+        start = threading.Barrier(threads + 1)
+
+        def player(played):
+            try:
+                start.wait()
+                for i in range(writes):
+                    entry = {'hole_number': i % 18 + 1, 'score': 3 + i % 4, 'putts': 2}
+                    try:
+                        serialized_write(save_scorecard, played, [entry])
+                        outcome = 'ok'
+                    except OperationalError as exc:
+                        outcome = 'lock_errors' if 'locked' in str(exc) else 'other_errors'
+                    except Exception:
+                        outcome = 'other_errors'
+                    with counts_lock:
+                        counts[outcome] += 1
+            finally:
+                connections[DEFAULT_DB_ALIAS].close()
+
+        workers = [threading.Thread(target=player, args=(played,)) for played in rounds]
+        for worker in workers:
+            worker.start()
+        start.wait()
+        started = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        return dict(counts, seconds=round(elapsed, 3), writes_per_second=round(counts['ok'] / elapsed, 1))
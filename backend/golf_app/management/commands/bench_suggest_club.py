@@ -0,0 +1,81 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.test import APIClient
+
+from golf_app.models import Club, Course, Hole, HoleScore, Round, User
+
+
+def _recording(executed):
+    # execute_wrapper rather than CaptureQueriesContext: the test client resets queries_log per request
+    def wrapper(execute, sql, params, many, context):
+        executed.append(sql)
+        return execute(sql, params, many, context)
+    return wrapper
+
+
+class Command(BaseCommand):
+    help = (
+        'Checks that suggest_club runs a constant number of queries however many rounds are analyzed, '
+        'and times it (rolled back afterwards)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', default='1,5,20,50', help='Comma-separated round windows to measure')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        windows = sorted(int(rounds) for rounds in options['rounds'].split(','))
+
+        report = []
+        with transaction.atomic():
+            user = User.objects.create_user(username='bench-suggest-club', password='unused')
+            Club.objects.bulk_create([
+                Club(user=user, club_type=club_type, average_distance_yards=distance)
+                for club_type, distance in (('Driver', 240), ('Wood', 215), ('Hybrid', 190), ('Iron', 160),
+                                            ('Wedge', 110), ('Putter', 0))
+            ])
+            courses = []
+            for c in range(3):
+                course = Course.objects.create(name=f'Bench Course {c}', city='Benchmark', number_of_holes=18)
+                Hole.objects.bulk_create([
+                    Hole(course=course, hole_number=number, par=par,
+                         yardage={3: rng.randint(120, 220), 4: rng.randint(320, 450), 5: rng.randint(480, 580)}[par])
+                    for number, par in enumerate([4, 4, 3, 5, 4, 4, 3, 4, 5] * 2, start=1)
+                ])
+                courses.append(course)
+            for _ in range(max(windows)):
+                played = Round.objects.create(user=user, course=rng.choice(courses), is_completed=True)
+                HoleScore.objects.bulk_create([
+                    HoleScore(round=played, hole_number=number, score=rng.randint(3, 8), putts=rng.randint(1, 3),
+                              fairway_hit=rng.random() < 0.5)
+                    for number in range(1, 19)
+                ])
+
+            client = APIClient()
+            client.force_authenticate(user)
+            for rounds in windows:
+                queries = []
+                with connection.execute_wrapper(_recording(queries)):
+                    response = client.get('/api/rounds/suggest_club/', {'rounds': rounds, 'version': 2})
+                if response.status_code != 200:
+                    raise CommandError(f'suggest_club returned {response.status_code}: {response.content[:200]}')
+                started = time.perf_counter()
+                for _ in range(options['repeat']):
+                    client.get('/api/rounds/suggest_club/', {'rounds': rounds, 'version': 2})
+                report.append({
+                    'rounds': rounds,
+                    'hole_scores': rounds * 18,
+                    'queries': len(queries),
+                    'ms': round((time.perf_counter() - started) / options['repeat'] * 1000, 3),
+                })
+            transaction.set_rollback(True)
+
+        self.stdout.write(json.dumps(report, indent=2))
+        if len({row['queries'] for row in report}) > 1:
+            raise CommandError('suggest_club query count grows with the number of rounds analyzed')
@@ -0,0 +1,69 @@
+import json
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from golf_app.models import User
+from golf_app.user_search import UsernameIndex
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the in-memory username index against the username__icontains query (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000,1000000',
+                            help='Comma-separated user counts to measure')
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=3)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        first_names = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 7))) for _ in range(3000)]
+
+        report = []
+        with transaction.atomic():
+            created = 0
+            for size in sizes:
+                User.objects.bulk_create(
+                    (
+                        User(username=f'{rng.choice(first_names)}{rng.choice(["", "_", "."])}{rng.choice(first_names)}{i}')
+                        for i in range(created, size)
+                    ),
+                    batch_size=5000,
+                )
+                created = size
+
+                index = UsernameIndex()
+                started = time.perf_counter()
+                index.rebuild()
+                build_seconds = time.perf_counter() - started
+
+                # Typeahead keystrokes: growing prefixes of real first names
+                keystrokes = []
+                for _ in range(options['queries'] // 4):
+                    name = rng.choice(first_names)
+                    keystrokes.extend(name[:length] for length in range(1, 5))
+
+                query_seconds = index_seconds = 0.0
+                for term in keystrokes:
+                    t0 = time.perf_counter()
+                    list(User.objects.filter(username__icontains=term).values_list('id', flat=True)[:10])
+                    t1 = time.perf_counter()
+                    index.search(term, limit=10)
+                    t2 = time.perf_counter()
+                    query_seconds += t1 - t0
+                    index_seconds += t2 - t1
+
+                report.append({
+                    'users': size,
+                    'index_build_seconds': round(build_seconds, 2),
+                    'icontains_query_ms': round(query_seconds / len(keystrokes) * 1000, 3),
+                    'index_search_ms': round(index_seconds / len(keystrokes) * 1000, 3),
+                })
+            transaction.set_rollback(True)
+
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,163 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from golf_app import weather
+
+
+class StubWeatherHandler(BaseHTTPRequestHandler):
+    """Answers every request with a canned OpenWeather payload after ``server.delay`` seconds."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.request_count += 1
+        time.sleep(self.server.delay)
+        body = json.dumps({
+            'main': {'temp': 21.4, 'feels_like': 20.9, 'humidity': 55},
+            'weather': [{'description': 'clear sky', 'icon': '01d'}],
+            'name': 'Stubville',
+            'sys': {'country': 'US'},
+            'wind': {'speed': 3.1},
+            'clouds': {'all': 0},
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(delay):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubWeatherHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.request_count = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the weather cache and course fan-out against a local stub OpenWeather server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', choices=['cache', 'fanout'], default='cache')
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--courses', type=int, default=40,
+                            help='Number of distinct course locations players are spread over')
+        parser.add_argument('--delay', type=float, default=0.05,
+                            help='Simulated upstream latency in seconds')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['scenario'] == 'fanout':
+            return self._handle_fanout(options)
+
+        rng = random.Random(options['seed'])
+        courses = [
+            (rng.uniform(25, 48), rng.uniform(-123, -70))
+            for _ in range(options['courses'])
+        ]
+        # Players report positions scattered a few hundred metres around the clubhouse
+        lookups = []
+        for _ in range(options['requests']):
+            lat, lon = rng.choice(courses)
+            lookups.append((lat + rng.uniform(-0.003, 0.003), lon + rng.uniform(-0.003, 0.003)))
+
+        server = start_stub_server(options['delay'])
+        url = f"http://127.0.0.1:{server.server_address[1]}/data/2.5/weather"
+        try:
+            with override_settings(OPENWEATHER_API_URL=url):
+                uncached = self._run(server, lookups, lambda lat, lon: weather.fetch_weather({'lat': lat, 'lon': lon}))
+
+                weather.reset_weather_cache()
+                cached = self._run(server, lookups, lambda lat, lon: weather.get_current_weather(lat=lat, lon=lon))
+                cached['cache'] = weather.get_weather_cache().stats()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.stdout.write(json.dumps({'uncached': uncached, 'cached': cached}, indent=2))
+
+    def _run(self, server, lookups, call):
+        server.request_count = 0
+        samples = []
+        started = time.perf_counter()
+        for lat, lon in lookups:
+            t0 = time.perf_counter()
+            call(lat, lon)
+            samples.append((time.perf_counter() - t0) * 1000)
+        return {
+            'requests': len(lookups),
+            'upstream_calls': server.request_count,
+            'wall_seconds': round(time.perf_counter() - started, 3),
+            'p50_ms': round(percentile(samples, 50), 3),
+            'p99_ms': round(percentile(samples, 99), 3),
+        }
+
+    def _handle_fanout(self, options):
+        # Five search results spread over four cities, like a typical course search
+        locations = [('Austin', 'US'), ('Dallas', 'US'), ('Austin', 'US'), ('Houston', 'US'), ('El Paso', 'US')]
+        iterations = max(1, options['requests'] // 100)
+
+        server = start_stub_server(options['delay'])
+        url = f"http://127.0.0.1:{server.server_address[1]}/data/2.5/weather"
+        try:
+            with override_settings(OPENWEATHER_API_URL=url):
+                sequential = self._run_fanout(server, iterations, lambda: [
+                    weather.fetch_weather({'q': weather.normalize_location(city, country_code)})
+                    for city, country_code in locations
+                ])
+                concurrent = self._run_fanout(server, iterations, lambda: weather.get_weather_for_locations(
+                    locations, deadline=options['delay'] * 10
+                ))
+                # A deadline shorter than the upstream latency returns partial results on time
+                weather.reset_weather_cache()
+                started = time.perf_counter()
+                partial = weather.get_weather_for_locations(locations, deadline=options['delay'] / 2)
+                deadline_run = {
+                    'deadline_ms': round(options['delay'] / 2 * 1000, 3),
+                    'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+                    'unavailable': sum(1 for value in partial.values() if value is None),
+                }
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.stdout.write(json.dumps({
+            'upstream_delay_ms': options['delay'] * 1000,
+            'sequential': sequential,
+            'concurrent': concurrent,
+            'missed_deadline': deadline_run,
+        }, indent=2))
+
+    def _run_fanout(self, server, iterations, call):
+        server.request_count = 0
+        samples = []
+        for _ in range(iterations):
+            weather.reset_weather_cache()
+            t0 = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - t0) * 1000)
+        return {
+            'iterations': iterations,
+            'upstream_calls_per_search': server.request_count / iterations,
+            'p50_ms': round(percentile(samples, 50), 3),
+            'p99_ms': round(percentile(samples, 99), 3),
+        }
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from golf_app.leaderboards import compact_score_buckets, compaction_cutoff
+
+
+class Command(BaseCommand):
+    help = 'Folds daily leaderboard score buckets past the retention window into monthly buckets'
+
+    def handle(self, *args, **kwargs):
+        removed, written = compact_score_buckets()
+        self.stdout.write(self.style.SUCCESS(
+            f'Compacted {removed} daily buckets before {compaction_cutoff()} into {written} monthly buckets'
+        ))
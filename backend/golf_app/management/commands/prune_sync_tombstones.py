@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from golf_app.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Deletes sync tombstones past SYNC_TOMBSTONE_RETENTION_DAYS; older client tokens get a full resync'
+
+    def handle(self, *args, **kwargs):
+        removed = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            f'Pruned {removed} sync tombstones older than {settings.SYNC_TOMBSTONE_RETENTION_DAYS} days'
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from golf_app.leaderboards import rebuild_leaderboard, rebuild_score_buckets, verify_leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the materialized leaderboards from rounds and checks them against the live aggregate'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check-only', action='store_true',
+                            help='Only compare the stored leaderboard with the live aggregate')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not options['check_only']:
+            count = rebuild_leaderboard(batch_size=options['batch_size'])
+            self.stdout.write(f'Rebuilt leaderboard entries for {count} users')
+            buckets = rebuild_score_buckets(batch_size=options['batch_size'])
+            self.stdout.write(f'Rebuilt {buckets} rolling-window score buckets')
+
+        mismatches = verify_leaderboard()
+        for user_id, field, stored, live in mismatches[:20]:
+            self.stderr.write(f'user {user_id}: {field} stored={stored} live={live}')
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} leaderboard mismatches found')
+
+        self.stdout.write(self.style.SUCCESS('Leaderboard matches the live aggregate'))
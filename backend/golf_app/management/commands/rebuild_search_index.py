@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from golf_app.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the course search index from the Course table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        count = rebuild_search_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} courses'))
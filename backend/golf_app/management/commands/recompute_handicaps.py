@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from golf_app.handicaps import recompute_handicaps
+
+
+class Command(BaseCommand):
+    help = "Recomputes every round's score differential and every user's handicap index, a batch of users at a time"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        users, scored = recompute_handicaps(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Recomputed {users} users from {scored} scored rounds'))
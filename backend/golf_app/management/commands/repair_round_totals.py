@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from golf_app.scorecards import repair_round_totals
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the running round totals from hole scores in chunks and fixes any that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check-only', action='store_true',
+                            help='Only report rounds whose stored totals disagree with their hole scores')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        checked, wrong = repair_round_totals(batch_size=options['batch_size'], fix=not options['check_only'])
+        if options['check_only']:
+            if wrong:
+                raise CommandError(f'{wrong} of {checked} rounds have stale totals')
+            self.stdout.write(self.style.SUCCESS(f'All {checked} rounds match their hole scores'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} rounds, repaired {wrong}'))
@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from golf_app.routers import stamp_heartbeat
+
+
+class Command(BaseCommand):
+    help = (
+        'Writes the replica heartbeat on the primary every REPLICA_HEARTBEAT_INTERVAL seconds; '
+        'replica lag is measured from its replicated copy'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Stamp once and exit, e.g. from cron')
+        parser.add_argument('--interval', type=float, default=None, help='Seconds between stamps')
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or settings.REPLICA_HEARTBEAT_INTERVAL
+        while True:
+            stamp_heartbeat()
+            if options['once']:
+                return
+            time.sleep(interval)
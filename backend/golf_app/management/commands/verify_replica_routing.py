@@ -0,0 +1,102 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.test import APIClient
+
+from golf_app.models import ChangeCounter, Course, Hole, HoleScore, Round, User
+from golf_app.routers import (
+    HEARTBEAT_COUNTER, REPLICA_DB_ALIAS, copy_sqlite_database, pinned_to_primary, reset_replica_health,
+)
+
+# Reads routed to the replica
+ANALYTICS_READS = [
+    '/api/leaderboard/',
+    '/api/leaderboard/me/',
+    '/api/rounds/leaderboard/',
+    '/api/rounds/suggest_club/',
+    '/api/courses/?search=replica',
+]
+
+
+def _counting(counts, alias):
+    def wrapper(execute, sql, params, many, context):
+        # The lag check's own heartbeat read isn't part of the request
+        if ChangeCounter._meta.db_table not in sql:
+            counts[alias] += 1
+        return execute(sql, params, many, context)
+    return wrapper
+
+
+class Command(BaseCommand):
+    help = (
+        'Checks read-replica routing against a primary and a replica SQLite file (REPLICA_DB_NAME): '
+        'analytics reads hit the replica, writers are pinned to the primary and a lagging replica is skipped'
+    )
+
+    def handle(self, *args, **options):
+        if REPLICA_DB_ALIAS not in settings.DATABASES:
+            raise CommandError('No replica database configured; set REPLICA_DB_NAME')
+        for alias in (DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS):
+            if settings.DATABASES[alias]['ENGINE'] != 'django.db.backends.sqlite3':
+                raise CommandError('This check keeps the replica in sync by copying SQLite files')
+
+        user, course = self._seed()
+        try:
+            copy_sqlite_database()
+            client = APIClient()
+            client.force_authenticate(user)
+
+            report = {'replicated': self._reads(client)}
+
+            response = client.post('/api/rounds/', {'course': course.pk}, format='json')
+            if response.status_code != 201 or not pinned_to_primary(user.pk):
+                raise CommandError(f'Write did not pin the user to the primary ({response.status_code})')
+            report['after_write'] = self._reads(client)
+
+            cache.delete(f'db-pin:{user.pk}')
+            stale = int((time.time() - settings.REPLICA_LAG_TOLERANCE - 60) * 1000)
+            ChangeCounter.objects.using(REPLICA_DB_ALIAS).filter(pk=HEARTBEAT_COUNTER).update(value=stale)
+            reset_replica_health()
+            report['lagging_replica'] = self._reads(client)
+        finally:
+            user.delete()
+            course.delete()
+            copy_sqlite_database()
+
+        failures = []
+        if any(counts[REPLICA_DB_ALIAS] == 0 for counts in report['replicated'].values()):
+            failures.append('analytics reads did not reach the replica')
+        for phase in ('after_write', 'lagging_replica'):
+            if any(counts[REPLICA_DB_ALIAS] for counts in report[phase].values()):
+                failures.append(f'{phase}: reads went to the replica')
+        self.stdout.write(json.dumps(report, indent=2))
+        if failures:
+            raise CommandError('; '.join(failures))
+        self.stdout.write(self.style.SUCCESS('Replica routing behaves as expected'))
+
+    def _seed(self):
+        user = User.objects.create_user(username='replica-check', password='unused')
+        course = Course.objects.create(name='Replica Links', city='Benchmark')
+        Hole.objects.bulk_create(Hole(course=course, hole_number=number, par=4) for number in range(1, 19))
+        for _ in range(3):
+            played = Round.objects.create(user=user, course=course, is_completed=True)
+            HoleScore.objects.bulk_create(
+                HoleScore(round=played, hole_number=number, score=5, putts=2) for number in range(1, 19)
+            )
+        return user, course
+
+    def _reads(self, client):
+        results = {}
+        for path in ANALYTICS_READS:
+            counts = {DEFAULT_DB_ALIAS: 0, REPLICA_DB_ALIAS: 0}
+            with connections[DEFAULT_DB_ALIAS].execute_wrapper(_counting(counts, DEFAULT_DB_ALIAS)), \
+                    connections[REPLICA_DB_ALIAS].execute_wrapper(_counting(counts, REPLICA_DB_ALIAS)):
+                response = client.get(path)
+            if response.status_code >= 500:
+                raise CommandError(f'{path} failed with {response.status_code}')
+            results[path] = counts
+        return results
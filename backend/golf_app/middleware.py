@@ -0,0 +1,22 @@
+from rest_framework.permissions import SAFE_METHODS
+
+from .routers import pin_to_primary
+
+
+class PinWritersToPrimaryMiddleware:
+    """
+    After a successful write, keep that user's reads on the primary for a
+    while so they never read their own change back from a lagging replica.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            # DRF copies the token-authenticated user onto the Django request
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user.pk)
+        return response
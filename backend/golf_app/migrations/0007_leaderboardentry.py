@@ -0,0 +1,50 @@
+# Generated by Django 4.2.22 on 2026-10-18 08:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_leaderboard(apps, schema_editor):
+    Round = apps.get_model('golf_app', 'Round')
+    LeaderboardEntry = apps.get_model('golf_app', 'LeaderboardEntry')
+    rows = Round.objects.values('user_id').annotate(
+        total_rounds=models.Count('id'),
+        scored_rounds=models.Count('total_score'),
+        total_score_sum=models.Sum('total_score'),
+    )
+    LeaderboardEntry.objects.bulk_create([
+        LeaderboardEntry(
+            user_id=row['user_id'],
+            total_rounds=row['total_rounds'],
+            scored_rounds=row['scored_rounds'],
+            total_score_sum=row['total_score_sum'] or 0,
+            average_score=row['total_score_sum'] / row['scored_rounds'] if row['scored_rounds'] else None,
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('golf_app', '0006_hole'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard_entry', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_rounds', models.PositiveIntegerField(default=0)),
+                ('scored_rounds', models.PositiveIntegerField(default=0)),
+                ('total_score_sum', models.IntegerField(default=0)),
+                ('average_score', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['average_score', 'user'], name='leaderboard_avg_idx'), models.Index(fields=['-total_rounds', 'user'], name='leaderboard_rounds_idx')],
+            },
+        ),
+        migrations.RunPython(populate_leaderboard, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.22 on 2026-10-18 08:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_score_buckets(apps, schema_editor):
+    # Daily buckets for every completed round; compact_score_buckets folds old ones into months
+    Round = apps.get_model('golf_app', 'Round')
+    ScoreBucket = apps.get_model('golf_app', 'ScoreBucket')
+    rows = Round.objects.filter(
+        is_completed=True, total_score__isnull=False
+    ).values('user_id', 'date').annotate(
+        rounds=models.Count('id'),
+        score_sum=models.Sum('total_score'),
+    )
+    ScoreBucket.objects.bulk_create([
+        ScoreBucket(
+            user_id=row['user_id'],
+            granularity='day',
+            period_start=row['date'],
+            rounds=row['rounds'],
+            score_sum=row['score_sum'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('golf_app', '0007_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('day', 'Day'), ('month', 'Month')], default='day', max_length=5)),
+                ('period_start', models.DateField()),
+                ('rounds', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_buckets', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['granularity', 'period_start'], name='scorebucket_period_idx')],
+                'unique_together': {('user', 'granularity', 'period_start')},
+            },
+        ),
+        migrations.RunPython(populate_score_buckets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.22 on 2026-10-18 08:44
+
+from django.db import migrations, models
+
+from golf_app.geo import geohash_for
+
+
+def populate_geohashes(apps, schema_editor):
+    for model_name in ('Course', 'DrivingRange'):
+        model = apps.get_model('golf_app', model_name)
+        rows = list(model.objects.filter(latitude__isnull=False, longitude__isnull=False))
+        for row in rows:
+            row.geohash = geohash_for(row.latitude, row.longitude)
+        model.objects.bulk_update(rows, ['geohash'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('golf_app', '0008_scorebucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='drivingrange',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.RunPython(populate_geohashes, migrations.RunPython.noop),
+    ]
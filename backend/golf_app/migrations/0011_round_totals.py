@@ -0,0 +1,93 @@
+# Generated by Django 4.2.22 on 2026-10-18 09:01
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def populate_round_totals(apps, schema_editor):
+    Round = apps.get_model('golf_app', 'Round')
+    HoleScore = apps.get_model('golf_app', 'HoleScore')
+    LeaderboardEntry = apps.get_model('golf_app', 'LeaderboardEntry')
+    ScoreBucket = apps.get_model('golf_app', 'ScoreBucket')
+
+    rows = HoleScore.objects.values('round_id').annotate(
+        total_score=models.Sum('score'),
+        total_putts=Coalesce(models.Sum('putts'), 0),
+        fairways_hit=models.Count('id', filter=models.Q(fairway_hit=True)),
+        sand_saves=models.Count('id', filter=models.Q(sand_save=True)),
+        holes_played=models.Count('id'),
+    )
+    Round.objects.bulk_update(
+        [Round(pk=row.pop('round_id'), **row) for row in rows],
+        ['total_score', 'total_putts', 'fairways_hit', 'sand_saves', 'holes_played'],
+        batch_size=1000,
+    )
+    # A round without hole scores has no total
+    Round.objects.filter(holes_played=0).update(total_score=None)
+
+    # total_score may have changed, so re-derive the leaderboards from it
+    LeaderboardEntry.objects.all().delete()
+    entries = Round.objects.values('user_id').annotate(
+        total_rounds=models.Count('id'),
+        scored_rounds=models.Count('total_score'),
+        total_score_sum=models.Sum('total_score'),
+    )
+    LeaderboardEntry.objects.bulk_create([
+        LeaderboardEntry(
+            user_id=row['user_id'],
+            total_rounds=row['total_rounds'],
+            scored_rounds=row['scored_rounds'],
+            total_score_sum=row['total_score_sum'] or 0,
+            average_score=row['total_score_sum'] / row['scored_rounds'] if row['scored_rounds'] else None,
+        )
+        for row in entries
+    ], batch_size=1000)
+
+    ScoreBucket.objects.all().delete()
+    buckets = Round.objects.filter(
+        is_completed=True, total_score__isnull=False
+    ).values('user_id', 'date').annotate(
+        rounds=models.Count('id'),
+        score_sum=models.Sum('total_score'),
+    )
+    ScoreBucket.objects.bulk_create([
+        ScoreBucket(
+            user_id=row['user_id'],
+            granularity='day',
+            period_start=row['date'],
+            rounds=row['rounds'],
+            score_sum=row['score_sum'],
+        )
+        for row in buckets
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('golf_app', '0010_course_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='round',
+            name='fairways_hit',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='round',
+            name='holes_played',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='round',
+            name='sand_saves',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='round',
+            name='total_putts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_round_totals, migrations.RunPython.noop),
+    ]
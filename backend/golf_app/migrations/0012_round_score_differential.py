@@ -0,0 +1,18 @@
+# Generated by Django 4.2.22 on 2026-10-18 09:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('golf_app', '0011_round_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='round',
+            name='score_differential',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.22 on 2026-10-18 09:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('golf_app', '0013_sync_change_sequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='friendship',
+            index=models.Index(fields=['user', 'created_at'], name='friendship_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='friendship',
+            index=models.Index(fields=['friend', 'user'], name='friendship_friend_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='round',
+            index=models.Index(fields=['user', 'date'], name='round_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userachievement',
+            index=models.Index(fields=['user', 'date_achieved'], name='userachievement_user_date_idx'),
+        ),
+    ]
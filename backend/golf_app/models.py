@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 import uuid
 
+from .geo import geohash_for
+
 class User(AbstractUser):
     is_pro = models.BooleanField(default=False)
     PREFERRED_HANDEDNESS_CHOICES = [
@@ -49,10 +51,16 @@ class Course(models.Model):
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     number_of_holes = models.IntegerField(default=18)
     par = models.IntegerField(null=True, blank=True) # Total par for the course
+    geohash = models.CharField(max_length=12, blank=True, null=True, db_index=True, editable=False)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Keep the spatial index cell in step with the coordinates
+        self.geohash = geohash_for(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+
 class Hole(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='holes')
     hole_number = models.PositiveIntegerField()
@@ -72,8 +80,33 @@ class Round(models.Model):
     course = models.ForeignKey(Course, on_delete=models.SET_NULL, null=True, blank=True, related_name='rounds')
     date = models.DateField(auto_now_add=True)
     total_score = models.IntegerField(null=True, blank=True)
+    # Running totals over the round's hole scores, kept in step by golf_app.scorecards
+    total_putts = models.PositiveIntegerField(default=0)
+    fairways_hit = models.PositiveIntegerField(default=0)
+    sand_saves = models.PositiveIntegerField(default=0)
+    holes_played = models.PositiveIntegerField(default=0)
+    # Handicap differential for a completed 18-hole round, kept by golf_app.handicaps
+    score_differential = models.FloatField(null=True, blank=True)
     is_completed = models.BooleanField(default=False)
     shareable_link = models.UUIDField(unique=True, blank=True, null=True)
+    # Position in the sync change sequence, moved on every write (golf_app.sync)
+    change_seq = models.BigIntegerField(default=0, editable=False)
+    # Set by offline clients on create, so a resent create finds the round it already made
+    client_id = models.CharField(max_length=64, blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'client_id'], name='round_user_client_id_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'change_seq'], name='round_user_change_seq_idx'),
+            models.Index(fields=['user', 'date'], name='round_user_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # One transaction, so the change sequence taken in pre_save commits in order
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.user.username}'s round at {self.course.name if self.course else 'Unknown Course'} on {self.date}"
@@ -132,10 +165,16 @@ class DrivingRange(models.Model):
     longitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
     phone_number = models.CharField(max_length=20, blank=True, null=True)
     website = models.URLField(blank=True, null=True)
+    geohash = models.CharField(max_length=12, blank=True, null=True, db_index=True, editable=False)
 
     def __str__(self):
         return f"{self.name} - {self.city}"
 
+    def save(self, *args, **kwargs):
+        # Keep the spatial index cell in step with the coordinates
+        self.geohash = geohash_for(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+
 class Achievement(models.Model):
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField()
@@ -155,6 +194,9 @@ class UserAchievement(models.Model):
     class Meta:
         unique_together = ('user', 'achievement')
         ordering = ['-date_achieved']
+        indexes = [
+            models.Index(fields=['user', 'date_achieved'], name='userachievement_user_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.achievement.name}"
@@ -167,14 +209,127 @@ class Friendship(models.Model):
     class Meta:
         unique_together = ('user', 'friend')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='friendship_user_created_idx'),
+            # Covers "who friended me" without touching the table
+            models.Index(fields=['friend', 'user'], name='friendship_friend_user_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} and {self.friend.username} are friends"
 
     def save(self, *args, **kwargs):
-        # Ensure we don't create duplicate friendships
-        if not Friendship.objects.filter(user=self.user, friend=self.friend).exists():
-            super().save(*args, **kwargs)
-            # Create the reverse friendship if it doesn't exist
-            if not Friendship.objects.filter(user=self.friend, friend=self.user).exists():
-                Friendship.objects.create(user=self.friend, friend=self.user) 
\ No newline at end of file
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        # A new friendship writes both directions at once, leaving existing edges alone
+        from .friends import befriend
+        self.pk, self.created_at = befriend(self.user_id, self.friend_id)
+        self._state.adding = False
+        self._state.db = Friendship.objects.db
+
+class LeaderboardEntry(models.Model):
+    # Materialized per-user round stats, kept current by deltas from Round signals
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='leaderboard_entry')
+    total_rounds = models.PositiveIntegerField(default=0)
+    scored_rounds = models.PositiveIntegerField(default=0)  # Rounds with a total_score
+    total_score_sum = models.IntegerField(default=0)
+    average_score = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['average_score', 'user'], name='leaderboard_avg_idx'),
+            models.Index(fields=['-total_rounds', 'user'], name='leaderboard_rounds_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}: {self.total_rounds} rounds, avg {self.average_score}"
+
+class ScoreBucket(models.Model):
+    # Per-user completed-round totals for one day or (once compacted) one month
+    DAY = 'day'
+    MONTH = 'month'
+    GRANULARITY_CHOICES = [
+        (DAY, 'Day'),
+        (MONTH, 'Month'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='score_buckets')
+    granularity = models.CharField(max_length=5, choices=GRANULARITY_CHOICES, default=DAY)
+    period_start = models.DateField()
+    rounds = models.PositiveIntegerField(default=0)
+    score_sum = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'granularity', 'period_start')
+        indexes = [
+            models.Index(fields=['granularity', 'period_start'], name='scorebucket_period_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} {self.granularity} {self.period_start}: {self.score_sum} over {self.rounds} rounds"
+
+class SearchTerm(models.Model):
+    # Vocabulary of the course search index
+    term = models.CharField(max_length=100, unique=True)
+    document_frequency = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.term} ({self.document_frequency})"
+
+class SearchTrigram(models.Model):
+    # Trigrams of each search term, for typo-tolerant matching
+    trigram = models.CharField(max_length=3)
+    term = models.ForeignKey(SearchTerm, on_delete=models.CASCADE, related_name='trigrams')
+
+    class Meta:
+        unique_together = ('trigram', 'term')
+
+    def __str__(self):
+        return f"{self.trigram} -> {self.term.term}"
+
+class CourseSearchPosting(models.Model):
+    # One row per (term, course); term_frequency is weighted by the field the term came from
+    term = models.ForeignKey(SearchTerm, on_delete=models.CASCADE, related_name='postings')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='search_postings')
+    term_frequency = models.PositiveIntegerField()
+    document_length = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('term', 'course')
+
+    def __str__(self):
+        return f"{self.term.term} in {self.course.name}"
+
+class ChangeCounter(models.Model):
+    # Named monotonic counters; updating the row holds it locked until commit
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+class SyncTombstone(models.Model):
+    # Deleted rounds and hole scores, so syncing clients can drop their copies
+    ROUND = 'round'
+    HOLE_SCORE = 'hole_score'
+    KIND_CHOICES = [
+        (ROUND, 'Round'),
+        (HOLE_SCORE, 'Hole score'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sync_tombstones')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    change_seq = models.BigIntegerField()
+    # Pruned after SYNC_TOMBSTONE_RETENTION_DAYS (golf_app.sync.prune_tombstones)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'change_seq'], name='tombstone_user_change_seq_idx'),
+            models.Index(fields=['created_at'], name='tombstone_created_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted at {self.change_seq}"
@@ -0,0 +1,9 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class CompactJSONRenderer(JSONRenderer):
+    """
+    JSON selected with ``?format=compact``. Views that support it check
+    ``request.accepted_renderer.format`` and send packed representations.
+    """
+    format = 'compact'
@@ -0,0 +1,145 @@
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+from .models import ChangeCounter
+
+REPLICA_DB_ALIAS = 'replica'
+HEARTBEAT_COUNTER = 'replica-heartbeat'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+_health = threading.local()
+
+
+class ReplicaRouter:
+    """
+    Sends reads made inside ``reading_from_replica()`` to the replica alias
+    while it is configured and within REPLICA_LAG_TOLERANCE; everything
+    else, and every write, goes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and replica_available():
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Never follow an instance that was read from the replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+@contextmanager
+def reading_from_replica():
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def _pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def pin_to_primary(user_id):
+    """Keep the user's reads on the primary until the replica has had time to catch up with their write."""
+    if replica_configured():
+        cache.set(_pin_key(user_id), True, settings.REPLICA_LAG_TOLERANCE + settings.REPLICA_CHECK_INTERVAL)
+
+
+def pinned_to_primary(user_id):
+    return user_id is not None and cache.get(_pin_key(user_id)) is not None
+
+
+def replica_reads(view_method):
+    """Run a read-only view method against the replica unless the user wrote recently."""
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if (not replica_configured() or request.method not in SAFE_METHODS
+                or pinned_to_primary(request.user.pk)):
+            return view_method(self, request, *args, **kwargs)
+        with reading_from_replica():
+            return view_method(self, request, *args, **kwargs)
+    return wrapper
+
+
+def stamp_heartbeat(alias=DEFAULT_DB_ALIAS):
+    """
+    Write the current time into the heartbeat row on the primary. Run it
+    every REPLICA_HEARTBEAT_INTERVAL seconds (``manage.py
+    stamp_replica_heartbeat``) so the replica's copy shows how far behind it is.
+    """
+    ChangeCounter.objects.using(alias).update_or_create(
+        name=HEARTBEAT_COUNTER, defaults={'value': int(time.time() * 1000)}
+    )
+
+
+def replication_lag():
+    """
+    Seconds the replica is behind, from the heartbeat it has replicated: a
+    read-only check that reads at most REPLICA_HEARTBEAT_INTERVAL high. If
+    the heartbeat writer stops, the lag keeps growing and reads fall back to
+    the primary. None if there is no heartbeat yet or the replica is
+    unreachable.
+    """
+    try:
+        replicated = (
+            ChangeCounter.objects.using(REPLICA_DB_ALIAS)
+            .filter(pk=HEARTBEAT_COUNTER).values_list('value', flat=True).first()
+        )
+    except DatabaseError:
+        return None
+    if replicated is None:
+        return None
+    return max(int(time.time() * 1000) - replicated, 0) / 1000
+
+
+def replica_available():
+    # Checked at most every REPLICA_CHECK_INTERVAL seconds per thread
+    if not replica_configured():
+        return False
+    now = time.monotonic()
+    if getattr(_health, 'checked_at', None) is None or now - _health.checked_at >= settings.REPLICA_CHECK_INTERVAL:
+        lag = replication_lag()
+        _health.available = lag is not None and lag <= settings.REPLICA_LAG_TOLERANCE
+        _health.checked_at = now
+    return _health.available
+
+
+def reset_replica_health():
+    _health.checked_at = None
+
+
+def copy_sqlite_database(source=DEFAULT_DB_ALIAS, target=REPLICA_DB_ALIAS):
+    """
+    Bring a SQLite replica file up to date with the primary using SQLite's
+    online backup. A stand-in for real replication when running locally
+    with two database files; the copy carries a fresh heartbeat, so lag is
+    measured from the moment of the copy.
+    """
+    stamp_heartbeat(source)
+    connections[target].close()
+    with closing(sqlite3.connect(settings.DATABASES[source]['NAME'])) as primary, \
+            closing(sqlite3.connect(settings.DATABASES[target]['NAME'])) as replica:
+        primary.backup(replica)
+    reset_replica_health()
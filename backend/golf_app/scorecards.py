@@ -0,0 +1,335 @@
+import base64
+import struct
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import achievements, handicaps, leaderboards
+from .sync import next_change_seq, stamp_round
+from .leaderboards import TRACKED_ROUND_FIELDS
+from .models import Hole, HoleScore, Round
+from .sharing import invalidate_shared_rounds
+
+SCORE_FIELDS = ('score', 'putts', 'fairway_hit', 'sand_save')
+
+# HoleScore fields the round totals are derived from
+TRACKED_HOLE_FIELDS = ('round_id',) + SCORE_FIELDS
+
+# Round columns kept in step with the round's hole scores
+ROUND_TOTAL_FIELDS = ('total_score', 'total_putts', 'fairways_hit', 'sand_saves', 'holes_played')
+
+# Largest scorecard accepted in one bulk request
+MAX_SCORECARD_ENTRIES = 36
+
+# Packed scorecard layouts: version byte -> (per-hole struct, "no putts" marker).
+# Each hole is (hole_number, score, putts, flags) with flags bit 0 = fairway
+# hit and bit 1 = sand save. The narrowest layout that fits is used; rounds
+# that fit none are sent unpacked.
+_PACKED_FORMATS = {
+    1: (struct.Struct('>BBBB'), 0xFF),
+    2: (struct.Struct('>HhhB'), -0x8000),
+}
+_FAIRWAY_HIT = 1
+_SAND_SAVE = 2
+
+
+def save_scorecard(round, entries):
+    """
+    Upsert the hole scores of ``round`` from validated ``entries`` (dicts with
+    ``hole_number`` plus any of SCORE_FIELDS) in one transaction.
+
+    Hole numbers are checked against the course with a single query and the
+    existing scores are loaded with another; the writes are one bulk_create
+    and one bulk_update. Returns a result per entry, in input order, with a
+    status of created, updated, unchanged or error.
+    """
+    numbers = [entry['hole_number'] for entry in entries]
+    course_holes = set(
+        Hole.objects.filter(course_id=round.course_id, hole_number__in=numbers).values_list('hole_number', flat=True)
+    )
+
+    results = []
+    seen = set()
+    to_create = []
+    to_update = []
+    update_fields = set()
+    delta = Counter()
+    now = timezone.now()
+
+    with transaction.atomic():
+        existing = {
+            hole_score.hole_number: hole_score
+            for hole_score in HoleScore.objects.select_for_update().filter(round=round, hole_number__in=numbers)
+        }
+        for entry in entries:
+            hole_number = entry['hole_number']
+            result = {'hole_number': hole_number}
+            results.append(result)
+            if hole_number in seen:
+                result.update(status='error', errors={'hole_number': ['Hole number appears more than once.']})
+                continue
+            seen.add(hole_number)
+            if hole_number not in course_holes:
+                result.update(
+                    status='error',
+                    errors={'hole_number': [f'Hole number {hole_number} does not exist in this course']},
+                )
+                continue
+
+            values = {field: entry[field] for field in SCORE_FIELDS if field in entry}
+            hole_score = existing.get(hole_number)
+            if hole_score is None:
+                hole_score = HoleScore(round=round, hole_number=hole_number, **values)
+                to_create.append(hole_score)
+                delta.update(hole_contribution(_state(hole_score)))
+                result['status'] = 'created'
+            else:
+                changed = [field for field, value in values.items() if getattr(hole_score, field) != value]
+                if not changed:
+                    result['status'] = 'unchanged'
+                else:
+                    delta.subtract(hole_contribution(_state(hole_score)))
+                    for field in changed:
+                        setattr(hole_score, field, values[field])
+                    delta.update(hole_contribution(_state(hole_score)))
+                    hole_score.updated_at = now
+                    update_fields.update(changed)
+                    to_update.append(hole_score)
+                    result['status'] = 'updated'
+            result['hole_score'] = hole_score
+
+        if to_create:
+            HoleScore.objects.bulk_create(to_create)
+        if to_update:
+            HoleScore.objects.bulk_update(to_update, sorted(update_fields) + ['updated_at'])
+        # Bulk writes skip the HoleScore signals, so apply the totals here
+        totals = apply_round_totals_delta(round.pk, delta)
+        if totals is None and to_update:
+            # e.g. putts None -> 0: no change to the totals, but sync still has to see it
+            stamp_round(round.pk, user_id=round.user_id)
+        refresh_round(round, totals)
+
+    return results
+
+
+def _state(hole_score):
+    return {field: getattr(hole_score, field) for field in TRACKED_HOLE_FIELDS}
+
+
+def hole_contribution(state):
+    """What one hole score adds to its round's totals."""
+    return {
+        'total_score': state['score'],
+        'total_putts': state['putts'] or 0,
+        'fairways_hit': int(state['fairway_hit']),
+        'sand_saves': int(state['sand_save']),
+        'holes_played': 1,
+    }
+
+
+def apply_round_totals_delta(round_id, delta):
+    """
+    Add ``delta`` to a round's totals in a single UPDATE and move the round's
+    leaderboard contribution along with its total_score. ``total_score`` goes
+    back to None once the round has no holes left. Achievements and the
+    handicap are only looked at again for the totals that moved. Returns the
+    new totals, or None if nothing changed.
+    """
+    if not any(delta.values()):
+        return None
+    holes = delta.get('holes_played', 0)
+    score = delta.get('total_score', 0)
+    changes = {
+        field: F(field) + delta[field]
+        for field in ROUND_TOTAL_FIELDS
+        if field != 'total_score' and delta.get(field)
+    }
+    changes['total_score'] = Case(
+        When(holes_played=-holes, then=Value(None)),
+        default=Coalesce(F('total_score'), 0) + score,
+    )
+
+    with transaction.atomic():
+        # The row is locked from here, so the new totals are worked out rather than read back
+        old_state = Round.objects.select_for_update().filter(pk=round_id).values(
+            *TRACKED_ROUND_FIELDS, *ROUND_TOTAL_FIELDS, 'shareable_link'
+        ).first()
+        if old_state is None:
+            return None
+        new_state = dict(old_state)
+        for field in ROUND_TOTAL_FIELDS:
+            if field != 'total_score':
+                new_state[field] += delta.get(field, 0)
+        new_state['total_score'] = None if new_state['holes_played'] == 0 else (old_state['total_score'] or 0) + score
+        changes['change_seq'] = next_change_seq(old_state['user_id'])
+        Round.objects.filter(pk=round_id).update(**changes)
+
+        leaderboards.apply_round_change(
+            old_state['user_id'], old_state['total_score'], new_state['user_id'], new_state['total_score']
+        )
+        leaderboards.apply_bucket_change(old_state, new_state)
+        if old_state['total_score'] != new_state['total_score']:
+            invalidate_shared_rounds([new_state['shareable_link']])
+        # Scores entered after the round was marked complete can still earn awards
+        changed = {field for field in ROUND_TOTAL_FIELDS if delta.get(field)}
+        if holes:
+            # Crossing a full round decides whether score and putts count at all
+            changed |= {'total_score', 'total_putts'}
+        achievements.evaluate_round(new_state, changed=changed)
+        if new_state['is_completed'] and (score or holes):
+            handicaps.update_round(round_id)
+    return {field: new_state[field] for field in ROUND_TOTAL_FIELDS}
+
+
+def apply_hole_score_change(old_state, new_state):
+    """
+    Move a hole score's contribution between round totals. Returns
+    ``{round_id: totals}`` for each round whose totals changed.
+    """
+    deltas = defaultdict(Counter)
+    if old_state is not None:
+        deltas[old_state['round_id']].subtract(hole_contribution(old_state))
+    if new_state is not None:
+        deltas[new_state['round_id']].update(hole_contribution(new_state))
+
+    totals = {}
+    for round_id, delta in deltas.items():
+        new_totals = apply_round_totals_delta(round_id, delta)
+        if new_totals is not None:
+            totals[round_id] = new_totals
+    return totals
+
+
+def refresh_round(round, totals):
+    """Copy freshly written totals onto an in-memory Round."""
+    if not totals:
+        return
+    for field, value in totals.items():
+        setattr(round, field, value)
+    if getattr(round, '_tracked_state', None) is not None:
+        round._tracked_state['total_score'] = totals['total_score']
+
+
+def live_round_totals(round_ids):
+    """Round totals recomputed from the hole scores, as ``{round_id: totals}``."""
+    rows = HoleScore.objects.filter(round_id__in=round_ids).values('round_id').annotate(
+        total_score=Sum('score'),
+        total_putts=Coalesce(Sum('putts'), 0),
+        fairways_hit=Count('id', filter=Q(fairway_hit=True)),
+        sand_saves=Count('id', filter=Q(sand_save=True)),
+        holes_played=Count('id'),
+    )
+    totals = {round_id: dict.fromkeys(ROUND_TOTAL_FIELDS, 0) | {'total_score': None} for round_id in round_ids}
+    for row in rows:
+        totals[row.pop('round_id')] = row
+    return totals
+
+
+def repair_round_totals(batch_size=1000, fix=True):
+    """
+    Walk every round in primary-key chunks and compare its stored totals with
+    its hole scores. With ``fix``, wrong rows are rewritten and the
+    leaderboards adjusted. Returns ``(rounds_checked, rounds_wrong)``.
+    """
+    checked = wrong = 0
+    last_id = 0
+    while True:
+        rounds = list(
+            Round.objects.filter(pk__gt=last_id).order_by('pk')
+            .values('pk', *TRACKED_ROUND_FIELDS, *ROUND_TOTAL_FIELDS, 'shareable_link')[:batch_size]
+        )
+        if not rounds:
+            return checked, wrong
+        last_id = rounds[-1]['pk']
+        checked += len(rounds)
+        live = live_round_totals([row['pk'] for row in rounds])
+        stale = [row for row in rounds if any(row[field] != live[row['pk']][field] for field in ROUND_TOTAL_FIELDS)]
+        wrong += len(stale)
+        if not fix or not stale:
+            continue
+
+        with transaction.atomic():
+            # One sequence number per user covers all of their repaired rounds
+            change_seqs = {user_id: next_change_seq(user_id) for user_id in {row['user_id'] for row in stale}}
+            Round.objects.bulk_update(
+                [Round(pk=row['pk'], change_seq=change_seqs[row['user_id']], **live[row['pk']]) for row in stale],
+                list(ROUND_TOTAL_FIELDS) + ['change_seq'],
+                batch_size=batch_size,
+            )
+            for row in stale:
+                new_state = dict(row, **live[row['pk']])
+                leaderboards.apply_round_change(
+                    row['user_id'], row['total_score'], row['user_id'], new_state['total_score']
+                )
+                leaderboards.apply_bucket_change(row, new_state)
+            invalidate_shared_rounds([row['shareable_link'] for row in stale])
+
+
+def _pack_layout(version, holes):
+    # struct.error if a value doesn't fit the layout or collides with its "no putts" marker
+    layout, no_putts = _PACKED_FORMATS[version]
+    packed = bytearray([version])
+    for hole in holes:
+        if hole['putts'] == no_putts:
+            raise struct.error('putts collide with the no-putts marker')
+        flags = (_FAIRWAY_HIT if hole['fairway_hit'] else 0) | (_SAND_SAVE if hole['sand_save'] else 0)
+        putts = no_putts if hole['putts'] is None else hole['putts']
+        packed += layout.pack(hole['hole_number'], hole['score'], putts, flags)
+    return bytes(packed)
+
+
+def pack_scorecard(hole_scores):
+    """
+    Encode hole scores (dicts or objects with hole_number, score, putts,
+    fairway_hit and sand_save) as a compact base64 string, 4 bytes per hole
+    where every value fits a byte. Raises ValueError if some value fits no
+    layout.
+    """
+    holes = [
+        hole if isinstance(hole, dict) else {field: getattr(hole, field) for field in ('hole_number',) + SCORE_FIELDS}
+        for hole in hole_scores
+    ]
+    for version in sorted(_PACKED_FORMATS):
+        try:
+            return base64.b64encode(_pack_layout(version, holes)).decode('ascii')
+        except struct.error:
+            continue
+    raise ValueError('Scorecard values fit no packed layout')
+
+
+def unpack_scorecard(packed):
+    """Decode ``pack_scorecard`` output back into a list of hole score dicts."""
+    data = base64.b64decode(packed)
+    if not data or data[0] not in _PACKED_FORMATS:
+        raise ValueError('Unknown packed scorecard format')
+    layout, no_putts = _PACKED_FORMATS[data[0]]
+    if (len(data) - 1) % layout.size:
+        raise ValueError('Truncated packed scorecard')
+    return [
+        {
+            'hole_number': hole_number,
+            'score': score,
+            'putts': None if putts == no_putts else putts,
+            'fairway_hit': bool(flags & _FAIRWAY_HIT),
+            'sand_save': bool(flags & _SAND_SAVE),
+        }
+        for hole_number, score, putts, flags in layout.iter_unpack(data[1:])
+    ]
+
+
+def compact_round(data):
+    """
+    A serialized round with its nested hole_scores replaced by a packed
+    ``scorecard``. A round whose values fit no layout keeps its plain
+    ``hole_scores`` list.
+    """
+    data = dict(data)
+    try:
+        data['scorecard'] = pack_scorecard(data['hole_scores'])
+    except ValueError:
+        return data
+    del data['hole_scores']
+    return data
@@ -0,0 +1,278 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Max, Sum, Value, When
+
+# Weight of a term occurrence by the field it was found in
+FIELD_WEIGHTS = {'name': 3, 'city': 2, 'state': 1, 'address': 1}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.75
+FUZZY_WEIGHT = 0.6
+MAX_PREFIX_EXPANSIONS = 50
+MAX_FUZZY_EXPANSIONS = 10
+MIN_FUZZY_SIMILARITY = 0.35
+# Tokens in more than this share of courses (and at least MIN_COMMON_TERM_DOCUMENTS
+# of them) are too common to filter or rank on
+COMMON_TERM_RATIO = 0.25
+MIN_COMMON_TERM_DOCUMENTS = 1000
+
+_STATS_KEY = 'course-search:stats'
+_STATS_TTL = 600
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Lowercased, accent-stripped alphanumeric tokens of ``text``."""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return [token[:100] for token in _TOKEN_RE.findall(text.lower())]
+
+
+def trigrams(term):
+    padded = f'  {term} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def course_term_frequencies(course):
+    frequencies = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(getattr(course, field)):
+            frequencies[token] += weight
+    return frequencies
+
+
+def _models(apps):
+    return (
+        apps.get_model('golf_app', 'SearchTerm'),
+        apps.get_model('golf_app', 'SearchTrigram'),
+        apps.get_model('golf_app', 'CourseSearchPosting'),
+    )
+
+
+def _ensure_terms(terms, apps=django_apps):
+    """Return ``{term: id}``, creating missing terms along with their trigrams."""
+    SearchTerm, SearchTrigram, _ = _models(apps)
+    existing = dict(SearchTerm.objects.filter(term__in=terms).values_list('term', 'id'))
+    missing = [term for term in terms if term not in existing]
+    if missing:
+        SearchTerm.objects.bulk_create(
+            [SearchTerm(term=term) for term in missing], batch_size=1000, ignore_conflicts=True
+        )
+        created = dict(SearchTerm.objects.filter(term__in=missing).values_list('term', 'id'))
+        SearchTrigram.objects.bulk_create(
+            [
+                SearchTrigram(trigram=trigram, term_id=term_id)
+                for term, term_id in created.items()
+                for trigram in trigrams(term)
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        existing.update(created)
+    return existing
+
+
+def index_course(course):
+    """Bring the index entries for one course in line with its current fields."""
+    SearchTerm, _, CourseSearchPosting = _models(django_apps)
+    frequencies = course_term_frequencies(course)
+    document_length = sum(frequencies.values())
+
+    with transaction.atomic():
+        old_term_ids = set(
+            CourseSearchPosting.objects.filter(course_id=course.pk).values_list('term_id', flat=True)
+        )
+        term_ids = _ensure_terms(list(frequencies))
+        new_term_ids = set(term_ids.values())
+
+        SearchTerm.objects.filter(id__in=old_term_ids - new_term_ids).update(
+            document_frequency=F('document_frequency') - 1
+        )
+        SearchTerm.objects.filter(id__in=new_term_ids - old_term_ids).update(
+            document_frequency=F('document_frequency') + 1
+        )
+        CourseSearchPosting.objects.filter(course_id=course.pk).delete()
+        CourseSearchPosting.objects.bulk_create([
+            CourseSearchPosting(
+                term_id=term_ids[term], course_id=course.pk,
+                term_frequency=frequency, document_length=document_length,
+            )
+            for term, frequency in frequencies.items()
+        ])
+    cache.delete(_STATS_KEY)
+
+
+def unindex_course(course):
+    """Release a course's terms before its postings are cascade-deleted."""
+    SearchTerm, _, CourseSearchPosting = _models(django_apps)
+    term_ids = CourseSearchPosting.objects.filter(course_id=course.pk).values_list('term_id', flat=True)
+    SearchTerm.objects.filter(id__in=list(term_ids)).update(document_frequency=F('document_frequency') - 1)
+    cache.delete(_STATS_KEY)
+
+
+def rebuild_search_index(apps=django_apps, batch_size=2000):
+    """Rebuild the whole index from the Course table. Returns the number of courses indexed."""
+    Course = apps.get_model('golf_app', 'Course')
+    SearchTerm, SearchTrigram, CourseSearchPosting = _models(apps)
+
+    documents = {}
+    document_frequency = Counter()
+    for course in Course.objects.only(*FIELD_WEIGHTS).iterator(chunk_size=batch_size):
+        frequencies = course_term_frequencies(course)
+        documents[course.pk] = frequencies
+        document_frequency.update(frequencies.keys())
+
+    with transaction.atomic():
+        CourseSearchPosting.objects.all().delete()
+        SearchTrigram.objects.all().delete()
+        SearchTerm.objects.all().delete()
+        SearchTerm.objects.bulk_create(
+            [SearchTerm(term=term, document_frequency=df) for term, df in document_frequency.items()],
+            batch_size=batch_size,
+        )
+        term_ids = dict(SearchTerm.objects.values_list('term', 'id'))
+        SearchTrigram.objects.bulk_create(
+            (
+                SearchTrigram(trigram=trigram, term_id=term_id)
+                for term, term_id in term_ids.items()
+                for trigram in trigrams(term)
+            ),
+            batch_size=batch_size,
+        )
+        CourseSearchPosting.objects.bulk_create(
+            (
+                CourseSearchPosting(
+                    term_id=term_ids[term], course_id=course_id,
+                    term_frequency=frequency, document_length=sum(frequencies.values()),
+                )
+                for course_id, frequencies in documents.items()
+                for term, frequency in frequencies.items()
+            ),
+            batch_size=batch_size,
+        )
+    cache.delete(_STATS_KEY)
+    return len(documents)
+
+
+def index_stats():
+    """(document count, average document length), cached between index updates."""
+    stats = cache.get(_STATS_KEY)
+    if stats is None:
+        Course = django_apps.get_model('golf_app', 'Course')
+        _, _, CourseSearchPosting = _models(django_apps)
+        documents = Course.objects.count()
+        total_length = CourseSearchPosting.objects.aggregate(total=Sum('term_frequency'))['total'] or 0
+        stats = (documents, total_length / documents if documents else 1.0)
+        cache.set(_STATS_KEY, stats, _STATS_TTL)
+    return stats
+
+
+def expand_token(token):
+    """
+    Index terms a query token matches, as ``{term_id: (weight, document_frequency)}``.
+    Exact and prefix matches come first; a token with neither falls back to
+    terms that share enough trigrams with it.
+    """
+    SearchTerm, SearchTrigram, _ = _models(django_apps)
+    expansions = {}
+    if len(token) > 1:
+        matches = SearchTerm.objects.filter(term__gte=token, term__lt=token + '{')
+    else:
+        matches = SearchTerm.objects.filter(term=token)
+    matches = matches.filter(document_frequency__gt=0).order_by(
+        Case(When(term=token, then=Value(0)), default=Value(1)), '-document_frequency'
+    )
+    for term_id, term, df in matches.values_list('id', 'term', 'document_frequency')[:MAX_PREFIX_EXPANSIONS]:
+        expansions[term_id] = (EXACT_WEIGHT if term == token else PREFIX_WEIGHT, df)
+    if expansions or len(token) < 3:
+        return expansions
+
+    token_trigrams = trigrams(token)
+    candidates = SearchTrigram.objects.filter(
+        trigram__in=token_trigrams, term__document_frequency__gt=0
+    ).values('term_id', 'term__term', 'term__document_frequency').annotate(
+        shared=Count('id')
+    ).order_by('-shared')[:MAX_FUZZY_EXPANSIONS * 5]
+    scored = []
+    for row in candidates:
+        term_trigram_count = len(trigrams(row['term__term']))
+        similarity = row['shared'] / (len(token_trigrams) + term_trigram_count - row['shared'])
+        if similarity >= MIN_FUZZY_SIMILARITY:
+            scored.append((similarity, row['term_id'], row['term__document_frequency']))
+    for similarity, term_id, df in sorted(scored, reverse=True)[:MAX_FUZZY_EXPANSIONS]:
+        expansions[term_id] = (FUZZY_WEIGHT * similarity, df)
+    return expansions
+
+
+def search_course_ids(query, limit=100):
+    """
+    Course ids matching every selective token of ``query``, best BM25 score
+    first. Scoring runs as one grouped query over the postings of the
+    matched terms, restricted to courses that contain the rarest token.
+    Tokens found in most of the catalog (like "golf") carry almost no
+    weight and are dropped, unless nothing more selective is left.
+    """
+    _, _, CourseSearchPosting = _models(django_apps)
+    tokens = list(dict.fromkeys(tokenize(query)))
+    if not tokens:
+        return []
+
+    documents, average_length = index_stats()
+    token_terms = []
+    for token in tokens:
+        expansions = expand_token(token)
+        if not expansions:
+            return []
+        token_terms.append((sum(df for _, df in expansions.values()), expansions))
+    token_terms.sort(key=lambda item: item[0])
+    common_threshold = max(COMMON_TERM_RATIO * documents, MIN_COMMON_TERM_DOCUMENTS)
+    selective = [item for item in token_terms if item[0] <= common_threshold]
+    token_terms = [expansions for _, expansions in (selective or token_terms[:1])]
+
+    term_weights = {}
+    for expansions in token_terms:
+        for term_id, (weight, df) in expansions.items():
+            idf = math.log(1 + (documents - df + 0.5) / (df + 0.5))
+            term_weights[term_id] = max(term_weights.get(term_id, 0.0), weight * idf)
+
+    term_weight = Case(
+        *[When(term_id=term_id, then=Value(weight)) for term_id, weight in term_weights.items()],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    saturation = (
+        F('term_frequency') * Value(K1 + 1) /
+        (F('term_frequency') + Value(K1 * (1 - B)) + F('document_length') * Value(K1 * B / average_length))
+    )
+
+    postings = CourseSearchPosting.objects.filter(term_id__in=list(term_weights))
+    if len(token_terms) > 1:
+        postings = postings.filter(course_id__in=CourseSearchPosting.objects.filter(
+            term_id__in=list(token_terms[0])
+        ).values('course_id'))
+        postings = postings.values('course_id').annotate(
+            matched=sum(
+                Max(Case(When(term_id__in=list(expansions), then=Value(1)), default=Value(0)))
+                for expansions in token_terms
+            )
+        ).filter(matched=len(token_terms))
+    else:
+        postings = postings.values('course_id')
+
+    rows = postings.annotate(
+        score=Sum(term_weight * saturation, output_field=FloatField()),
+    ).order_by('-score', 'course_id')[:limit]
+    return [row['course_id'] for row in rows]
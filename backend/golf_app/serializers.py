@@ -1,6 +1,8 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from .models import Club, Course, Round, HoleScore, DrivingRange, Achievement, UserAchievement, PracticeTip, Friendship
+from .scorecards import MAX_SCORECARD_ENTRIES
 
 User = get_user_model()
 
@@ -29,9 +31,13 @@ class ClubSerializer(serializers.ModelSerializer):
         read_only_fields = ('user',)
 
 class CourseSerializer(serializers.ModelSerializer):
+    # Only present on nearest-course results
+    distance_km = serializers.FloatField(read_only=True)
+
     class Meta:
         model = Course
-        fields = ('id', 'name', 'address', 'city', 'state', 'latitude', 'longitude', 'number_of_holes', 'par')
+        fields = ('id', 'name', 'address', 'city', 'state', 'latitude', 'longitude', 'number_of_holes', 'par',
+                  'distance_km')
 
 class HoleScoreSerializer(serializers.ModelSerializer):
     class Meta:
@@ -39,18 +45,70 @@ class HoleScoreSerializer(serializers.ModelSerializer):
         fields = ('id', 'round', 'hole_number', 'score', 'putts', 'fairway_hit', 'sand_save')
         read_only_fields = ('round',)
 
+class ScorecardSerializer(serializers.Serializer):
+    """A full or partial scorecard for one round, upserted by hole number."""
+    round = serializers.PrimaryKeyRelatedField(queryset=Round.objects.all())
+    hole_scores = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=MAX_SCORECARD_ENTRIES
+    )
+
 class RoundSerializer(serializers.ModelSerializer):
     hole_scores = HoleScoreSerializer(many=True, read_only=True)
 
     class Meta:
         model = Round
-        fields = ('id', 'user', 'course', 'date', 'total_score', 'hole_scores')
-        read_only_fields = ('user', 'total_score', 'date')
+        fields = ('id', 'user', 'course', 'date', 'total_score', 'total_putts', 'fairways_hit', 'sand_saves',
+                  'holes_played', 'hole_scores')
+        read_only_fields = ('user', 'total_score', 'total_putts', 'fairways_hit', 'sand_saves', 'holes_played', 'date')
+
+class SyncRoundSerializer(serializers.ModelSerializer):
+    """A round as the sync endpoint reads and writes it; hole scores travel separately."""
+    class Meta:
+        model = Round
+        fields = ('id', 'client_id', 'user', 'course', 'date', 'is_completed', 'total_score', 'total_putts',
+                  'fairways_hit', 'sand_saves', 'holes_played', 'change_seq')
+        read_only_fields = ('user', 'date', 'total_score', 'total_putts', 'fairways_hit', 'sand_saves',
+                            'holes_played', 'change_seq')
+
+class SyncMutationSerializer(serializers.Serializer):
+    """One queued client change: a round upsert or delete, a scorecard upsert or a hole score delete."""
+    OPS = ('save_round', 'delete_round', 'save_hole_scores', 'delete_hole_score')
+
+    op = serializers.ChoiceField(choices=OPS)
+    id = serializers.IntegerField(required=False)
+    client_id = serializers.CharField(required=False, max_length=64)
+    data = serializers.DictField(required=False, default=dict)
+    round = serializers.IntegerField(required=False)
+    round_client_id = serializers.CharField(required=False, max_length=64)
+    hole_scores = serializers.ListField(
+        child=serializers.DictField(), required=False, allow_empty=False, max_length=MAX_SCORECARD_ENTRIES
+    )
+
+    def validate(self, attrs):
+        op = attrs['op']
+        if op in ('delete_round', 'delete_hole_score') and 'id' not in attrs:
+            raise serializers.ValidationError({'id': 'This field is required.'})
+        if op == 'save_hole_scores':
+            if 'round' not in attrs and 'round_client_id' not in attrs:
+                raise serializers.ValidationError({'round': 'Give round or round_client_id.'})
+            if 'hole_scores' not in attrs:
+                raise serializers.ValidationError({'hole_scores': 'This field is required.'})
+        return attrs
+
+class SyncSerializer(serializers.Serializer):
+    token = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    mutations = serializers.ListField(
+        child=serializers.DictField(), required=False, default=list, max_length=settings.SYNC_MAX_MUTATIONS
+    )
 
 class DrivingRangeSerializer(serializers.ModelSerializer):
+    # Only present on nearest-range results
+    distance_km = serializers.FloatField(read_only=True)
+
     class Meta:
         model = DrivingRange
-        fields = ('id', 'name', 'address', 'city', 'state', 'latitude', 'longitude', 'phone_number', 'website')
+        fields = ('id', 'name', 'address', 'city', 'state', 'latitude', 'longitude', 'phone_number', 'website',
+                  'distance_km')
 
 class AchievementSerializer(serializers.ModelSerializer):
     class Meta:
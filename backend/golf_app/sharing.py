@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .cache import cross_worker_ttl
+from .models import Round
+
+
+def _shared_round_key(shareable_link):
+    return f'shared-round:{shareable_link}'
+
+
+def cached_shared_round(shareable_link):
+    return cache.get(_shared_round_key(shareable_link))
+
+
+def cache_shared_round(shareable_link, payload):
+    # Edits and unsharing only reach other workers through a shared cache
+    cache.set(_shared_round_key(shareable_link), payload, cross_worker_ttl(settings.SHARED_ROUND_CACHE_TTL))
+
+
+def invalidate_shared_rounds(shareable_links):
+    # Drop after commit so a concurrent reader can't re-cache the old payload
+    keys = [_shared_round_key(link) for link in shareable_links if link]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_shared_rounds_for(**filters):
+    """Invalidate every shared round matching ``filters``, e.g. ``course_id=3``."""
+    invalidate_shared_rounds(
+        Round.objects.filter(shareable_link__isnull=False, **filters).values_list('shareable_link', flat=True)
+    )
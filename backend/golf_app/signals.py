@@ -0,0 +1,202 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import achievements, handicaps, leaderboards, scorecards, search, sync, versions
+from .authentication import invalidate_cached_user
+from .sharing import invalidate_shared_rounds, invalidate_shared_rounds_for
+from .friends import invalidate_friend_graph
+from .leaderboards import TRACKED_ROUND_FIELDS
+from .models import (
+    Achievement, Course, DrivingRange, Friendship, HoleScore, PracticeTip, Round, SyncTombstone, User,
+)
+from .user_search import username_index
+
+
+def _round_state(instance):
+    # Only trust fields that were actually loaded; deferred ones are unknown
+    if all(field in instance.__dict__ for field in TRACKED_ROUND_FIELDS):
+        return {field: instance.__dict__[field] for field in TRACKED_ROUND_FIELDS}
+    return None
+
+
+@receiver(post_init, sender=Round)
+def remember_round_state(sender, instance, **kwargs):
+    instance._tracked_state = _round_state(instance) if instance.pk else None
+
+
+@receiver(pre_save, sender=Round)
+def load_round_state(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk or instance._tracked_state is not None:
+        return
+    instance._tracked_state = Round.objects.filter(pk=instance.pk).values(*TRACKED_ROUND_FIELDS).first()
+
+
+@receiver(pre_save, sender=Round)
+def stamp_round_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.change_seq = sync.next_change_seq(instance.user_id)
+
+
+@receiver(post_save, sender=Round)
+def update_leaderboards_on_round_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_state = None if created else instance._tracked_state
+    new_state = _round_state(instance)
+    leaderboards.apply_round_change(
+        old_state['user_id'] if old_state else None,
+        old_state['total_score'] if old_state else None,
+        instance.user_id,
+        instance.total_score,
+    )
+    leaderboards.apply_bucket_change(old_state, new_state)
+    if instance.is_completed and not (old_state and old_state['is_completed']):
+        achievements.evaluate_round(
+            {field: getattr(instance, field) for field in TRACKED_ROUND_FIELDS + scorecards.ROUND_TOTAL_FIELDS}
+        )
+    if instance.is_completed or (old_state and old_state['is_completed']):
+        # Written with update(), so keep the instance from saving back a stale value
+        instance.score_differential = handicaps.update_round(instance.pk)
+    invalidate_shared_rounds([instance.shareable_link])
+    instance._tracked_state = new_state
+
+
+@receiver(post_delete, sender=Round)
+def update_leaderboards_on_round_delete(sender, instance, origin=None, **kwargs):
+    old_state = instance._tracked_state or _round_state(instance)
+    if old_state is None:
+        return
+    # Deleting the user takes everything they could sync with it
+    if isinstance(origin, Round) or getattr(origin, 'model', None) is Round:
+        sync.record_deletion(old_state['user_id'], SyncTombstone.ROUND, instance.pk)
+    leaderboards.apply_round_change(old_state['user_id'], old_state['total_score'], None, None)
+    leaderboards.apply_bucket_change(old_state, None)
+    if old_state['is_completed']:
+        handicaps.refresh_user(old_state['user_id'])
+    invalidate_shared_rounds([instance.shareable_link])
+
+
+def _hole_state(instance):
+    if all(field in instance.__dict__ for field in scorecards.TRACKED_HOLE_FIELDS):
+        return {field: instance.__dict__[field] for field in scorecards.TRACKED_HOLE_FIELDS}
+    return None
+
+
+def _refresh_cached_round(instance, totals):
+    # Keep an already-loaded round in step, so saving it later can't write back stale totals
+    if totals and HoleScore.round.is_cached(instance) and instance.round is not None:
+        scorecards.refresh_round(instance.round, totals.get(instance.round_id))
+
+
+@receiver(post_init, sender=HoleScore)
+def remember_hole_state(sender, instance, **kwargs):
+    instance._tracked_state = _hole_state(instance) if instance.pk else None
+
+
+@receiver(pre_save, sender=HoleScore)
+def load_hole_state(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk or instance._tracked_state is not None:
+        return
+    instance._tracked_state = HoleScore.objects.filter(pk=instance.pk).values(*scorecards.TRACKED_HOLE_FIELDS).first()
+
+
+@receiver(post_save, sender=HoleScore)
+def update_round_totals_on_hole_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    new_state = _hole_state(instance)
+    totals = scorecards.apply_hole_score_change(None if created else instance._tracked_state, new_state)
+    if instance.round_id not in totals:
+        # The totals didn't move (e.g. a renumbered hole), but sync still has to see the edit
+        sync.stamp_round(instance.round_id)
+    _refresh_cached_round(instance, totals)
+    instance._tracked_state = new_state
+
+
+@receiver(post_delete, sender=HoleScore)
+def update_round_totals_on_hole_delete(sender, instance, origin=None, **kwargs):
+    # A cascade from the round (or its owner) takes the totals away with it
+    if not isinstance(origin, HoleScore) and getattr(origin, 'model', None) is not HoleScore:
+        return
+    old_state = instance._tracked_state or _hole_state(instance)
+    if old_state is None:
+        return
+    totals = scorecards.apply_hole_score_change(old_state, None)
+    _refresh_cached_round(instance, totals)
+    user_id = Round.objects.filter(pk=instance.round_id).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        sync.record_deletion(user_id, SyncTombstone.HOLE_SCORE, instance.pk)
+
+
+@receiver(post_save, sender=Achievement)
+@receiver(post_delete, sender=Achievement)
+def invalidate_achievement_rules(sender, **kwargs):
+    achievements.invalidate_rules()
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=DrivingRange)
+@receiver(post_delete, sender=DrivingRange)
+@receiver(post_save, sender=PracticeTip)
+@receiver(post_delete, sender=PracticeTip)
+@receiver(post_save, sender=Achievement)
+@receiver(post_delete, sender=Achievement)
+def bump_catalog_version(sender, **kwargs):
+    versions.bump_model_version(sender)
+
+
+@receiver(post_save, sender=Friendship)
+@receiver(post_delete, sender=Friendship)
+def invalidate_friend_graph_on_change(sender, instance, raw=False, **kwargs):
+    invalidate_friend_graph(instance.user_id, instance.friend_id)
+
+
+@receiver(post_init, sender=Course)
+def remember_course_name(sender, instance, **kwargs):
+    instance._shared_name = instance.__dict__.get('name') if instance.pk else None
+
+
+@receiver(post_save, sender=Course)
+def index_course_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_course(instance)
+    # Shared rounds show the course name
+    if not created and instance.name != instance._shared_name:
+        invalidate_shared_rounds_for(course_id=instance.pk)
+    instance._shared_name = instance.name
+
+
+@receiver(pre_delete, sender=Course)
+def unindex_course_on_delete(sender, instance, **kwargs):
+    search.unindex_course(instance)
+    # Its rounds lose their course through SET_NULL, which sends no Round signals
+    invalidate_shared_rounds_for(course_id=instance.pk)
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    instance._indexed_username = instance.__dict__.get('username') if instance.pk else None
+
+
+@receiver(post_save, sender=User)
+def index_username_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or (not created and instance.username == instance._indexed_username):
+        return
+    username_index.upsert(instance.pk, instance.username)
+    if not created:
+        invalidate_shared_rounds_for(user_id=instance.pk)
+    instance._indexed_username = instance.username
+
+
+@receiver(post_delete, sender=User)
+def unindex_username_on_delete(sender, instance, **kwargs):
+    username_index.remove(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_principal(sender, instance, raw=False, **kwargs):
+    # Covers profile edits, password changes and deactivation
+    invalidate_cached_user(instance.pk)
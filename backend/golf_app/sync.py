@@ -0,0 +1,151 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, Subquery
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import ChangeCounter, HoleScore, Round, SyncTombstone
+
+# Sequences issued before counters went per-user; new user counters start from it
+ROUNDS_COUNTER = 'rounds'
+
+# Per user, the newest change sequence whose tombstones have been pruned
+HORIZON_COUNTER = 'sync-horizon'
+
+
+def _counter_name(user_id):
+    return f'{ROUNDS_COUNTER}:{user_id}'
+
+
+def _horizon_name(user_id):
+    return f'{HORIZON_COUNTER}:{user_id}'
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+class ResyncRequired(Exception):
+    """The token predates pruned tombstones, so the deletions since it can no longer be listed."""
+
+
+def next_change_seq(user_id):
+    """
+    Take the next number in a user's change sequence. Inside a transaction
+    the user's counter row stays locked until commit, so numbers become
+    visible in the order they were taken and a reader never skips one still
+    in flight; other users' writes take their own rows.
+    """
+    counter = ChangeCounter.objects.filter(pk=_counter_name(user_id))
+    # No savepoint: inside a caller's transaction there is nothing to roll back separately
+    with transaction.atomic(savepoint=False):
+        if not counter.update(value=F('value') + 1):
+            ChangeCounter.objects.get_or_create(
+                name=_counter_name(user_id), defaults={'value': _legacy_change_seq()}
+            )
+            counter.update(value=F('value') + 1)
+        return counter.values_list('value', flat=True).get()
+
+
+def current_change_seq(user_id):
+    value = ChangeCounter.objects.filter(pk=_counter_name(user_id)).values_list('value', flat=True).first()
+    return _legacy_change_seq() if value is None else value
+
+
+def _legacy_change_seq():
+    # Tokens handed out from the shared counter must still compare below new numbers
+    return ChangeCounter.objects.filter(pk=ROUNDS_COUNTER).values_list('value', flat=True).first() or 0
+
+
+def stamp_round(round_id, user_id=None):
+    """Give a round a new change sequence without touching anything else."""
+    if user_id is None:
+        user_id = Round.objects.filter(pk=round_id).values_list('user_id', flat=True).first()
+        if user_id is None:
+            return
+    with transaction.atomic():
+        Round.objects.filter(pk=round_id).update(change_seq=next_change_seq(user_id))
+
+
+def record_deletion(user_id, kind, object_id):
+    SyncTombstone.objects.create(
+        user_id=user_id, kind=kind, object_id=object_id, change_seq=next_change_seq(user_id)
+    )
+
+
+def pruned_through(user_id):
+    return ChangeCounter.objects.filter(pk=_horizon_name(user_id)).values_list('value', flat=True).first() or 0
+
+
+def prune_tombstones(now=None):
+    """
+    Delete tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS. Each
+    affected user's horizon first moves up to the newest sequence removed,
+    so a client whose token is older gets a full resync instead of silently
+    keeping deleted rows. Returns the number of tombstones deleted.
+    """
+    cutoff = (now or timezone.now()) - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    with transaction.atomic():
+        expired = SyncTombstone.objects.filter(created_at__lt=cutoff)
+        horizons = expired.order_by().values('user_id').annotate(seq=Max('change_seq')).values_list('user_id', 'seq')
+        for user_id, seq in horizons:
+            counter = ChangeCounter.objects.filter(pk=_horizon_name(user_id))
+            if not counter.update(value=Greatest(F('value'), seq)):
+                ChangeCounter.objects.get_or_create(name=_horizon_name(user_id), defaults={'value': seq})
+        return expired.delete()[0]
+
+
+def encode_token(change_seq):
+    data = json.dumps({'seq': change_seq}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_token(token):
+    """The change sequence a client's sync token was issued at."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        # Older tokens also carry an ``at`` timestamp, which is no longer needed
+        return int(data['seq'])
+    except (TypeError, ValueError, KeyError):
+        raise InvalidToken(token)
+
+
+def changes_since(user, token=None):
+    """
+    What a client holding ``token`` is missing, as range scans on the user's
+    change sequence: rounds stamped since the token, the full scorecard of
+    each of those rounds and deletions by tombstone sequence. Every hole
+    score write stamps its round, so no hole score change is missed. Without
+    a token everything the user owns is returned. Returns
+    ``(rounds, hole_scores, deleted, new_token)`` with the first two as
+    querysets. Raises ResyncRequired if tombstones newer than the token
+    have been pruned.
+    """
+    change_seq = current_change_seq(user.pk)
+    rounds = Round.objects.filter(user=user, change_seq__lte=change_seq)
+    tombstones = SyncTombstone.objects.none()
+    if token is not None:
+        since_seq = decode_token(token)
+        if since_seq < pruned_through(user.pk):
+            raise ResyncRequired(token)
+        rounds = rounds.filter(change_seq__gt=since_seq)
+        tombstones = SyncTombstone.objects.filter(
+            user=user, change_seq__gt=since_seq, change_seq__lte=change_seq
+        )
+
+    # An IN list rather than a join, so SQLite walks the (round, hole_number) index without sorting
+    hole_scores = HoleScore.objects.filter(round_id__in=Subquery(rounds.values('pk')))
+
+    deleted = {SyncTombstone.ROUND: [], SyncTombstone.HOLE_SCORE: []}
+    for kind, object_id in tombstones.order_by('change_seq').values_list('kind', 'object_id'):
+        deleted[kind].append(object_id)
+    return (
+        rounds.order_by('change_seq'),
+        hole_scores.order_by('round_id', 'hole_number'),
+        deleted,
+        encode_token(change_seq),
+    )
@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from golf_app import achievements
+from golf_app.models import Achievement, Round, User, UserAchievement
+
+
+def round_state(user, **totals):
+    state = {'user_id': user.pk, 'is_completed': True, 'total_score': 90, 'total_putts': 36,
+             'fairways_hit': 0, 'sand_saves': 0, 'holes_played': 18}
+    state.update(totals)
+    return state
+
+
+class AchievementRuleTests(TestCase):
+    def setUp(self):
+        # Compiled rules name achievement rows that are rolled back after each test
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username='achiever', password='unused')
+        self.break_80 = Achievement.objects.create(
+            name='Break 80', description='test', criteria_json={'type': 'score_below', 'value': 80})
+        self.break_90 = Achievement.objects.create(
+            name='Break 90', description='test', criteria_json={'type': 'score_below', 'value': 90})
+        self.putter = Achievement.objects.create(
+            name='Putter', description='test', criteria_json={'type': 'putts_below', 'value': 30})
+        self.regular = Achievement.objects.create(
+            name='Regular', description='test', criteria_json={'type': 'total_rounds', 'value': 2})
+        Achievement.objects.create(name='Broken', description='test', criteria_json={'type': 'score_below'})
+
+    def awarded(self):
+        return set(UserAchievement.objects.filter(user=self.user).values_list('achievement_id', flat=True))
+
+    def test_rules_skip_unusable_criteria_and_sort_thresholds(self):
+        rules = achievements.compile_rules()
+        self.assertEqual(set(rules), {'score_below', 'putts_below', 'total_rounds'})
+        self.assertEqual(rules['score_below'], ([80.0, 90.0], [self.break_80.pk, self.break_90.pk]))
+
+    def test_thresholds_compare_per_rule_type(self):
+        rules = achievements.compile_rules()
+        earned = achievements.satisfied(rules, {'total_score': 85, 'total_putts': 30, 'completed_rounds': 1})
+        self.assertEqual(set(earned), {self.break_90.pk, self.putter.pk})
+
+    def test_short_rounds_only_count_for_totals(self):
+        achievements.evaluate_round(round_state(self.user, total_score=30, total_putts=10, holes_played=9))
+        self.assertEqual(self.awarded(), set())
+
+    def test_awards_are_made_once(self):
+        Round.objects.bulk_create([Round(user=self.user, is_completed=True), Round(user=self.user, is_completed=True)])
+        self.assertEqual(achievements.evaluate_round(round_state(self.user, total_score=85)), 2)
+        self.assertEqual(achievements.evaluate_round(round_state(self.user, total_score=78)), 1)
+        self.assertEqual(achievements.evaluate_round(round_state(self.user, total_score=78)), 0)
+        self.assertEqual(self.awarded(), {self.break_80.pk, self.break_90.pk, self.regular.pk})
+
+    def test_changed_stats_limit_the_rules_checked(self):
+        Round.objects.bulk_create([Round(user=self.user, is_completed=True), Round(user=self.user, is_completed=True)])
+        # Compiling the rules, the held awards and the insert; no completed-round count
+        with self.assertNumQueries(3):
+            achievements.evaluate_round(round_state(self.user, total_putts=28), changed={'total_putts'})
+        self.assertEqual(self.awarded(), {self.putter.pk})
+
+    def test_achievement_edits_recompile_the_rules(self):
+        achievements.compile_rules()
+        self.break_80.criteria_json = {'type': 'score_below', 'value': 75}
+        self.break_80.save()
+        self.assertEqual(achievements.compile_rules()['score_below'][0], [75.0, 90.0])
+
+    @override_settings(PROCESS_CACHE_TTL=5)
+    def test_per_process_cache_bounds_the_rules_lifetime(self):
+        with mock.patch.object(achievements.cache, 'set', wraps=achievements.cache.set) as cache_set:
+            achievements.compile_rules()
+        self.assertEqual(cache_set.call_args.args[2], 5)
@@ -0,0 +1,57 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from golf_app import analytics
+from golf_app.models import Club, Course, Hole, HoleScore, Round, User
+
+PARS = [4, 4, 3, 5, 4, 4, 3, 4, 5] * 2
+
+
+class SuggestClubsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='golfer', password='unused')
+        Club.objects.create(user=self.user, club_type='Iron', average_distance_yards=160)
+        Club.objects.create(user=self.user, club_type='Hybrid', average_distance_yards=190)
+        self.course = Course.objects.create(name='Test Links', city='Testville', number_of_holes=18)
+        Hole.objects.bulk_create(
+            Hole(course=self.course, hole_number=number, par=par, yardage={3: 165, 4: 390, 5: 520}[par])
+            for number, par in enumerate(PARS, start=1)
+        )
+
+    def play(self, holes, over_par=1):
+        played = Round.objects.create(user=self.user, course=self.course, is_completed=True)
+        HoleScore.objects.bulk_create(
+            HoleScore(round=played, hole_number=number, score=PARS[number - 1] + over_par, putts=2,
+                      fairway_hit=number % 2 == 0)
+            for number in range(1, holes + 1)
+        )
+        return played
+
+    def test_query_count_does_not_grow_with_history(self):
+        # Nine- and eighteen-hole rounds mixed, over a growing window
+        for rounds, holes in ((1, 9), (3, 18), (10, 9), (25, 18)):
+            while Round.objects.filter(user=self.user).count() < rounds:
+                self.play(holes)
+            with self.assertNumQueries(2):
+                analysis = analytics.suggest_clubs(self.user, rounds)
+            self.assertEqual(analysis['rounds_analyzed'], rounds)
+
+    def test_no_completed_rounds(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(analytics.suggest_clubs(self.user))
+
+    def test_version_1_keeps_the_original_response(self):
+        self.play(9, over_par=1)
+        self.play(9, over_par=3)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get('/api/rounds/suggest_club/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 9)
+        self.assertEqual(set(response.data[0]), {'hole_number', 'score', 'par', 'suggestion'})
+
+        response = client.get('/api/rounds/suggest_club/', {'version': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual({'by_par', 'by_yardage_band', 'problem_holes', 'suggestions'}, set(response.data))
@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from golf_app import authentication
+from golf_app.models import User
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username='golfer', password='first-password')
+        self.auth = authentication.CachedJWTAuthentication()
+
+    def _authenticate(self, token=None):
+        token = token or AccessToken.for_user(self.user)
+        request = RequestFactory().get('/api/rounds/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        user, _ = self.auth.authenticate(request)
+        return user
+
+    def test_repeat_requests_skip_the_user_query(self):
+        with self.assertNumQueries(1):
+            self._authenticate()
+        with self.assertNumQueries(0):
+            self.assertEqual(self._authenticate().pk, self.user.pk)
+
+    def test_deactivation_takes_effect_on_the_next_request(self):
+        self._authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate()
+
+    def test_the_cached_copy_is_still_checked(self):
+        # Cache hits skip the row, so the checks run against the cached copy
+        stale = User.objects.get(pk=self.user.pk)
+        stale.is_active = False
+        cache.set(authentication._principal_key(self.user.pk), stale)
+        with self.assertRaisesMessage(AuthenticationFailed, 'inactive'):
+            self._authenticate()
+
+    @mock.patch.object(api_settings, 'CHECK_REVOKE_TOKEN', True)
+    def test_password_changes_revoke_older_tokens(self):
+        token = AccessToken.for_user(self.user)
+        self._authenticate(token)
+        self.user.set_password('second-password')
+        self.user.save()
+        with self.assertRaisesMessage(AuthenticationFailed, 'password has been changed'):
+            self._authenticate(token)
+        self.assertEqual(self._authenticate().pk, self.user.pk)
+
+    @override_settings(PROCESS_CACHE_TTL=5, AUTH_USER_CACHE_TTL=60)
+    def test_per_process_cache_bounds_the_lifetime(self):
+        with mock.patch.object(authentication.cache, 'set', wraps=authentication.cache.set) as cache_set:
+            self._authenticate()
+        self.assertEqual(cache_set.call_args.args[2], 5)
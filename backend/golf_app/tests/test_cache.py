@@ -0,0 +1,20 @@
+from django.test import SimpleTestCase, override_settings
+
+from golf_app.cache import cross_worker_ttl
+
+LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+SHARED = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache_table'}}
+
+
+@override_settings(PROCESS_CACHE_TTL=5)
+class CrossWorkerTTLTests(SimpleTestCase):
+    @override_settings(CACHES=LOCAL)
+    def test_per_process_cache_bounds_the_timeout(self):
+        self.assertEqual(cross_worker_ttl(None), 5)
+        self.assertEqual(cross_worker_ttl(86400), 5)
+        self.assertEqual(cross_worker_ttl(2), 2)
+
+    @override_settings(CACHES=SHARED)
+    def test_shared_cache_keeps_the_timeout(self):
+        self.assertIsNone(cross_worker_ttl(None))
+        self.assertEqual(cross_worker_ttl(86400), 86400)
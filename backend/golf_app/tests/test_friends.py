@@ -0,0 +1,111 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from golf_app import friends
+from golf_app.models import Friendship, User
+
+
+class FriendGraphTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.ann, self.bob, self.cat, self.dan, self.eve = (
+            User.objects.create_user(username=name, password='unused') for name in ('ann', 'bob', 'cat', 'dan', 'eve')
+        )
+        for user, friend in [(self.ann, self.bob), (self.ann, self.cat), (self.bob, self.dan),
+                             (self.cat, self.dan), (self.cat, self.eve)]:
+            friends.befriend(user.pk, friend.pk)
+
+    def test_friendships_go_both_ways(self):
+        self.assertEqual(friends.get_friend_ids(self.dan.pk), {self.bob.pk, self.cat.pk})
+
+    def test_mutual_friends(self):
+        self.assertEqual(friends.mutual_friend_ids(self.ann.pk, self.dan.pk), {self.bob.pk, self.cat.pk})
+        self.assertEqual(friends.mutual_friend_ids(self.ann.pk, self.eve.pk), {self.cat.pk})
+        self.assertEqual(friends.mutual_friend_ids(self.bob.pk, self.cat.pk), {self.ann.pk, self.dan.pk})
+
+    def test_suggestions_rank_by_mutual_friends_and_skip_known_users(self):
+        self.assertEqual(friends.suggested_friend_ids(self.ann.pk), [(self.dan.pk, 2), (self.eve.pk, 1)])
+        self.assertEqual(friends.suggested_friend_ids(self.ann.pk, limit=1), [(self.dan.pk, 2)])
+        lonely = User.objects.create_user(username='lonely', password='unused')
+        self.assertEqual(friends.suggested_friend_ids(lonely.pk), [])
+
+    def test_writes_drop_both_cached_sets_after_commit(self):
+        friends.get_friend_id_sets([self.ann.pk, self.eve.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            friends.befriend(self.ann.pk, self.eve.pk)
+        self.assertIn(self.eve.pk, friends.get_friend_ids(self.ann.pk))
+        self.assertIn(self.ann.pk, friends.get_friend_ids(self.eve.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            friends.unfriend(self.ann.pk, self.bob.pk)
+        self.assertEqual(friends.get_friend_ids(self.ann.pk), {self.cat.pk, self.eve.pk})
+        self.assertNotIn(self.ann.pk, friends.get_friend_id_sets([self.bob.pk])[self.bob.pk])
+
+    @override_settings(PROCESS_CACHE_TTL=5, FRIEND_GRAPH_CACHE_TTL=3600)
+    def test_per_process_cache_bounds_the_lifetime(self):
+        with mock.patch.object(friends.cache, 'set', wraps=friends.cache.set) as cache_set, \
+                mock.patch.object(friends.cache, 'set_many', wraps=friends.cache.set_many) as cache_set_many:
+            friends.get_friend_ids(self.ann.pk)
+            friends.get_friend_id_sets([self.bob.pk])
+        # LocMemCache.set_many calls set() too; the first call is get_friend_ids' own
+        self.assertEqual(cache_set.call_args_list[0].args[2], 5)
+        self.assertEqual(cache_set_many.call_args.args[1], 5)
+
+
+class FriendshipWriteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.ann, self.bob, self.cat = (
+            User.objects.create_user(username=name, password='unused') for name in ('ann', 'bob', 'cat')
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.ann)
+
+    def _edges(self):
+        return set(Friendship.objects.values_list('user_id', 'friend_id'))
+
+    def test_create_writes_both_directions(self):
+        response = self.client.post('/api/friendships/', {'friend': self.bob.pk})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['friend_username'], 'bob')
+        self.assertEqual(self._edges(), {(self.ann.pk, self.bob.pk), (self.bob.pk, self.ann.pk)})
+        own = Friendship.objects.get(user=self.ann, friend=self.bob)
+        self.assertEqual(response.data['id'], own.pk)
+
+    def test_befriending_back_keeps_the_existing_edges(self):
+        Friendship.objects.create(user=self.bob, friend=self.ann)
+        edge = Friendship.objects.get(user=self.ann, friend=self.bob)
+        self.assertEqual(friends.befriend(self.ann.pk, self.bob.pk), (edge.pk, edge.created_at))
+        self.assertEqual(Friendship.objects.count(), 2)
+
+    def test_you_cannot_friend_yourself(self):
+        self.assertEqual(self.client.post('/api/friendships/', {'friend': self.ann.pk}).status_code, 400)
+        self.assertFalse(Friendship.objects.exists())
+
+    def test_remove_friend_deletes_both_directions_in_one_statement(self):
+        friends.befriend(self.ann.pk, self.bob.pk)
+        friends.befriend(self.ann.pk, self.cat.pk)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(friends.unfriend(self.ann.pk, self.bob.pk), 2)
+        # The post_delete signals need the rows loaded first, but both go in one DELETE
+        self.assertEqual(sum(query['sql'].startswith('DELETE') for query in queries), 1)
+        response = self.client.delete('/api/friendships/remove_friend/', {'friend_id': self.cat.pk})
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self._edges(), set())
+
+    def test_mutual_and_suggested_endpoints(self):
+        for user, friend in [(self.ann, self.bob), (self.bob, self.cat)]:
+            with self.captureOnCommitCallbacks(execute=True):
+                friends.befriend(user.pk, friend.pk)
+        mutual = self.client.get('/api/friendships/mutual_friends/', {'user_id': self.cat.pk})
+        self.assertEqual([row['username'] for row in mutual.data], ['bob'])
+        suggested = self.client.get('/api/friendships/suggested_friends/')
+        self.assertEqual([(row['username'], row['mutual_friends']) for row in suggested.data], [('cat', 1)])
+        self.assertEqual(self.client.get('/api/friendships/mutual_friends/').status_code, 400)
@@ -0,0 +1,80 @@
+import random
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from golf_app import geo
+from golf_app.models import Course, User
+
+
+class GeohashTests(SimpleTestCase):
+    def test_encodes_the_reference_point(self):
+        self.assertEqual(geo.geohash_encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+
+    def test_decodes_to_the_cell_centre(self):
+        lat, lon = geo.geohash_decode(geo.geohash_encode(32.7157, -117.1611, 9))
+        self.assertAlmostEqual(lat, 32.7157, places=4)
+        self.assertAlmostEqual(lon, -117.1611, places=4)
+
+    def test_covering_cells_wrap_the_antimeridian(self):
+        cells = geo.covering_cells(0.0, 179.99, 3)
+        self.assertEqual(len(cells), 9)
+        self.assertIn(geo.geohash_encode(0.0, -179.99, 3), cells)
+
+
+class NearestTests(TestCase):
+    origin = (32.7157, -117.1611)
+
+    def setUp(self):
+        rng = random.Random(6)
+        for i in range(40):
+            # Mostly within ~50km of the origin, a few far away
+            spread = 0.5 if i < 35 else 20
+            Course.objects.create(
+                name=f'Course {i}', city='Testville',
+                latitude=round(self.origin[0] + rng.uniform(-spread, spread), 6),
+                longitude=round(self.origin[1] + rng.uniform(-spread, spread), 6),
+            )
+        Course.objects.create(name='Unmapped', city='Testville')
+
+    def _brute_force(self, radius_km=None):
+        ranked = geo.ranked_by_distance(Course.objects.exclude(latitude=None), *self.origin)
+        return [pk for distance, pk in ranked if radius_km is None or distance <= radius_km]
+
+    def test_k_nearest_match_a_full_scan(self):
+        for k in (1, 5, 38):
+            results = geo.nearest(Course.objects.all(), *self.origin, k=k)
+            self.assertEqual([course.pk for course in results], self._brute_force()[:k])
+
+    def test_radius_keeps_only_rows_inside_it(self):
+        results = geo.nearest(Course.objects.all(), *self.origin, k=100, radius_km=20)
+        self.assertEqual([course.pk for course in results], self._brute_force(20))
+        self.assertTrue(all(course.distance_km <= 20 for course in results))
+
+    def test_sparse_data_falls_back_to_every_row(self):
+        results = geo.nearest(Course.objects.all(), *self.origin, k=100)
+        self.assertEqual(len(results), 40)
+        self.assertNotIn('Unmapped', [course.name for course in results])
+
+    def test_geohash_follows_coordinate_edits(self):
+        course = Course.objects.get(name='Course 0')
+        course.latitude, course.longitude = 51.5074, -0.1278
+        course.save()
+        self.assertEqual(course.geohash, geo.geohash_for(51.5074, -0.1278))
+
+
+class NearbyEndpointTests(TestCase):
+    def setUp(self):
+        Course.objects.create(name='Near', city='San Diego', latitude=32.72, longitude=-117.16)
+        Course.objects.create(name='Further', city='San Diego', latitude=32.80, longitude=-117.25)
+        Course.objects.create(name='Far', city='New York', latitude=40.71, longitude=-74.01)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='wayfarer', password='unused'))
+
+    def test_results_are_nearest_first_with_distances(self):
+        response = self.client.get('/api/courses/', {'near': '32.7157,-117.1611', 'radius': 50})
+        self.assertEqual([row['name'] for row in response.data], ['Near', 'Further'])
+
+    def test_bad_parameters_are_rejected(self):
+        for params in ({'near': 'here'}, {'near': '95,0'}, {'near': '0,0', 'k': 0}, {'near': '0,0', 'radius': -1}):
+            self.assertEqual(self.client.get('/api/courses/', params).status_code, 400, params)
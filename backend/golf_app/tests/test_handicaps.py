@@ -0,0 +1,99 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from golf_app import handicaps
+from golf_app.models import Course, Hole, HoleScore, Round, User
+
+
+def par_four_holes(score):
+    return [(number, score, 4, number) for number in range(1, 19)]
+
+
+class HandicapWindowTests(SimpleTestCase):
+    def test_needs_three_differentials(self):
+        self.assertIsNone(handicaps.HandicapWindow([10.0, 12.0]).index())
+        self.assertEqual(handicaps.HandicapWindow([10.0, 12.0, 14.0]).index(), 8.0)
+
+    def test_averages_the_best_eight_of_the_last_twenty(self):
+        window = handicaps.HandicapWindow([0.0] + [float(value) for value in range(1, 21)])
+        # The 0.0 slid out of the window, leaving 1-20
+        self.assertEqual(len(window), 20)
+        self.assertEqual(window.index(), 4.5)
+
+    def test_index_is_capped(self):
+        self.assertEqual(handicaps.HandicapWindow([60.0] * 5).index(), handicaps.MAX_HANDICAP_INDEX)
+
+
+class ScoreDifferentialTests(SimpleTestCase):
+    def test_strokes_follow_the_stroke_index(self):
+        self.assertEqual([handicaps.strokes_received(20, index) for index in (1, 2, 3, 18)], [2, 2, 1, 1])
+        self.assertEqual([handicaps.strokes_received(-2, index) for index in (1, 16, 17, 18)], [0, 0, -1, -1])
+
+    def test_partial_rounds_have_no_differential(self):
+        self.assertIsNone(handicaps.score_differential(par_four_holes(5)[:9], None))
+        holes = par_four_holes(5)
+        holes[0] = (1, 5, None, 1)
+        self.assertIsNone(handicaps.score_differential(holes, None))
+
+    def test_holes_are_capped_at_net_double_bogey(self):
+        # Strokes on stroke index 1-10 cap those holes at 7, the rest at 6
+        self.assertEqual(handicaps.score_differential(par_four_holes(9), 10.0), 46.0)
+
+    def test_without_an_index_holes_are_capped_at_par_plus_five(self):
+        self.assertEqual(handicaps.score_differential(par_four_holes(12), None), 90.0)
+
+
+class HandicapUpkeepTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username='scratch', password='unused')
+        self.course = Course.objects.create(name='Par Fours', city='Testville', par=72)
+        Hole.objects.bulk_create(
+            Hole(course=self.course, hole_number=number, par=4, handicap_index=number) for number in range(1, 19)
+        )
+
+    def _play(self, score):
+        round = Round.objects.create(user=self.user, course=self.course)
+        for number in range(1, 19):
+            HoleScore.objects.create(round=round, hole_number=number, score=score)
+        round.is_completed = True
+        round.save()
+        return round
+
+    def _handicap(self):
+        return User.objects.values_list('handicap', flat=True).get(pk=self.user.pk)
+
+    def test_completed_rounds_set_the_differential_and_index(self):
+        rounds = [self._play(score) for score in (5, 6, 4)]
+        self.assertEqual(
+            list(Round.objects.filter(pk__in=[r.pk for r in rounds]).order_by('id')
+                 .values_list('score_differential', flat=True)),
+            [18.0, 36.0, 0.0],
+        )
+        self.assertEqual(self._handicap(), Decimal('-2.0'))
+
+    def test_deleting_a_round_recalculates_the_index(self):
+        best = [self._play(score) for score in (5, 6, 4, 5)][2]
+        self.assertEqual(self._handicap(), Decimal('-1.0'))
+        best.delete()
+        self.assertEqual(self._handicap(), Decimal('16.0'))
+
+    def test_reopening_a_round_clears_its_differential(self):
+        round = self._play(5)
+        round.is_completed = False
+        round.save()
+        self.assertIsNone(Round.objects.get(pk=round.pk).score_differential)
+
+    def test_recompute_matches_the_incremental_upkeep(self):
+        for score in (5, 6, 4, 5):
+            self._play(score)
+        expected = list(Round.objects.order_by('id').values_list('score_differential', flat=True))
+        Round.objects.update(score_differential=None)
+        User.objects.update(handicap=None)
+
+        self.assertEqual(handicaps.recompute_handicaps(), (1, 4))
+        self.assertEqual(list(Round.objects.order_by('id').values_list('score_differential', flat=True)), expected)
+        self.assertEqual(self._handicap(), Decimal('-1.0'))
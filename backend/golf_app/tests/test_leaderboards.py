@@ -0,0 +1,43 @@
+from datetime import date
+
+from django.test import TestCase
+
+from golf_app import leaderboards
+from golf_app.models import LeaderboardEntry, User
+
+
+class TieRankingTests(TestCase):
+    def setUp(self):
+        self.users = []
+        for i, average in enumerate([70.0, 72.0, 72.0, 75.0]):
+            user = User.objects.create_user(username=f'player-{i}', password='unused')
+            LeaderboardEntry.objects.update_or_create(
+                user=user, defaults={'total_rounds': 4 - i, 'scored_rounds': 1, 'average_score': average}
+            )
+            self.users.append(user)
+
+    def test_board_shares_ranks_between_tied_players(self):
+        ranks = [rank for rank, _ in leaderboards.top_entries('average_score')]
+        self.assertEqual(ranks, [1, 2, 2, 4])
+
+    def test_board_and_rank_lookup_agree(self):
+        for rank, entry in leaderboards.top_entries('average_score'):
+            self.assertEqual(leaderboards.rank_for_user(entry.user_id, 'average_score')[0], rank)
+        for rank, entry in leaderboards.top_entries('total_rounds'):
+            self.assertEqual(leaderboards.rank_for_user(entry.user_id, 'total_rounds')[0], rank)
+
+
+class WindowStartTests(TestCase):
+    def test_day_windows_cover_exactly_that_many_days(self):
+        today = date(2024, 6, 15)
+        self.assertEqual(leaderboards.window_start('1d', today), today)
+        self.assertEqual(leaderboards.window_start('7d', today), date(2024, 6, 9))
+        self.assertEqual((today - leaderboards.window_start('30d', today)).days + 1, 30)
+
+    def test_season_starts_on_new_year(self):
+        self.assertEqual(leaderboards.window_start('season', date(2024, 6, 15)), date(2024, 1, 1))
+
+    def test_rejects_unknown_windows(self):
+        for window in ('0d', 'week', '7'):
+            with self.assertRaises(ValueError):
+                leaderboards.window_start(window, date(2024, 6, 15))
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from golf_app.models import Achievement, Course, User, UserAchievement
+
+
+class OptInPaginationTests(TestCase):
+    def setUp(self):
+        Course.objects.bulk_create(Course(name=f'Course {i}', city='Pageville') for i in range(60))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='pager', password='unused'))
+
+    def test_plain_requests_get_the_whole_list(self):
+        response = self.client.get('/api/courses/')
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 60)
+
+    def test_page_size_gets_an_envelope(self):
+        response = self.client.get('/api/courses/', {'page_size': 25})
+        self.assertEqual(len(response.data['results']), 25)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 25)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertIsNone(response.data['next'])
+
+
+class DatetimeCursorTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='collector', password='unused')
+        achievements = Achievement.objects.bulk_create(
+            Achievement(name=f'Award {i}', description='test') for i in range(30)
+        )
+        UserAchievement.objects.bulk_create(
+            UserAchievement(user=self.user, achievement=achievement) for achievement in achievements
+        )
+        # Ten rows on one timestamp, the rest 1-19 microseconds apart inside the same millisecond
+        base = datetime(2024, 6, 15, 10, 0, 0, 500000, tzinfo=timezone.utc)
+        for i, pk in enumerate(UserAchievement.objects.order_by('id').values_list('id', flat=True)):
+            UserAchievement.objects.filter(pk=pk).update(date_achieved=base + timedelta(microseconds=max(i - 10, 0)))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_pages_keep_rows_that_share_a_millisecond(self):
+        seen = []
+        response = self.client.get('/api/user-achievements/', {'page_size': 3})
+        while True:
+            seen.extend(row['id'] for row in response.data['results'])
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+        expected = list(
+            UserAchievement.objects.filter(user=self.user).order_by('-date_achieved', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
@@ -0,0 +1,98 @@
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from golf_app import routers
+from golf_app.models import ChangeCounter, Round, User
+
+
+@override_settings(REPLICA_LAG_TOLERANCE=5, REPLICA_CHECK_INTERVAL=1)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        routers.reset_replica_health()
+        self.addCleanup(routers.reset_replica_health)
+        for name, value in (('replica_configured', True), ('replication_lag', 0.5)):
+            patcher = mock.patch.object(routers, name, return_value=value)
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+        self.router = routers.ReplicaRouter()
+
+    def test_only_reads_inside_the_block_go_to_the_replica(self):
+        self.assertEqual(self.router.db_for_read(Round), DEFAULT_DB_ALIAS)
+        with routers.reading_from_replica():
+            self.assertEqual(self.router.db_for_read(Round), routers.REPLICA_DB_ALIAS)
+            self.assertEqual(self.router.db_for_write(Round), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.router.db_for_read(Round), DEFAULT_DB_ALIAS)
+
+    def test_a_lagging_or_silent_replica_is_skipped(self):
+        for lag in (5.5, None):
+            routers.reset_replica_health()
+            self.replication_lag.return_value = lag
+            with routers.reading_from_replica():
+                self.assertEqual(self.router.db_for_read(Round), DEFAULT_DB_ALIAS, lag)
+
+    def test_lag_is_measured_once_per_interval(self):
+        with mock.patch.object(routers.time, 'monotonic', side_effect=[100.0, 100.5, 101.0]):
+            self.assertTrue(routers.replica_available())
+            self.replication_lag.return_value = 30
+            self.assertTrue(routers.replica_available())
+            self.assertFalse(routers.replica_available())
+        self.assertEqual(self.replication_lag.call_count, 2)
+
+    def test_without_a_replica_everything_reads_the_primary(self):
+        self.replica_configured.return_value = False
+        with routers.reading_from_replica():
+            self.assertEqual(self.router.db_for_read(Round), DEFAULT_DB_ALIAS)
+        self.replication_lag.assert_not_called()
+
+
+@mock.patch.object(routers, 'REPLICA_DB_ALIAS', DEFAULT_DB_ALIAS)
+class ReplicationLagTests(TestCase):
+    # The heartbeat is read back from the primary standing in for the replica
+
+    def test_no_heartbeat_means_no_lag_reading(self):
+        self.assertIsNone(routers.replication_lag())
+
+    def test_lag_is_the_age_of_the_replicated_heartbeat(self):
+        routers.stamp_heartbeat()
+        self.assertLess(routers.replication_lag(), 1)
+        ChangeCounter.objects.filter(pk=routers.HEARTBEAT_COUNTER).update(value=int(time.time() * 1000) - 10000)
+        self.assertAlmostEqual(routers.replication_lag(), 10, delta=1)
+
+
+@override_settings(REPLICA_LAG_TOLERANCE=5, REPLICA_CHECK_INTERVAL=1)
+class PrimaryPinningTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        patcher = mock.patch.object(routers, 'replica_configured', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='writer', password='unused')
+
+    def _reads_replica(self, method='GET'):
+        view = routers.replica_reads(lambda self, request: routers._use_replica.get())
+        return view(None, SimpleNamespace(method=method, user=self.user))
+
+    def test_safe_reads_use_the_replica_until_the_user_writes(self):
+        self.assertTrue(self._reads_replica())
+        self.assertFalse(self._reads_replica('POST'))
+        routers.pin_to_primary(self.user.pk)
+        self.assertFalse(self._reads_replica())
+
+    def test_successful_writes_pin_the_user(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.post('/api/rounds/', {}, format='json').status_code, 201)
+        self.assertTrue(routers.pinned_to_primary(self.user.pk))
+
+    def test_failed_writes_do_not_pin(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.post('/api/friendships/', {'friend': self.user.pk}).status_code, 400)
+        self.assertFalse(routers.pinned_to_primary(self.user.pk))
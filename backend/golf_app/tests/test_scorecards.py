@@ -0,0 +1,99 @@
+import base64
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from golf_app import leaderboards
+from golf_app.models import Achievement, Course, Hole, HoleScore, LeaderboardEntry, Round, ScoreBucket, User
+from golf_app.scorecards import compact_round, pack_scorecard, unpack_scorecard
+
+
+def hole(number, score, putts=2, fairway_hit=False, sand_save=False):
+    return {'hole_number': number, 'score': score, 'putts': putts, 'fairway_hit': fairway_hit, 'sand_save': sand_save}
+
+
+class PackedScorecardTests(SimpleTestCase):
+    def test_byte_layout_round_trip(self):
+        card = [hole(1, 4, 2, True), hole(2, 3, None, False, True), hole(3, 7, 0), hole(18, 254, 254, True, True)]
+        packed = pack_scorecard(card)
+        self.assertEqual(base64.b64decode(packed)[0], 1)
+        self.assertEqual(len(base64.b64decode(packed)), 1 + 4 * len(card))
+        self.assertEqual(unpack_scorecard(packed), card)
+
+    def test_wide_layout_round_trip(self):
+        card = [hole(1, 300, 2), hole(2, -1, None), hole(3, 4, -0x7FFF), hole(0x100, 4, 0x7FFF, True)]
+        packed = pack_scorecard(card)
+        self.assertEqual(base64.b64decode(packed)[0], 2)
+        self.assertEqual(unpack_scorecard(packed), card)
+
+    def test_putts_equal_to_a_marker_use_the_next_layout(self):
+        # 0xFF marks "no putts" in the byte layout
+        packed = pack_scorecard([hole(1, 4, 0xFF)])
+        self.assertEqual(base64.b64decode(packed)[0], 2)
+        self.assertEqual(unpack_scorecard(packed), [hole(1, 4, 0xFF)])
+
+    def test_values_that_fit_no_layout(self):
+        for card in ([hole(1, 0x8000)], [hole(1, 4, -0x8000)], [hole(1, 4, 10 ** 6)]):
+            with self.assertRaises(ValueError):
+                pack_scorecard(card)
+
+    def test_compact_round_falls_back_to_plain_hole_scores(self):
+        card = [hole(1, 4), hole(2, 10 ** 6)]
+        data = compact_round({'id': 1, 'hole_scores': card})
+        self.assertEqual(data, {'id': 1, 'hole_scores': card})
+        data = compact_round({'id': 1, 'hole_scores': card[:1]})
+        self.assertEqual(unpack_scorecard(data['scorecard']), card[:1])
+        self.assertNotIn('hole_scores', data)
+
+    def test_unknown_version_and_truncated_data(self):
+        with self.assertRaisesMessage(ValueError, 'Unknown packed scorecard format'):
+            unpack_scorecard(base64.b64encode(bytes([9, 1, 4, 2, 0])).decode())
+        with self.assertRaisesMessage(ValueError, 'Unknown packed scorecard format'):
+            unpack_scorecard('')
+        with self.assertRaisesMessage(ValueError, 'Truncated packed scorecard'):
+            unpack_scorecard(base64.b64encode(bytes([1, 1, 4, 2])).decode())
+
+    def test_empty_scorecard(self):
+        self.assertEqual(unpack_scorecard(pack_scorecard([])), [])
+
+
+class HoleEditWriteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='scorer', password='unused')
+        course = Course.objects.create(name='Delta Links', city='Deltaville')
+        Hole.objects.bulk_create(Hole(course=course, hole_number=number, par=4) for number in range(1, 19))
+        Achievement.objects.create(name='Veteran', description='test', criteria_json={'type': 'total_rounds', 'value': 50})
+        self.round = Round.objects.create(user=self.user, course=course)
+        for number in range(1, 19):
+            HoleScore.objects.create(round=self.round, hole_number=number, score=4, putts=2)
+        self.hole = HoleScore.objects.get(round=self.round, hole_number=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _patch(self, score):
+        return self.client.patch(f'/api/hole-scores/{self.hole.pk}/', {'score': score}, format='json')
+
+    def assertStatsMatchRounds(self):
+        self.assertEqual(leaderboards.verify_leaderboard(), [])
+        buckets = ScoreBucket.objects.filter(user=self.user).values_list('rounds', 'score_sum')
+        expected = Round.objects.filter(user=self.user, is_completed=True).values_list('total_score', flat=True)
+        self.assertEqual(sum(rounds for rounds, _ in buckets), len(expected))
+        self.assertEqual(sum(score for _, score in buckets), sum(expected))
+
+    def test_in_progress_edit_is_one_update_per_table(self):
+        # 4 for the view (two lookups, the user, the hole UPDATE); then the locked round read, its change
+        # sequence, the round and leaderboard UPDATEs, and the savepoint pair around them
+        with self.assertNumQueries(11):
+            self.assertEqual(self._patch(5).status_code, 200)
+        self.assertEqual(LeaderboardEntry.objects.get(user=self.user).total_score_sum, 73)
+        self.assertStatsMatchRounds()
+
+    def test_completed_edit_rescores_in_place(self):
+        self.round.is_completed = True
+        self.round.save()
+        self._patch(6)
+        self._patch(3)
+        self.round.refresh_from_db()
+        self.assertEqual(self.round.total_score, 71)
+        self.assertEqual(ScoreBucket.objects.filter(user=self.user).count(), 1)
+        self.assertStatsMatchRounds()
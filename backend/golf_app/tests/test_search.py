@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from golf_app import search
+from golf_app.models import Course, SearchTerm, User
+
+
+class TokenizeTests(SimpleTestCase):
+    def test_lowercases_and_strips_accents(self):
+        self.assertEqual(search.tokenize('Château-Neuf  G.C.'), ['chateau', 'neuf', 'g', 'c'])
+        self.assertEqual(search.tokenize(None), [])
+
+
+class CourseSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.torrey = Course.objects.create(name='Torrey Pines South', city='La Jolla', state='CA')
+        self.balboa = Course.objects.create(name='Balboa Park', city='San Diego', state='CA')
+        self.pines_city = Course.objects.create(name='Municipal Links', city='Pinesville', state='NC')
+        self.pinehurst = Course.objects.create(name='Pinehurst No. 2', city='Pinehurst', state='NC')
+
+    def test_every_token_must_match(self):
+        self.assertEqual(search.search_course_ids('torrey south'), [self.torrey.pk])
+        self.assertEqual(search.search_course_ids('torrey balboa'), [])
+
+    def test_name_matches_outrank_city_matches(self):
+        Course.objects.create(name='Desert Dunes', city='Balboa', state='AZ')
+        ids = search.search_course_ids('balboa')
+        self.assertEqual(ids[0], self.balboa.pk)
+        self.assertEqual(len(ids), 2)
+
+    def test_prefix_and_typo_matches(self):
+        self.assertEqual(search.search_course_ids('torr'), [self.torrey.pk])
+        self.assertEqual(search.search_course_ids('balbao'), [self.balboa.pk])
+
+    def test_exact_terms_outrank_prefix_expansions(self):
+        self.assertEqual(search.search_course_ids('pines')[0], self.torrey.pk)
+
+    def test_rename_reindexes_the_course(self):
+        self.balboa.name = 'Mission Bay'
+        self.balboa.save()
+        self.assertEqual(search.search_course_ids('mission'), [self.balboa.pk])
+        self.assertEqual(search.search_course_ids('balboa park'), [])
+        self.assertEqual(SearchTerm.objects.get(term='balboa').document_frequency, 0)
+
+    def test_delete_releases_its_terms(self):
+        self.torrey.delete()
+        self.assertEqual(search.search_course_ids('torrey'), [])
+        self.assertEqual(SearchTerm.objects.get(term='torrey').document_frequency, 0)
+
+    def test_rebuild_matches_the_incremental_index(self):
+        queries = ['pines', 'ca', 'balbao', 'pinehurst 2']
+        before = [search.search_course_ids(query) for query in queries]
+        self.assertEqual(search.rebuild_search_index(), 4)
+        self.assertEqual([search.search_course_ids(query) for query in queries], before)
+
+
+class CourseSearchEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='seeker', password='unused'))
+
+    def test_results_come_back_best_match_first(self):
+        Course.objects.create(name='Ocean View', city='Seaside')
+        Course.objects.create(name='Seaside Links', city='Seaside')
+        response = self.client.get('/api/courses/', {'search': 'seaside'})
+        self.assertEqual([row['name'] for row in response.data], ['Seaside Links', 'Ocean View'])
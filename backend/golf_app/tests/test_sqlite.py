@@ -0,0 +1,96 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings
+
+from golf_app import sqlite
+from golf_app.models import ChangeCounter
+
+
+def create_counter(name, value=0):
+    return ChangeCounter.objects.create(name=name, value=value).value
+
+
+def create_then_fail(name):
+    ChangeCounter.objects.create(name=name)
+    raise ValueError(name)
+
+
+class WriteCoalescerTests(TransactionTestCase):
+    # The writer thread opens its own connection, so writes must really commit
+
+    def setUp(self):
+        # A long wait so every concurrent submit lands in the same batch
+        self.writer = sqlite.WriteCoalescer(max_batch=8, max_wait=0.5)
+
+    def _submit_together(self, *calls):
+        with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+            futures = [pool.submit(self.writer.submit, *call) for call in calls]
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except Exception as exc:
+                outcomes.append(exc)
+        return outcomes
+
+    def test_concurrent_writes_share_one_batch(self):
+        outcomes = self._submit_together(*[(create_counter, f'batch-{i}', i) for i in range(4)])
+        self.assertEqual(outcomes, [0, 1, 2, 3])
+        self.assertEqual((self.writer.batches, self.writer.writes), (1, 4))
+        self.assertEqual(ChangeCounter.objects.filter(name__startswith='batch-').count(), 4)
+
+    def test_a_failing_call_only_rolls_back_its_own_savepoint(self):
+        outcomes = self._submit_together(
+            (create_counter, 'kept-1'), (create_then_fail, 'dropped'), (create_counter, 'kept-2'),
+        )
+        self.assertEqual(self.writer.batches, 1)
+        self.assertEqual(outcomes[0], 0)
+        self.assertIsInstance(outcomes[1], ValueError)
+        self.assertEqual(outcomes[2], 0)
+        self.assertEqual(
+            sorted(ChangeCounter.objects.values_list('name', flat=True)), ['kept-1', 'kept-2'],
+        )
+
+    def test_exceptions_reach_the_caller(self):
+        with self.assertRaisesMessage(ValueError, 'alone'):
+            self.writer.submit(create_then_fail, 'alone')
+        self.assertFalse(ChangeCounter.objects.exists())
+
+    def test_on_commit_runs_after_the_batch_commits_and_not_for_failures(self):
+        committed = []
+
+        def write_and_notify(name):
+            ChangeCounter.objects.create(name=name)
+            transaction.on_commit(lambda: committed.append(
+                (name, ChangeCounter.objects.filter(name=name).exists())
+            ))
+
+        def notify_then_fail(name):
+            transaction.on_commit(lambda: committed.append((name, True)))
+            raise ValueError(name)
+
+        self._submit_together((write_and_notify, 'first'), (notify_then_fail, 'failed'), (write_and_notify, 'second'))
+        self.assertEqual(sorted(committed), [('first', True), ('second', True)])
+
+
+@override_settings(SQLITE_WRITE_COALESCING=True)
+class SerializedWriteTests(TransactionTestCase):
+    def test_goes_through_the_writer_in_autocommit(self):
+        writes = sqlite.writer.writes
+        self.assertEqual(sqlite.serialized_write(create_counter, 'queued', 7), 7)
+        self.assertEqual(sqlite.writer.writes, writes + 1)
+
+    def test_runs_in_place_inside_an_open_transaction(self):
+        writes = sqlite.writer.writes
+        with transaction.atomic():
+            sqlite.serialized_write(create_counter, 'inline')
+            self.assertTrue(connection.in_atomic_block)
+        self.assertEqual(sqlite.writer.writes, writes)
+        self.assertTrue(ChangeCounter.objects.filter(name='inline').exists())
+
+    @override_settings(SQLITE_WRITE_COALESCING=False)
+    def test_runs_in_place_when_switched_off(self):
+        writes = sqlite.writer.writes
+        sqlite.serialized_write(create_counter, 'direct')
+        self.assertEqual(sqlite.writer.writes, writes)
@@ -0,0 +1,95 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from golf_app import sync
+from golf_app.models import ChangeCounter, HoleScore, Round, SyncTombstone, User
+
+
+class ChangesSinceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='syncer', password='unused')
+        self.other = User.objects.create_user(username='bystander', password='unused')
+        self.round = Round.objects.create(user=self.user)
+        self.hole = HoleScore.objects.create(round=self.round, hole_number=1, score=4, putts=None)
+
+    def _hole_numbers(self, token):
+        _, hole_scores, _, _ = sync.changes_since(self.user, token)
+        return [hole_score.hole_number for hole_score in hole_scores]
+
+    def test_hole_score_edits_move_their_round(self):
+        token = sync.changes_since(self.user)[3]
+        self.assertEqual(self._hole_numbers(token), [])
+
+        # Same totals, so only the change sequence tells sync about it
+        self.hole.putts = 0
+        self.hole.save()
+        self.assertEqual(self._hole_numbers(token), [1])
+
+    def test_counters_are_per_user(self):
+        before = sync.current_change_seq(self.user.pk)
+        Round.objects.create(user=self.other)
+        self.assertEqual(sync.current_change_seq(self.user.pk), before)
+        self.assertGreater(sync.current_change_seq(self.other.pk), 0)
+
+    def test_new_counters_continue_from_the_shared_one(self):
+        ChangeCounter.objects.update_or_create(name=sync.ROUNDS_COUNTER, defaults={'value': 500})
+        newcomer = User.objects.create_user(username='newcomer', password='unused')
+        self.assertEqual(sync.current_change_seq(newcomer.pk), 500)
+        self.assertEqual(Round.objects.create(user=newcomer).change_seq, 501)
+
+    def test_tokens_with_a_timestamp_still_decode(self):
+        data = json.dumps({'seq': 7, 'at': '2024-06-15T10:00:00+00:00'}).encode()
+        self.assertEqual(sync.decode_token(base64.urlsafe_b64encode(data).decode()), 7)
+        with self.assertRaises(sync.InvalidToken):
+            sync.decode_token('not-a-token')
+
+
+class TombstonePruningTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='wanderer', password='unused')
+        self.kept = Round.objects.create(user=self.user)
+        self.old_token = sync.changes_since(self.user)[3]
+        self.gone = Round.objects.create(user=self.user)
+        self.gone_id = self.gone.pk
+        self.gone.delete()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _age_tombstones(self, days):
+        SyncTombstone.objects.update(created_at=timezone.now() - timedelta(days=days))
+
+    def test_only_expired_tombstones_are_pruned(self):
+        self._age_tombstones(5)
+        self.assertEqual(sync.prune_tombstones(), 0)
+        self._age_tombstones(45)
+        self.assertEqual(sync.prune_tombstones(), 1)
+        self.assertFalse(SyncTombstone.objects.exists())
+
+    def test_tokens_from_before_the_horizon_get_a_full_resync(self):
+        self._age_tombstones(45)
+        sync.prune_tombstones()
+        with self.assertRaises(sync.ResyncRequired):
+            sync.changes_since(self.user, self.old_token)
+
+        response = self.client.get('/api/sync/', {'token': self.old_token})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['resync'])
+        self.assertEqual([row['id'] for row in response.data['rounds']], [self.kept.pk])
+
+    def test_tokens_past_the_horizon_still_sync_incrementally(self):
+        self._age_tombstones(45)
+        sync.prune_tombstones()
+        token = sync.changes_since(self.user)[3]
+        response = self.client.get('/api/sync/', {'token': token})
+        self.assertFalse(response.data['resync'])
+        self.assertEqual(response.data['rounds'], [])
+
+    def test_recent_tokens_still_see_deletions(self):
+        response = self.client.get('/api/sync/', {'token': self.old_token})
+        self.assertFalse(response.data['resync'])
+        self.assertEqual(response.data['deleted']['rounds'], [self.gone_id])
@@ -0,0 +1,60 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from golf_app.models import User
+from golf_app.user_search import UsernameIndex, username_keys
+
+
+class UsernameIndexTests(TestCase):
+    def setUp(self):
+        self.ids = {
+            user.username: user.pk
+            for user in User.objects.bulk_create(
+                User(username=name) for name in ('john', 'johnny', 'john_smith', 'smithers', 'mary-jo')
+            )
+        }
+        self.index = UsernameIndex()
+        self.index.rebuild()
+
+    def names(self, term, **kwargs):
+        by_id = {pk: name for name, pk in self.ids.items()}
+        return [by_id[user_id] for user_id in self.index.search(term, **kwargs)]
+
+    def test_keys_cover_each_word(self):
+        self.assertEqual(username_keys('John_Smith'), ['john_smith', 'john', 'smith'])
+
+    def test_exact_then_prefix_then_word_matches(self):
+        self.assertEqual(self.names('john'), ['john', 'johnny', 'john_smith'])
+        self.assertEqual(self.names('SMITH'), ['smithers', 'john_smith'])
+        self.assertEqual(self.names('jo', limit=2), ['john', 'johnny'])
+        self.assertEqual(self.names('jo', exclude={self.ids['john']}), ['johnny', 'john_smith', 'mary-jo'])
+
+    def test_upsert_and_remove_apply_in_place(self):
+        self.index.upsert(self.ids['smithers'], 'waylon')
+        self.assertEqual(self.names('smith'), ['john_smith'])
+        self.assertEqual(self.names('way'), ['smithers'])
+        self.index.remove(self.ids['john'])
+        self.assertEqual(self.names('john'), ['johnny', 'john_smith'])
+        self.assertEqual(len(self.index), 4)
+
+    @override_settings(PROCESS_CACHE_TTL=5, USER_SEARCH_REBUILD_INTERVAL=5)
+    def test_per_process_cache_rebuilds_on_a_timer(self):
+        # Another worker's new user: no signal here, and no shared version bump
+        User.objects.create(username='joanna')
+        with mock.patch('golf_app.user_search.threading.Thread') as thread:
+            self.assertEqual(self.names('joan'), [])
+            thread.assert_not_called()
+            self.index._last_rebuild -= 5
+            self.index.search('joan')
+            thread.assert_called_once()
+        self.index.rebuild()
+        self.assertEqual(self.index.search('joan'), [User.objects.get(username='joanna').pk])
+
+    @override_settings(PROCESS_CACHE_TTL=5)
+    def test_shared_cache_waits_for_a_version_bump(self):
+        self.index._last_rebuild -= 60
+        with mock.patch('golf_app.user_search.cache_is_shared', return_value=True), \
+                mock.patch('golf_app.user_search.threading.Thread') as thread:
+            self.index.search('jo')
+            thread.assert_not_called()
@@ -0,0 +1,35 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from golf_app.models import Course, User
+
+
+class CatalogETagTests(TestCase):
+    def setUp(self):
+        # Versions cached by earlier tests belong to rolled-back rows
+        cache.clear()
+        self.course = Course.objects.create(name='Version Links', city='Etagville')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='revalidator', password='unused'))
+
+    def test_etag_survives_the_cache_entry_expiring(self):
+        first = self.client.get('/api/courses/')
+        cache.clear()
+        second = self.client.get('/api/courses/')
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertEqual(first['Last-Modified'], second['Last-Modified'])
+        response = self.client.get('/api/courses/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_a_write_changes_the_etag(self):
+        etag = self.client.get('/api/courses/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.name = 'Renamed Links'
+            self.course.save()
+        self.assertNotEqual(self.client.get('/api/courses/')['ETag'], etag)
+        # Even a reader that only has the database sees it
+        cache.clear()
+        self.assertNotEqual(self.client.get('/api/courses/')['ETag'], etag)
+        response = self.client.get('/api/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,132 @@
+import threading
+import time
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from golf_app import weather
+from golf_app.cache import TTLCache
+from golf_app.models import User
+
+SUNNY = {'temperature': 21, 'description': 'clear sky', 'icon_code': '01d'}
+
+
+class TTLCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 0
+        self.cache = TTLCache(maxsize=2, ttl=10, timer=lambda: self.now)
+
+    def test_entries_expire_after_the_ttl(self):
+        self.cache.set('a', 1)
+        self.now = 9
+        self.assertEqual(self.cache.get('a'), 1)
+        self.now = 10
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_the_least_recently_used_entry_is_evicted(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual((self.cache.get('a'), self.cache.get('c')), (1, 3))
+        self.assertEqual(self.cache.evictions, 1)
+
+
+class CurrentWeatherTests(SimpleTestCase):
+    def setUp(self):
+        weather.reset_weather_cache()
+        self.addCleanup(weather.reset_weather_cache)
+        patcher = mock.patch.object(weather, 'fetch_weather', return_value=SUNNY)
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_city_spellings_share_an_entry(self):
+        self.assertEqual(weather.get_current_weather('San  Diego', 'US'), (SUNNY, False))
+        self.assertEqual(weather.get_current_weather('san diego', ' us '), (SUNNY, True))
+        self.fetch.assert_called_once_with({'q': 'san diego,us'})
+
+    def test_nearby_coordinates_share_a_cell(self):
+        weather.get_current_weather(lat=32.7157, lon=-117.1611)
+        self.assertTrue(weather.get_current_weather(lat=32.7160, lon=-117.1615)[1])
+        self.assertFalse(weather.get_current_weather(lat=40.7128, lon=-74.0060)[1])
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_upstream_errors_are_not_cached(self):
+        self.fetch.side_effect = requests.exceptions.Timeout('slow')
+        with self.assertRaises(requests.exceptions.Timeout):
+            weather.get_current_weather('Leeds')
+        self.fetch.side_effect = None
+        self.assertEqual(weather.get_current_weather('Leeds'), (SUNNY, False))
+
+
+class WeatherFanOutTests(SimpleTestCase):
+    def setUp(self):
+        weather.reset_weather_cache()
+        self.addCleanup(weather.reset_weather_cache)
+
+    def test_duplicate_locations_are_fetched_once(self):
+        with mock.patch.object(weather, 'fetch_weather', return_value=SUNNY) as fetch:
+            results = weather.get_weather_for_locations([('Leeds', 'GB'), ('leeds', 'gb'), ('York', 'GB')])
+        self.assertEqual(results, {0: SUNNY, 1: SUNNY, 2: SUNNY})
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_cached_locations_skip_the_upstream(self):
+        weather.get_weather_cache().set('city:leeds', SUNNY)
+        with mock.patch.object(weather, 'fetch_weather') as fetch:
+            self.assertEqual(weather.get_weather_for_locations([('Leeds', None)]), {0: SUNNY})
+        fetch.assert_not_called()
+
+    def test_failures_are_returned_per_location(self):
+        def fetch(params):
+            if params['q'] == 'york':
+                raise requests.exceptions.HTTPError('404')
+            return SUNNY
+
+        with mock.patch.object(weather, 'fetch_weather', side_effect=fetch):
+            results = weather.get_weather_for_locations([('Leeds', None), ('York', None)])
+        self.assertEqual(results[0], SUNNY)
+        self.assertIsInstance(results[1], requests.exceptions.HTTPError)
+
+    def test_slow_lookups_miss_the_deadline_and_warm_the_cache(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def fetch(params):
+            release.wait(5)
+            return SUNNY
+
+        with mock.patch.object(weather, 'fetch_weather', side_effect=fetch):
+            self.assertEqual(weather.get_weather_for_locations([('Leeds', None)], deadline=0.05), {0: None})
+            release.set()
+            for _ in range(100):
+                if weather.get_weather_cache().get('city:leeds') is not None:
+                    break
+                time.sleep(0.01)
+        self.assertEqual(weather.get_weather_cache().get('city:leeds'), SUNNY)
+
+
+class WeatherViewTests(TestCase):
+    def setUp(self):
+        weather.reset_weather_cache()
+        self.addCleanup(weather.reset_weather_cache)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='forecaster', password='unused'))
+
+    def test_reports_cache_hits(self):
+        with mock.patch.object(weather, 'fetch_weather', return_value=SUNNY):
+            first = self.client.get('/api/weather/', {'city': 'Leeds'})
+            second = self.client.get('/api/weather/', {'city': 'leeds'})
+        self.assertEqual(first['X-Weather-Cache'], 'MISS')
+        self.assertEqual(second['X-Weather-Cache'], 'HIT')
+        self.assertEqual(second.data, SUNNY)
+
+    def test_upstream_failures_are_a_503(self):
+        with mock.patch.object(weather, 'fetch_weather', side_effect=requests.exceptions.ConnectionError('down')):
+            response = self.client.get('/api/weather/', {'city': 'Leeds'})
+        self.assertEqual(response.status_code, 503)
+
+    def test_a_location_is_required(self):
+        self.assertEqual(self.client.get('/api/weather/').status_code, 400)
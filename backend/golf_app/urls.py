@@ -2,8 +2,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     UserViewSet, ClubViewSet, CourseViewSet, RoundViewSet, HoleScoreViewSet, 
-    DrivingRangeViewSet, AchievementViewSet, UserAchievementViewSet, LeaderboardView,
-    WeatherView, PracticeTipViewSet, FriendshipViewSet, SharedRoundView
+    DrivingRangeViewSet, AchievementViewSet, UserAchievementViewSet, LeaderboardView, LeaderboardRankView,
+    WeatherView, PracticeTipViewSet, FriendshipViewSet, SharedRoundView, SyncView
 )
 
 router = DefaultRouter()
@@ -21,6 +21,8 @@ router.register(r'friendships', FriendshipViewSet, basename='friendship')
 urlpatterns = [
     path('', include(router.urls)),
     path('leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
+    path('leaderboard/me/', LeaderboardRankView.as_view(), name='leaderboard-rank'),
     path('weather/', WeatherView.as_view(), name='weather'),
     path('shared_round/<uuid:shareable_link>/', SharedRoundView.as_view(), name='shared-round'),
+    path('sync/', SyncView.as_view(), name='sync'),
 ] 
\ No newline at end of file
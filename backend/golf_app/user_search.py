@@ -0,0 +1,163 @@
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+
+from .cache import cache_is_shared
+
+_VERSION_KEY = 'user-search:version'
+_PART_RE = re.compile(r'[^\W_]+')
+
+# How many index entries a single lookup walks before ranking
+MAX_CANDIDATES = 500
+
+
+def username_keys(username):
+    """The lowercased username plus each word inside it, e.g. ``john_smith`` -> john_smith, smith."""
+    username = username.lower()
+    keys = [username]
+    for part in _PART_RE.findall(username):
+        if part != username and part not in keys:
+            keys.append(part)
+    return keys
+
+
+class UsernameIndex:
+    """
+    In-process prefix index over usernames: a sorted list of ``(key, user_id)``
+    searched with bisect. Changes in this process are applied in place; a
+    version counter in the shared cache tells other processes to rebuild.
+    A per-process cache never carries that counter between workers, so
+    there the index is rebuilt once it is PROCESS_CACHE_TTL seconds old.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._usernames = {}
+        self._lock = threading.Lock()
+        self._built = False
+        self._seen_version = None
+        self._rebuilding = False
+        self._last_rebuild = 0.0
+
+    def rebuild(self):
+        version = _current_version()
+        usernames = dict(get_user_model().objects.values_list('id', 'username').iterator(chunk_size=10000))
+        keys = sorted(
+            (key, user_id)
+            for user_id, username in usernames.items()
+            for key in username_keys(username)
+        )
+        with self._lock:
+            self._keys = keys
+            self._usernames = usernames
+            self._built = True
+            self._seen_version = version
+            self._last_rebuild = time.monotonic()
+
+    def _remove_locked(self, user_id):
+        username = self._usernames.pop(user_id, None)
+        if username is None:
+            return
+        for key in username_keys(username):
+            index = bisect_left(self._keys, (key, user_id))
+            if index < len(self._keys) and self._keys[index] == (key, user_id):
+                del self._keys[index]
+
+    def upsert(self, user_id, username):
+        with self._lock:
+            if self._built:
+                if self._usernames.get(user_id) == username:
+                    return
+                self._remove_locked(user_id)
+                self._usernames[user_id] = username
+                for key in username_keys(username):
+                    insort(self._keys, (key, user_id))
+        self._note_local_change()
+
+    def remove(self, user_id):
+        with self._lock:
+            if self._built:
+                self._remove_locked(user_id)
+        self._note_local_change()
+
+    def _note_local_change(self):
+        version = _bump_version()
+        with self._lock:
+            # Only our own change happened since we last synced: still current
+            if self._seen_version is not None and version == self._seen_version + 1:
+                self._seen_version = version
+
+    def _ensure_fresh(self):
+        if not self._built:
+            self.rebuild()
+            return
+        if not self._stale():
+            return
+        with self._lock:
+            due = time.monotonic() - self._last_rebuild >= settings.USER_SEARCH_REBUILD_INTERVAL
+            if self._rebuilding or not due:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._background_rebuild, daemon=True).start()
+
+    def _stale(self):
+        if _current_version() != self._seen_version:
+            return True
+        return not cache_is_shared() and time.monotonic() - self._last_rebuild >= settings.PROCESS_CACHE_TTL
+
+    def _background_rebuild(self):
+        try:
+            self.rebuild()
+        finally:
+            self._rebuilding = False
+            connection.close()
+
+    def search(self, term, limit=10, exclude=()):
+        """
+        User ids whose username, or a word in it, starts with ``term``.
+        Exact matches rank first, then whole-username prefixes, then shorter names.
+        """
+        self._ensure_fresh()
+        term = term.lower()
+        candidates = {}
+        with self._lock:
+            index = bisect_left(self._keys, (term,))
+            while index < len(self._keys) and len(candidates) < MAX_CANDIDATES:
+                key, user_id = self._keys[index]
+                if not key.startswith(term):
+                    break
+                if user_id not in exclude and user_id not in candidates:
+                    candidates[user_id] = self._usernames[user_id]
+                index += 1
+
+        def rank(item):
+            user_id, username = item
+            lowered = username.lower()
+            return (lowered != term, not lowered.startswith(term), len(username), lowered, user_id)
+
+        return [user_id for user_id, _ in sorted(candidates.items(), key=rank)[:limit]]
+
+    def __len__(self):
+        return len(self._usernames)
+
+
+def _current_version():
+    return cache.get(_VERSION_KEY, 0)
+
+
+def _bump_version():
+    cache.add(_VERSION_KEY, 0, None)
+    try:
+        return cache.incr(_VERSION_KEY)
+    except ValueError:
+        cache.set(_VERSION_KEY, 1, None)
+        return 1
+
+
+username_index = UsernameIndex()
@@ -0,0 +1,58 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .cache import cross_worker_ttl
+from .models import ChangeCounter
+
+
+def _version_key(model):
+    return f'model-version:{model._meta.label_lower}'
+
+
+def _now_us():
+    return int(time.time() * 1_000_000)
+
+
+def model_version(model):
+    """
+    ``(token, changed_at)`` for a model's current contents, read from its
+    ChangeCounter row: the value is the time of the last change in epoch
+    microseconds, nudged up if needed so it always grows. Every worker
+    derives the same token from it, and it survives cache flushes. The
+    cached copy lives for cross_worker_ttl(None).
+    """
+    key = _version_key(model)
+    version = cache.get(key)
+    if version is None:
+        # Created once per model, on the first read after deploy
+        version = ChangeCounter.objects.get_or_create(name=key, defaults={'value': _now_us()})[0].value
+        cache.add(key, version, cross_worker_ttl(None))
+    return str(version), version // 1_000_000
+
+
+def bump_model_version(model):
+    """Move a model's version counter inside the caller's transaction."""
+    key = _version_key(model)
+    counter = ChangeCounter.objects.filter(pk=key)
+    with transaction.atomic():
+        if not counter.update(value=Greatest(F('value') + 1, _now_us())):
+            ChangeCounter.objects.get_or_create(name=key, defaults={'value': _now_us()})
+        version = counter.values_list('value', flat=True).get()
+    # After commit, so nobody can pair the new version with the old rows
+    transaction.on_commit(lambda: cache.set(key, version, cross_worker_ttl(None)))
+
+
+def validators(models, variant):
+    """
+    A strong ETag and a Last-Modified timestamp for a response built from
+    ``models``; ``variant`` covers everything else it depends on (path,
+    query string, format).
+    """
+    versions = [model_version(model) for model in models]
+    digest = hashlib.sha1('|'.join([variant] + [token for token, _ in versions]).encode()).hexdigest()
+    return f'"{digest[:32]}"', max(changed_at for _, changed_at in versions)
@@ -1,28 +1,77 @@
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, status, permissions, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.views import APIView
+from rest_framework.settings import api_settings
 from django.contrib.auth import get_user_model
-from django.db.models import Sum, Q, Avg, Count
+from django.db.models import Sum, Q, Avg, Count, Case, When
 from datetime import timedelta
 from django.utils import timezone
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 
 import requests
 import os
 import uuid
 
-from .models import Club, Course, Round, HoleScore, DrivingRange, Achievement, PracticeTip, UserAchievement, Friendship
+from .models import (
+    Club, Course, Round, HoleScore, DrivingRange, Achievement, PracticeTip, UserAchievement, Friendship, SyncTombstone
+)
+from . import analytics, leaderboards, sync, versions
+from .fast_serializers import RowSerializer
+from .geo import nearest
+from .renderers import CompactJSONRenderer
+from .routers import replica_reads
+from .scorecards import compact_round, save_scorecard
+from .search import search_course_ids
+from .sharing import cache_shared_round, cached_shared_round
+from .sqlite import serialized_write
+from .friends import befriend, get_friend_ids, mutual_friend_ids, suggested_friend_ids, unfriend
+from .user_search import username_index
+from .weather import get_current_weather, get_weather_for_locations
 from .serializers import (
     UserSerializer, ClubSerializer, CourseSerializer, RoundSerializer, 
     HoleScoreSerializer, DrivingRangeSerializer, AchievementSerializer, PracticeTipSerializer,
-    UserAchievementSerializer, RoundShareSerializer, FriendshipSerializer
+    UserAchievementSerializer, RoundShareSerializer, FriendshipSerializer, ScorecardSerializer, SyncRoundSerializer,
+    SyncSerializer, SyncMutationSerializer
 )
 
 User = get_user_model()
 
+round_rows = RowSerializer(RoundSerializer)
+sync_round_rows = RowSerializer(SyncRoundSerializer)
+hole_score_rows = RowSerializer(HoleScoreSerializer)
+
+
+def upsert_hole_scores(round, items):
+    # Validate each hole on its own and save the valid ones together;
+    # returns a result per item, in order
+    entries = []
+    results = [None] * len(items)
+    positions = []
+    for position, item in enumerate(items):
+        serializer = HoleScoreSerializer(data=item)
+        if serializer.is_valid():
+            entries.append(serializer.validated_data)
+            positions.append(position)
+        else:
+            results[position] = {
+                'hole_number': item.get('hole_number'),
+                'status': 'error',
+                'errors': serializer.errors,
+            }
+
+    for position, result in zip(positions, serialized_write(save_scorecard, round, entries)):
+        hole_score = result.pop('hole_score', None)
+        if hole_score is not None:
+            result['hole_score'] = HoleScoreSerializer(hole_score).data
+        results[position] = result
+    return results
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -38,14 +87,21 @@ class UserViewSet(viewsets.ModelViewSet):
         if not search_term:
             return Response({'error': 'search_term is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        users = User.objects.filter(
-            username__icontains=search_term
-        ).exclude(
-            id=request.user.id
-        )[:10]  # Limit to 10 results
-        
+        # Typeahead lookup in the in-memory username index; friends are
+        # flagged, or left out with exclude_friends=true
+        friend_ids = get_friend_ids(request.user.id)
+        exclude = {request.user.id}
+        if request.query_params.get('exclude_friends') == 'true':
+            exclude |= friend_ids
+        user_ids = username_index.search(search_term, limit=10, exclude=exclude)
+        users_by_id = User.objects.in_bulk(user_ids)
+        users = [users_by_id[user_id] for user_id in user_ids if user_id in users_by_id]
+
         serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+        return Response([
+            {**data, 'is_friend': data['id'] in friend_ids}
+            for data in serializer.data
+        ])
 
 class ClubViewSet(viewsets.ModelViewSet):
     queryset = Club.objects.all()
@@ -74,38 +130,24 @@ class WeatherView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            # Construct the API URL
-            base_url = 'http://api.openweathermap.org/data/2.5/weather'
-            params = {
-                'appid': settings.OPENWEATHER_API_KEY,
-                'units': 'metric'  # Use metric units (Celsius)
-            }
-
-            if lat and lon:
-                params.update({'lat': lat, 'lon': lon})
-            else:
-                params.update({'q': f"{city},{country_code}" if country_code else city})
-
-            # Make the API request
-            response = requests.get(base_url, params=params)
-            response.raise_for_status()  # Raise an exception for bad status codes
-            data = response.json()
-
-            # Extract and format the weather data
-            weather_data = {
-                'temperature': round(data['main']['temp']),
-                'feels_like': round(data['main']['feels_like']),
-                'description': data['weather'][0]['description'],
-                'icon_code': data['weather'][0]['icon'],
-                'city_name': data['name'],
-                'country_code': data['sys']['country'],
-                'humidity': data['main']['humidity'],
-                'wind_speed': data['wind']['speed'],
-                'clouds': data['clouds']['all']
-            }
+        if lat and lon:
+            try:
+                lat, lon = float(lat), float(lon)
+            except ValueError:
+                return Response(
+                    {'error': 'lat and lon must be numeric'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-            return Response(weather_data)
+        try:
+            # Coordinates are bucketed to a grid cell and cities normalized,
+            # so nearby requests are served from the weather cache
+            weather_data, cache_hit = get_current_weather(
+                city=city, country_code=country_code, lat=lat, lon=lon
+            )
+            response = Response(weather_data)
+            response['X-Weather-Cache'] = 'HIT' if cache_hit else 'MISS'
+            return response
 
         except requests.exceptions.RequestException as e:
             return Response(
@@ -118,10 +160,82 @@ class WeatherView(APIView):
                 status=status.HTTP_502_BAD_GATEWAY
             )
 
-class CourseViewSet(viewsets.ReadOnlyModelViewSet):
+class ConditionalGetMixin:
+    """
+    Gives list and detail GETs a strong ETag and Last-Modified built from
+    the version counters of ``conditional_models``. A request whose
+    If-None-Match or If-Modified-Since still matches gets a 304 before any
+    query or serializer runs.
+    """
+    conditional_models = ()
+
+    def conditional(self, request, build):
+        etag, last_modified = versions.validators(
+            self.conditional_models, f'{request.get_full_path()}|{request.accepted_renderer.format}'
+        )
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = build()
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(request, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(request, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
+
+class NearbyListMixin:
+    """
+    Lets a list endpoint answer ``?near=lat,lon`` with optional ``radius``
+    (km) and ``k`` from the geohash spatial index, nearest first.
+    """
+    max_nearby_results = 100
+
+    def list(self, request, *args, **kwargs):
+        near = request.query_params.get('near')
+        if not near:
+            return super().list(request, *args, **kwargs)
+
+        try:
+            lat, lon = (float(value) for value in near.split(','))
+            radius = request.query_params.get('radius')
+            radius = float(radius) if radius else None
+            k = min(int(request.query_params.get('k', 10)), self.max_nearby_results)
+        except ValueError:
+            return Response(
+                {'error': 'near must be "lat,lon"; radius and k must be numeric'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180) or k < 1 or (radius is not None and radius <= 0):
+            return Response(
+                {'error': 'near, radius or k is out of range'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = nearest(self.filter_queryset(self.get_queryset()), lat, lon, k=k, radius_km=radius)
+        serializer = self.get_serializer(results, many=True)
+        return Response(serializer.data)
+
+class CourseViewSet(ConditionalGetMixin, NearbyListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated]
+    conditional_models = (Course,)
+
+    @replica_reads
+    def list(self, request, *args, **kwargs):
+        # Catalog browsing and search are read-only; serve them from the replica
+        return super().list(request, *args, **kwargs)
+
+    def get_keyset_ordering(self):
+        # Search results keep their relevance order and are already capped
+        if self.request.query_params.get('search'):
+            return None
+        return ('id',)
 
     def get_queryset(self):
         queryset = Course.objects.all()
@@ -130,11 +244,11 @@ class CourseViewSet(viewsets.ReadOnlyModelViewSet):
         name = self.request.query_params.get('name', '')
 
         if search_term:
-            queryset = queryset.filter(
-                Q(name__icontains=search_term) |
-                Q(city__icontains=search_term) |
-                Q(address__icontains=search_term)
-            )
+            # Ranked lookup in the course search index, best match first
+            course_ids = search_course_ids(search_term, limit=settings.COURSE_SEARCH_MAX_RESULTS)
+            queryset = queryset.filter(id__in=course_ids).order_by(
+                Case(*[When(id=course_id, then=position) for position, course_id in enumerate(course_ids)])
+            ) if course_ids else queryset.none()
         if city:
             queryset = queryset.filter(city__icontains=city)
         if name:
@@ -143,6 +257,7 @@ class CourseViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    @replica_reads
     def course_search_and_weather(self, request):
         search_term = request.query_params.get('search', '')
         if not search_term:
@@ -151,40 +266,35 @@ class CourseViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Search for courses
-        courses = Course.objects.filter(
-            Q(name__icontains=search_term) |
-            Q(city__icontains=search_term) |
-            Q(address__icontains=search_term)
-        )[:5]
+        # Search for the five best-ranked courses
+        course_ids = search_course_ids(search_term, limit=5)
+        courses_by_id = Course.objects.in_bulk(course_ids)
+        courses = [courses_by_id[course_id] for course_id in course_ids if course_id in courses_by_id]
+
+        # Look up weather for every course's city concurrently; courses in
+        # the same city share one lookup and slow lookups don't hold up the
+        # response past the fan-out deadline
+        weather_by_course = get_weather_for_locations(
+            [(course.city, 'US') for course in courses]
+        )
 
-        # Get weather for each course's city
         results = []
-        for course in courses:
-            try:
-                weather_response = requests.get(
-                    'http://api.openweathermap.org/data/2.5/weather',
-                    params={
-                        'q': f"{course.city},US",
-                        'appid': settings.OPENWEATHER_API_KEY,
-                        'units': 'metric'
-                    }
-                )
-                weather_data = weather_response.json()
-                
-                results.append({
-                    'course': CourseSerializer(course).data,
-                    'weather': {
-                        'temperature': round(weather_data['main']['temp']),
-                        'description': weather_data['weather'][0]['description'],
-                        'icon': weather_data['weather'][0]['icon']
-                    }
-                })
-            except Exception as e:
-                results.append({
-                    'course': CourseSerializer(course).data,
-                    'weather': {'error': str(e)}
-                })
+        for index, course in enumerate(courses):
+            weather_data = weather_by_course[index]
+            if weather_data is None:
+                weather = {'error': 'Weather unavailable'}
+            elif isinstance(weather_data, Exception):
+                weather = {'error': str(weather_data)}
+            else:
+                weather = {
+                    'temperature': weather_data['temperature'],
+                    'description': weather_data['description'],
+                    'icon': weather_data['icon_code']
+                }
+            results.append({
+                'course': CourseSerializer(course).data,
+                'weather': weather
+            })
 
         return Response(results)
 
@@ -192,73 +302,96 @@ class RoundViewSet(viewsets.ModelViewSet):
     queryset = Round.objects.all()
     serializer_class = RoundSerializer
     permission_classes = [IsAuthenticated]
+    keyset_ordering = ('-date', '-id')
+    # ?format=compact sends each scorecard packed into one string
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [CompactJSONRenderer]
 
     def get_queryset(self):
-        return self.request.user.rounds.all()
+        return self.request.user.rounds.prefetch_related('hole_scores')
+
+    def _compact(self):
+        return self.request.accepted_renderer.format == CompactJSONRenderer.format
+
+    def list(self, request, *args, **kwargs):
+        # Build the response from values() rows: one query for the rounds
+        # and one for all of their hole scores, without per-field DRF work
+        queryset = round_rows.values(self.filter_queryset(self.get_queryset()).prefetch_related(None))
+        page = self.paginate_queryset(queryset)
+        data = round_rows.serialize(page if page is not None else list(queryset))
+        if self._compact():
+            data = [compact_round(round_data) for round_data in data]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        data = self.get_serializer(self.get_object()).data
+        return Response(compact_round(data) if self._compact() else data)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
     @action(detail=True, methods=['post'])
     def calculate_total_score(self, request, pk=None):
+        # Totals are kept up to date as hole scores change; kept for older clients
         round = self.get_object()
-        total_score = round.hole_scores.aggregate(Sum('score'))['score__sum']
-        round.total_score = total_score
-        round.save()
-        return Response({'total_score': total_score}, status=status.HTTP_200_OK)
+        return Response({'total_score': round.total_score}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    @replica_reads
     def leaderboard(self, request):
-        # Leaderboard for total scores in the last 7 days
-        start_date = timezone.now() - timedelta(days=7)
-        leaderboard_data = User.objects.filter(
-            rounds__created_at__gte=start_date,
-            rounds__is_completed=True
-        ).annotate(
-            total_score=Sum('rounds__total_score')
-        ).filter(
-            total_score__isnull=False
-        ).order_by('total_score')[:10]
+        # Leaderboard for total scores over a rolling window (7 days by
+        # default), summed from per-user score buckets instead of rounds
+        window = request.query_params.get('window', '7d')
+        try:
+            start_date = leaderboards.window_start(window)
+        except ValueError:
+            return Response(
+                {'error': "window must be a number of days like '30d', or 'season'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        leaderboard_data = leaderboards.window_totals(start_date)
 
         return Response([{
             'rank': idx + 1,
-            'username': user.username,
-            'total_score': user.total_score
-        } for idx, user in enumerate(leaderboard_data)])
+            'username': row['user__username'],
+            'total_score': row['total_score']
+        } for idx, row in enumerate(leaderboard_data)])
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    @replica_reads
     def suggest_club(self, request):
-        # Get user's recent rounds and scores
-        recent_rounds = Round.objects.filter(
-            user=request.user,
-            is_completed=True
-        ).order_by('-created_at')[:5]
-
-        if not recent_rounds:
+        # Analyze the user's recent completed rounds in one query and suggest
+        # clubs. The default (version 1) response is the original list of
+        # blow-up holes; ?version=2 returns the full analysis: by_par,
+        # by_yardage_band, problem_holes and suggestions naming clubs
+        try:
+            rounds = min(int(request.query_params.get('rounds', analytics.DEFAULT_ROUNDS)), analytics.MAX_ROUNDS)
+        except ValueError:
+            return Response({'error': 'rounds must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        version = request.query_params.get('version', '1')
+        if version not in ('1', '2'):
+            return Response({'error': 'version must be 1 or 2'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if version == '1':
+            analysis = analytics.legacy_suggestions(request.user, max(rounds, 1))
+        else:
+            analysis = analytics.suggest_clubs(request.user, max(rounds, 1))
+        if analysis is None:
             return Response(
                 {'error': 'No recent rounds found for analysis'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Analyze scores and suggest clubs
-        suggestions = []
-        for round in recent_rounds:
-            hole_scores = round.hole_scores.all()
-            for hole_score in hole_scores:
-                if hole_score.score > hole_score.round.course.holes.get(hole_number=hole_score.hole_number).par + 2:
-                    suggestions.append({
-                        'hole_number': hole_score.hole_number,
-                        'score': hole_score.score,
-                        'par': hole_score.round.course.holes.get(hole_number=hole_score.hole_number).par,
-                        'suggestion': 'Consider using a different club or practicing this hole'
-                    })
-
-        if not suggestions:
-            return Response({
-                'message': 'No specific club suggestions based on recent performance'
-            })
+        if version == '1':
+            if not analysis:
+                return Response({'message': 'No specific club suggestions based on recent performance'})
+            return Response(analysis)
 
-        return Response(suggestions)
+        if not analysis['suggestions']:
+            analysis['message'] = 'No specific club suggestions based on recent performance'
+        return Response(analysis)
 
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def share_round(self, request, pk=None):
@@ -272,6 +405,7 @@ class HoleScoreViewSet(viewsets.ModelViewSet):
     queryset = HoleScore.objects.all()
     serializer_class = HoleScoreSerializer
     permission_classes = [IsAuthenticated]
+    keyset_ordering = ('round_id', 'hole_number')
 
     def get_queryset(self):
         # Hole scores are related to a specific round of the current user
@@ -291,7 +425,7 @@ class HoleScoreViewSet(viewsets.ModelViewSet):
                 f'Hole number {hole_number} does not exist in this course'
             )
         
-        serializer.save()
+        serialized_write(serializer.save)
 
     def perform_update(self, serializer):
         # Ensure the hole score belongs to the current user
@@ -300,44 +434,70 @@ class HoleScoreViewSet(viewsets.ModelViewSet):
             raise permissions.PermissionDenied(
                 "You don't have permission to update this hole score"
             )
-        serializer.save()
+        serialized_write(serializer.save)
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_upsert(self, request):
+        # Create or update several holes of one round in a single request.
+        # Each hole is validated on its own and reported back with a status,
+        # so a client on a flaky connection can resend the whole card safely.
+        scorecard = ScorecardSerializer(data=request.data)
+        scorecard.is_valid(raise_exception=True)
+        round = scorecard.validated_data['round']
+        if round.user_id != request.user.id:
+            return Response({'error': 'Round not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        results = upsert_hole_scores(round, scorecard.validated_data['hole_scores'])
+        has_errors = any(result['status'] == 'error' for result in results)
+        return Response(
+            {'round': round.id, 'results': results},
+            status=status.HTTP_207_MULTI_STATUS if has_errors else status.HTTP_200_OK
+        )
 
-class PracticeTipViewSet(viewsets.ModelViewSet):
+class PracticeTipViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = PracticeTip.objects.all()
     serializer_class = PracticeTipSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_models = (PracticeTip,)
 
     def get_queryset(self):
         return PracticeTip.objects.all()
 
     @action(detail=False, methods=['get'])
     def practice_tips(self, request):
-        tips = self.get_queryset()
-        serializer = self.get_serializer(tips, many=True)
-        return Response(serializer.data)
+        def build():
+            tips = self.get_queryset()
+            serializer = self.get_serializer(tips, many=True)
+            return Response(serializer.data)
+        return self.conditional(request, build)
 
-class DrivingRangeViewSet(viewsets.ModelViewSet):
+class DrivingRangeViewSet(ConditionalGetMixin, NearbyListMixin, viewsets.ModelViewSet):
     queryset = DrivingRange.objects.all()
     serializer_class = DrivingRangeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_models = (DrivingRange,)
 
     def get_queryset(self):
         return DrivingRange.objects.all()
 
-class AchievementViewSet(viewsets.ModelViewSet):
+class AchievementViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Achievement.objects.all()
     serializer_class = AchievementSerializer
     permission_classes = [IsAdminUser]
+    conditional_models = (Achievement,)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def achievements(self, request):
-        achievements = self.get_queryset()
-        serializer = self.get_serializer(achievements, many=True)
-        return Response(serializer.data)
+        def build():
+            achievements = self.get_queryset()
+            serializer = self.get_serializer(achievements, many=True)
+            return Response(serializer.data)
+        return self.conditional(request, build)
 
 class UserAchievementViewSet(viewsets.ModelViewSet):
     serializer_class = UserAchievementSerializer
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ('-date_achieved', '-id')
 
     def get_queryset(self):
         return UserAchievement.objects.filter(user=self.request.user)
@@ -348,47 +508,179 @@ class UserAchievementViewSet(viewsets.ModelViewSet):
 class LeaderboardView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @replica_reads
     def get(self, request):
         metric = request.query_params.get('metric', 'average_score')
-        
-        if metric == 'average_score':
-            leaderboard = User.objects.annotate(
-                avg_score=Avg('rounds__total_score')
-            ).filter(
-                avg_score__isnull=False
-            ).order_by('avg_score')[:10]
-            
-            return Response([{
-                'rank': idx + 1,
-                'username': user.username,
-                'average_score': round(user.avg_score, 2)
-            } for idx, user in enumerate(leaderboard)])
-            
-        elif metric == 'total_rounds':
-            leaderboard = User.objects.annotate(
-                total_rounds=Count('rounds')
-            ).filter(
-                total_rounds__gt=0
-            ).order_by('-total_rounds')[:10]
-            
-            return Response([{
-                'rank': idx + 1,
-                'username': user.username,
-                'total_rounds': user.total_rounds
-            } for idx, user in enumerate(leaderboard)])
-            
-        return Response(
-            {'error': 'Invalid metric specified'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
+        if metric not in leaderboards.METRICS:
+            return Response(
+                {'error': 'Invalid metric specified'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 100)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            user_ids = leaderboards.scope_user_ids(request.user.id, request.query_params.get('scope', 'global'))
+        except ValueError:
+            return Response({'error': 'Invalid scope specified'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Reads the materialized leaderboard instead of aggregating every round;
+        # the friends scope comes from the cached friend graph
+        entries = leaderboards.top_entries(metric, limit, user_ids)
+        return Response([
+            leaderboards.leaderboard_row(rank, entry.user.username, entry, metric)
+            for rank, entry in entries
+        ])
+
+class LeaderboardRankView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @replica_reads
+    def get(self, request):
+        metric = request.query_params.get('metric', 'average_score')
+        if metric not in leaderboards.METRICS:
+            return Response(
+                {'error': 'Invalid metric specified'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            user_ids = leaderboards.scope_user_ids(request.user.id, request.query_params.get('scope', 'global'))
+        except ValueError:
+            return Response({'error': 'Invalid scope specified'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rank, entry = leaderboards.rank_for_user(request.user.id, metric, user_ids)
+        if entry is None:
+            return Response({'rank': None, 'username': request.user.username, metric: None})
+        return Response(leaderboards.leaderboard_row(rank, request.user.username, entry, metric))
 
 class SharedRoundView(APIView):
     permission_classes = [AllowAny]
+    # Public payload: skip token authentication and its user lookup
+    authentication_classes = []
 
     def get(self, request, shareable_link):
-        round_instance = get_object_or_404(Round, shareable_link=shareable_link)
-        serializer = RoundShareSerializer(round_instance)
-        return Response(serializer.data)
+        payload = cached_shared_round(shareable_link)
+        if payload is None:
+            round_instance = get_object_or_404(
+                Round.objects.select_related('course', 'user'), shareable_link=shareable_link
+            )
+            payload = dict(RoundShareSerializer(round_instance).data)
+            cache_shared_round(shareable_link, payload)
+        response = Response(payload)
+        patch_cache_control(response, public=True, max_age=settings.SHARED_ROUND_MAX_AGE)
+        return response
+
+class SyncView(APIView):
+    """
+    Offline sync for the on-course screens: a POST applies the client's
+    queued mutations, each in its own savepoint, and every response carries
+    the rounds, hole scores and deletions since the client's token plus the
+    token to send next time. Without a token the whole history is sent, as
+    it is when the token is older than the tombstone retention window; then
+    ``resync`` is true and the client should replace its local copy.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return self._changes(request, request.query_params.get('token') or None)
+
+    def post(self, request):
+        payload = SyncSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        token = payload.validated_data.get('token') or None
+        if token is not None and not self._valid_token(token):
+            return Response({'error': 'Invalid sync token'}, status=status.HTTP_400_BAD_REQUEST)
+        results = [self._apply(request.user, mutation) for mutation in payload.validated_data['mutations']]
+        return self._changes(request, token, results)
+
+    def _valid_token(self, token):
+        try:
+            sync.decode_token(token)
+        except sync.InvalidToken:
+            return False
+        return True
+
+    def _changes(self, request, token, results=None):
+        resync = False
+        try:
+            rounds, hole_scores, deleted, new_token = sync.changes_since(request.user, token)
+        except sync.InvalidToken:
+            return Response({'error': 'Invalid sync token'}, status=status.HTTP_400_BAD_REQUEST)
+        except sync.ResyncRequired:
+            resync = True
+            rounds, hole_scores, deleted, new_token = sync.changes_since(request.user)
+        data = {
+            'token': new_token,
+            'resync': resync,
+            'rounds': sync_round_rows.serialize(list(sync_round_rows.values(rounds))),
+            'hole_scores': hole_score_rows.serialize(list(hole_score_rows.values(hole_scores))),
+            'deleted': {
+                'rounds': deleted[SyncTombstone.ROUND],
+                'hole_scores': deleted[SyncTombstone.HOLE_SCORE],
+            },
+        }
+        if results is None:
+            return Response(data)
+        data['results'] = results
+        has_errors = any(result['status'] == 'error' for result in results)
+        return Response(data, status=status.HTTP_207_MULTI_STATUS if has_errors else status.HTTP_200_OK)
+
+    def _apply(self, user, mutation):
+        serializer = SyncMutationSerializer(data=mutation)
+        if not serializer.is_valid():
+            return {'op': mutation.get('op'), 'status': 'error', 'errors': serializer.errors}
+        mutation = serializer.validated_data
+        result = {'op': mutation['op']}
+        try:
+            with transaction.atomic():
+                result.update(getattr(self, f"_{mutation['op']}")(user, mutation))
+        except serializers.ValidationError as exc:
+            result.update(status='error', errors=exc.detail)
+        except (Round.DoesNotExist, HoleScore.DoesNotExist):
+            result.update(status='error', errors={'detail': 'Not found.'})
+        except IntegrityError:
+            result.update(status='error', errors={'detail': 'Conflicts with another change; sync and retry.'})
+        return result
+
+    def _save_round(self, user, mutation):
+        # Upsert by id, or by client_id so a resent create is a no-op
+        instance = None
+        data = dict(mutation['data'])
+        if 'id' in mutation:
+            instance = user.rounds.get(pk=mutation['id'])
+        elif 'client_id' in mutation:
+            instance = user.rounds.filter(client_id=mutation['client_id']).first()
+            data['client_id'] = mutation['client_id']
+        serializer = SyncRoundSerializer(instance, data=data, partial=instance is not None)
+        serializer.is_valid(raise_exception=True)
+        round = serializer.save() if instance is not None else serializer.save(user=user)
+        return {'status': 'ok', 'id': round.pk, 'client_id': round.client_id}
+
+    def _delete_round(self, user, mutation):
+        # Already gone counts as done
+        round = user.rounds.filter(pk=mutation['id']).first()
+        if round is not None:
+            round.delete()
+        return {'status': 'ok', 'id': mutation['id']}
+
+    def _save_hole_scores(self, user, mutation):
+        if 'round' in mutation:
+            round = user.rounds.get(pk=mutation['round'])
+        else:
+            round = user.rounds.get(client_id=mutation['round_client_id'])
+        results = upsert_hole_scores(round, mutation['hole_scores'])
+        has_errors = any(result['status'] == 'error' for result in results)
+        return {'status': 'error' if has_errors else 'ok', 'round': round.pk, 'results': results}
+
+    def _delete_hole_score(self, user, mutation):
+        hole_score = HoleScore.objects.filter(pk=mutation['id'], round__user=user).first()
+        if hole_score is not None:
+            hole_score.delete()
+        return {'status': 'ok', 'id': mutation['id']}
 
 class FriendshipViewSet(viewsets.ModelViewSet):
     serializer_class = FriendshipSerializer
@@ -406,22 +698,39 @@ class FriendshipViewSet(viewsets.ModelViewSet):
             raise serializers.ValidationError({'friend': 'You cannot add yourself as a friend.'})
         
         friend = get_object_or_404(User, id=friend_id)
-        serializer.save(user=self.request.user, friend=friend)
+        serialized_write(serializer.save, user=self.request.user, friend=friend)
 
     @action(detail=False, methods=['delete'], permission_classes=[IsAuthenticated])
     def remove_friend(self, request):
         friend_id = request.data.get('friend_id')
         if not friend_id:
             return Response({'error': 'friend_id is required'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        Friendship.objects.filter(
-            user=request.user,
-            friend_id=friend_id
-        ).delete()
-        
-        Friendship.objects.filter(
-            user_id=friend_id,
-            friend=request.user
-        ).delete()
-        
-        return Response(status=status.HTTP_204_NO_CONTENT) 
\ No newline at end of file
+
+        serialized_write(unfriend, request.user.id, friend_id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def _users(self, user_ids):
+        users_by_id = User.objects.in_bulk(user_ids)
+        return UserSerializer([users_by_id[user_id] for user_id in user_ids if user_id in users_by_id], many=True).data
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def mutual_friends(self, request):
+        # Intersection of the two cached friend sets
+        try:
+            other_id = int(request.query_params['user_id'])
+        except (KeyError, ValueError):
+            return Response({'error': 'user_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self._users(sorted(mutual_friend_ids(request.user.id, other_id))))
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def suggested_friends(self, request):
+        # Friends of friends ranked by overlap, from the cached friend sets
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        except ValueError:
+            limit = 20
+        suggestions = dict(suggested_friend_ids(request.user.id, limit=limit))
+        return Response([
+            {**data, 'mutual_friends': suggestions[data['id']]}
+            for data in self._users(list(suggestions))
+        ])
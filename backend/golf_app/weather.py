@@ -0,0 +1,171 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .cache import TTLCache
+from .geo import geohash_decode, geohash_encode
+
+_weather_cache = None
+_session = None
+_executor = None
+_client_lock = threading.Lock()
+
+
+def normalize_location(city, country_code=None):
+    city = ' '.join(city.split()).lower()
+    if country_code:
+        return f"{city},{country_code.strip().lower()}"
+    return city
+
+
+def get_weather_cache():
+    global _weather_cache
+    if _weather_cache is None:
+        _weather_cache = TTLCache(
+            maxsize=settings.WEATHER_CACHE_MAX_ENTRIES,
+            ttl=settings.WEATHER_CACHE_TTL,
+        )
+    return _weather_cache
+
+
+def reset_weather_cache():
+    global _weather_cache
+    _weather_cache = None
+
+
+def get_session():
+    """Shared keep-alive session so upstream calls reuse pooled connections."""
+    global _session
+    with _client_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=settings.WEATHER_POOL_SIZE,
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def get_executor():
+    global _executor
+    with _client_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.WEATHER_POOL_SIZE,
+                thread_name_prefix='weather',
+            )
+        return _executor
+
+
+def resolve_location(city=None, country_code=None, lat=None, lon=None):
+    """
+    Snap a request to its cache key and the query parameters sent upstream.
+    Coordinates are bucketed to a geohash cell and looked up at the cell
+    centre, so every caller inside the cell shares one cached answer.
+    """
+    if lat not in (None, '') and lon not in (None, ''):
+        cell = geohash_encode(float(lat), float(lon), settings.WEATHER_CACHE_PRECISION)
+        cell_lat, cell_lon = geohash_decode(cell)
+        return f"geo:{cell}", {'lat': round(cell_lat, 4), 'lon': round(cell_lon, 4)}
+    location = normalize_location(city, country_code)
+    return f"city:{location}", {'q': location}
+
+
+def fetch_weather(params):
+    response = get_session().get(
+        settings.OPENWEATHER_API_URL,
+        params={
+            **params,
+            'appid': settings.OPENWEATHER_API_KEY,
+            'units': 'metric',  # Use metric units (Celsius)
+        },
+        timeout=settings.OPENWEATHER_TIMEOUT,
+    )
+    response.raise_for_status()  # Raise an exception for bad status codes
+    data = response.json()
+
+    # Extract and format the weather data
+    return {
+        'temperature': round(data['main']['temp']),
+        'feels_like': round(data['main']['feels_like']),
+        'description': data['weather'][0]['description'],
+        'icon_code': data['weather'][0]['icon'],
+        'city_name': data['name'],
+        'country_code': data['sys']['country'],
+        'humidity': data['main']['humidity'],
+        'wind_speed': data['wind']['speed'],
+        'clouds': data['clouds']['all']
+    }
+
+
+def get_current_weather(city=None, country_code=None, lat=None, lon=None):
+    """
+    Return ``(weather_data, cache_hit)`` for a location. Upstream errors are
+    raised to the caller and never cached.
+    """
+    key, params = resolve_location(city, country_code, lat, lon)
+    cache = get_weather_cache()
+    weather_data = cache.get(key)
+    if weather_data is not None:
+        return weather_data, True
+
+    return _fetch_into_cache(key, params), False
+
+
+def _fetch_into_cache(key, params):
+    weather_data = fetch_weather(params)
+    get_weather_cache().set(key, weather_data)
+    return weather_data
+
+
+def get_weather_for_locations(locations, deadline=None):
+    """
+    Look up several ``(city, country_code)`` locations concurrently.
+
+    Locations that normalize to the same cache key are fetched once. Returns
+    a dict keyed by the position of each location in ``locations``; a value
+    is either the weather dict, the exception the lookup raised, or ``None``
+    when it did not finish before ``deadline`` seconds elapsed. Lookups that
+    miss the deadline keep running in the background and warm the cache.
+    """
+    if deadline is None:
+        deadline = settings.WEATHER_FANOUT_DEADLINE
+
+    cache = get_weather_cache()
+    cached = {}
+    futures = {}
+    keys = []
+    executor = get_executor()
+    for city, country_code in locations:
+        key, params = resolve_location(city, country_code)
+        keys.append(key)
+        if key in cached or key in futures:
+            continue
+        weather_data = cache.get(key)
+        if weather_data is not None:
+            cached[key] = weather_data
+        else:
+            futures[key] = executor.submit(_fetch_into_cache, key, params)
+
+    if futures:
+        wait(futures.values(), timeout=deadline)
+
+    results = {}
+    for index, key in enumerate(keys):
+        if key in cached:
+            results[index] = cached[key]
+            continue
+        future = futures[key]
+        if not future.done():
+            results[index] = None
+        elif future.exception() is not None:
+            results[index] = future.exception()
+        else:
+            results[index] = future.result()
+    return results
@@ -59,6 +59,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'golf_app.middleware.PinWritersToPrimaryMiddleware',
 ]
 
 ROOT_URLCONF = 'rookie_ryder_backend.urls'
@@ -92,6 +93,34 @@ DATABASES = {
     }
 }
 
+# SQLite production profile, applied to every connection (see golf_app.sqlite); SQLITE_TUNING=0 keeps SQLite's defaults
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000')),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'cache_size': -int(os.getenv('SQLITE_CACHE_KB', str(64 * 1024))),
+    'temp_store': 'memory',
+} if os.getenv('SQLITE_TUNING', '1') == '1' else {}
+
+# Group small concurrent writes (hole scores, friendships) into one transaction per batch on SQLite
+SQLITE_WRITE_COALESCING = os.getenv('SQLITE_WRITE_COALESCING', '1') == '1'
+SQLITE_WRITE_BATCH = int(os.getenv('SQLITE_WRITE_BATCH', '64'))
+SQLITE_WRITE_WAIT = float(os.getenv('SQLITE_WRITE_WAIT', '0.002'))
+
+# Optional read replica for leaderboard, search and stats reads (see golf_app.routers). REPLICA_DB_NAME
+# names a second SQLite file; with PostgreSQL, add a full 'replica' entry instead.
+if os.getenv('REPLICA_DB_NAME'):
+    DATABASES['replica'] = {**DATABASES['default'], 'NAME': os.getenv('REPLICA_DB_NAME'), 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['golf_app.routers.ReplicaRouter']
+
+# Seconds of replica lag tolerated before reads fall back to the primary, how often lag is measured, and
+# how often stamp_replica_heartbeat writes the heartbeat it is measured from (keep it below the tolerance)
+REPLICA_LAG_TOLERANCE = float(os.getenv('REPLICA_LAG_TOLERANCE', '5'))
+REPLICA_CHECK_INTERVAL = float(os.getenv('REPLICA_CHECK_INTERVAL', '1'))
+REPLICA_HEARTBEAT_INTERVAL = float(os.getenv('REPLICA_HEARTBEAT_INTERVAL', '1'))
+
 # If you want to use PostgreSQL, uncomment the following and comment out the SQLite settings above:
 # DATABASES = {
 #     'default': {
@@ -105,6 +134,23 @@ DATABASES = {
 # }
 
 
+# Cache
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached
+# when running several workers so cache invalidation is shared between them
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+# LocMemCache culls past 300 entries by default, fewer than one busy user's friend-of-friend sets
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '50000'))}
+# With a per-process cache, other workers never see an invalidation: entries they must drop on writes
+# (ETag versions, shared-round payloads, the username index) expire after this many seconds instead
+PROCESS_CACHE_TTL = int(os.getenv('PROCESS_CACHE_TTL', '5'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -156,8 +202,11 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'golf_app.authentication.CachedJWTAuthentication',
     ),
+    # Keyset pages for clients that send ?page_size= or ?cursor=; others still get plain lists
+    'DEFAULT_PAGINATION_CLASS': 'golf_app.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
 # Djoser settings
@@ -208,4 +257,36 @@ YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY', 'YOUR_YOUTUBE_DATA_API_KEY')
 
 # API Keys
 OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY', '9df3f25aa65434e71af629a6d5b69028')
-YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY', 'YOUR_YOUTUBE_DATA_API_KEY') 
\ No newline at end of file
+YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY', 'YOUR_YOUTUBE_DATA_API_KEY') 
+# Weather API and response cache
+OPENWEATHER_API_URL = os.getenv('OPENWEATHER_API_URL', 'http://api.openweathermap.org/data/2.5/weather')
+OPENWEATHER_TIMEOUT = float(os.getenv('OPENWEATHER_TIMEOUT', '5'))
+WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL', '600'))  # seconds
+WEATHER_CACHE_MAX_ENTRIES = int(os.getenv('WEATHER_CACHE_MAX_ENTRIES', '2048'))
+WEATHER_CACHE_PRECISION = int(os.getenv('WEATHER_CACHE_PRECISION', '5'))  # geohash chars, 5 is a ~5km cell
+WEATHER_POOL_SIZE = int(os.getenv('WEATHER_POOL_SIZE', '10'))  # pooled connections and fan-out workers
+WEATHER_FANOUT_DEADLINE = float(os.getenv('WEATHER_FANOUT_DEADLINE', '2.5'))  # seconds for a whole fan-out
+
+# Rolling-window leaderboard: daily score buckets older than this are compacted into monthly ones
+SCORE_BUCKET_DAILY_RETENTION_DAYS = int(os.getenv('SCORE_BUCKET_DAILY_RETENTION_DAYS', '90'))
+
+# Friend graph adjacency sets cached per user, invalidated on Friendship changes (capped by cross_worker_ttl)
+FRIEND_GRAPH_CACHE_TTL = int(os.getenv('FRIEND_GRAPH_CACHE_TTL', '3600'))
+
+# Course search index
+COURSE_SEARCH_MAX_RESULTS = int(os.getenv('COURSE_SEARCH_MAX_RESULTS', '100'))
+
+# Seconds between rebuilds of the in-process username index after another worker changed a username
+USER_SEARCH_REBUILD_INTERVAL = float(os.getenv('USER_SEARCH_REBUILD_INTERVAL', '5'))
+
+# Public shared-round payloads: server-side cache lifetime, and how long clients and CDNs may reuse a response
+SHARED_ROUND_CACHE_TTL = int(os.getenv('SHARED_ROUND_CACHE_TTL', '86400'))
+SHARED_ROUND_MAX_AGE = int(os.getenv('SHARED_ROUND_MAX_AGE', '60'))
+
+# Offline sync: mutations accepted per request, and days deletions are kept for clients to catch up on
+# (prune_sync_tombstones); a client that has been away longer gets a full resync
+SYNC_MAX_MUTATIONS = int(os.getenv('SYNC_MAX_MUTATIONS', '100'))
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', '30'))
+
+# Seconds an authenticated user stays cached between requests; saves drop it sooner
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '60'))